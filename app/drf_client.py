@@ -0,0 +1,210 @@
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from law_cancel import check as check_cancelled
+
+# 국가법령정보 공동활용(DRF) API 호출을 한곳에서 처리하는 HTTP 클라이언트.
+# 연결을 재사용하고, 시간 초과나 429ㆍ5xx 응답은 지수 백오프(지터 포함)로 재시도한다.
+# OC 키마다 호출 한도가 있으므로 lawSearch.do와 lawService.do 호출을 모두 AdaptiveLimiter 하나로 조절한다.
+
+_WAIT_SLICE = 0.1  # 호출 차례나 재시도를 기다리는 동안 요청 취소 여부를 확인하는 간격(초)
+
+class DrfError(Exception):
+    """재시도 후에도 DRF API 호출에 실패한 경우"""
+
+
+class AdaptiveLimiter:
+    """초당 호출 수(토큰 버킷)와 동시 호출 수(창)를 응답에 따라 조절하는 호출 제한기
+
+    정상 응답이 이어지면 늘리고(처음에는 창 하나만큼 성공할 때마다 두 배, 한 번이라도 줄인 뒤에는 창 하나만큼
+    성공할 때마다 창은 1, 초당 호출 수는 rate_step만큼), 시간 초과ㆍ429ㆍ5xx가 오면 둘 다 decrease배로 줄인다 (AIMD).
+    같은 혼잡으로 한꺼번에 실패한 응답들 때문에 거듭 줄이지 않도록 hold초 안에는 한 번만 줄인다.
+    429의 Retry-After가 있으면 그동안은 호출하지 않는다.
+    """
+
+    def __init__(self, rate=10.0, max_rate=100.0, min_rate=0.5, rate_step=2.0, decrease=0.7,
+                 window=4, max_window=16, hold=1.0, clock=time.monotonic):
+        self.rate = float(rate)
+        self.max_rate = max(float(max_rate), self.rate)
+        self.min_rate = min(float(min_rate), self.rate)
+        self.rate_step = rate_step
+        self.decrease = decrease
+        self.window = float(window)
+        self.max_window = max(float(max_window), self.window)
+        self.hold = hold
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._tokens = 1.0
+        self._refilled_at = clock()
+        self._in_flight = 0
+        self._slow_start = True
+        self._decreased_at = None
+        self._paused_until = 0.0
+        self._stats = {"acquired": 0, "waited_seconds": 0.0, "congested": 0, "decreases": 0}
+
+    def _refill(self, now):
+        # 버킷 크기는 창 크기: 쉬었다가 한꺼번에 몰아서 보내는 양을 동시 호출 수 이하로
+        self._tokens = min(max(1.0, self.window), self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def acquire(self):
+        """호출해도 될 때까지 기다림. 기다리는 동안 현재 요청이 취소되면 law_cancel.Cancelled"""
+        start = self._clock()
+        with self._cond:
+            while True:
+                now = self._clock()
+                self._refill(now)
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._in_flight >= int(self.window):
+                    wait = _WAIT_SLICE
+                elif self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    self._in_flight += 1
+                    self._stats["acquired"] += 1
+                    self._stats["waited_seconds"] += now - start
+                    return
+                else:
+                    wait = (1.0 - self._tokens) / self.rate
+                self._cond.wait(min(wait, _WAIT_SLICE))
+                check_cancelled()
+
+    def release(self, congested=False, retry_after=None):
+        """acquire한 호출 하나가 끝남. congested는 시간 초과ㆍ429ㆍ5xx처럼 API가 버거워한다는 신호"""
+        with self._cond:
+            self._in_flight -= 1
+            now = self._clock()
+            if congested:
+                self._stats["congested"] += 1
+                if retry_after:
+                    self._paused_until = max(self._paused_until, now + retry_after)
+                if self._decreased_at is None or now - self._decreased_at >= self.hold:
+                    self._refill(now)
+                    self.window = max(1.0, self.window * self.decrease)
+                    self.rate = max(self.min_rate, self.rate * self.decrease)
+                    self._tokens = min(self._tokens, 1.0)
+                    self._slow_start = False
+                    self._decreased_at = now
+                    self._stats["decreases"] += 1
+            else:
+                self._refill(now)
+                if self._slow_start:
+                    self.rate = min(self.max_rate, self.rate * (1 + 1 / self.window))
+                    self.window = min(self.max_window, self.window + 1)
+                else:
+                    self.rate = min(self.max_rate, self.rate + self.rate_step / self.window)
+                    self.window = min(self.max_window, self.window + 1 / self.window)
+            self._cond.notify_all()
+
+    def stats(self):
+        """현재 초당 호출 수ㆍ창 크기ㆍ진행 중인 호출 수와 누적 대기ㆍ혼잡ㆍ감소 횟수"""
+        with self._cond:
+            return dict(self._stats, rate=round(self.rate, 2), window=int(self.window), in_flight=self._in_flight,
+                        waited_seconds=round(self._stats["waited_seconds"], 3),
+                        paused_seconds=round(max(0.0, self._paused_until - self._clock()), 3))
+
+
+class DrfClient:
+    """연결 풀을 공유하는 DRF API 클라이언트. limiter(AdaptiveLimiter)를 주면 모든 호출이 그 제한을 따름"""
+
+    def __init__(self, pool_size=16, connect_timeout=3.05, read_timeout=10,
+                 max_retries=3, backoff=0.5, max_backoff=8.0, limiter=None):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.session = requests.Session()
+        # 재시도는 직접 처리하므로 urllib3의 자동 재시도는 끔
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.limiter = limiter
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _record(self, endpoint, elapsed=None, error=False, retry=False):
+        with self._lock:
+            st = self._stats.setdefault(endpoint, {
+                "calls": 0, "errors": 0, "retries": 0, "total_seconds": 0.0, "max_seconds": 0.0,
+            })
+            if elapsed is not None:
+                st["calls"] += 1
+                st["total_seconds"] += elapsed
+                st["max_seconds"] = max(st["max_seconds"], elapsed)
+            if error:
+                st["errors"] += 1
+            if retry:
+                st["retries"] += 1
+
+    def _sleep_before_retry(self, attempt):
+        # full jitter: 0 ~ min(최대 대기, 기본 대기 * 2^시도) 사이에서 무작위로 대기
+        # 기다리는 동안에도 현재 요청이 취소되면 바로 law_cancel.Cancelled
+        deadline = time.monotonic() + random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+        while True:
+            check_cancelled()
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return
+            time.sleep(min(left, _WAIT_SLICE))
+
+    def get(self, url):
+        """GET 요청을 보내고 응답을 반환. 재시도 후에도 실패하면 DrfError 발생
+
+        재시도하기 전(백오프 대기 전후)에 현재 요청이 취소되었으면 더 보내지 않고 law_cancel.Cancelled 발생.
+        """
+        endpoint = url.split("?", 1)[0].rsplit("/", 1)[-1]
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._sleep_before_retry(attempt - 1)
+                self._record(endpoint, retry=True)
+            if self.limiter is not None:
+                self.limiter.acquire()
+            congested, retry_after = True, None
+            start = time.perf_counter()
+            try:
+                try:
+                    res = self.session.get(url, timeout=(self.connect_timeout, self.read_timeout))
+                except (requests.Timeout, requests.ConnectionError) as e:
+                    self._record(endpoint, time.perf_counter() - start, error=True)
+                    last_error = e
+                    continue
+                except requests.RequestException as e:
+                    congested = False
+                    self._record(endpoint, time.perf_counter() - start, error=True)
+                    raise DrfError(f"{endpoint} 요청 실패: {e}") from e
+                self._record(endpoint, time.perf_counter() - start, error=res.status_code != 200)
+                if res.status_code == 429 or res.status_code >= 500:
+                    last_error = f"상태 코드 {res.status_code}"
+                    retry_after = _retry_after(res)
+                    continue
+                congested = False
+                res.encoding = "utf-8"
+                return res
+            finally:
+                if self.limiter is not None:
+                    self.limiter.release(congested, retry_after)
+        raise DrfError(f"{endpoint} 요청이 {self.max_retries + 1}번 모두 실패: {last_error}")
+
+    def stats(self):
+        """엔드포인트별 호출 수, 오류ㆍ재시도 수, 평균ㆍ최대 지연(초)"""
+        with self._lock:
+            result = {}
+            for endpoint, st in self._stats.items():
+                result[endpoint] = dict(st, avg_seconds=st["total_seconds"] / st["calls"] if st["calls"] else 0.0)
+            return result
+
+    def limiter_stats(self):
+        """호출 제한기의 현재 상태 (제한기가 없으면 None)"""
+        return self.limiter.stats() if self.limiter is not None else None
+
+
+def _retry_after(res):
+    # 초 단위 Retry-After만 따름 (날짜 형식은 무시)
+    value = res.headers.get("Retry-After", "").strip()
+    return float(value) if value.replace(".", "", 1).isdigit() else None
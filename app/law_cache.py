@@ -0,0 +1,212 @@
+import contextlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger("law_editor.cache")
+
+# 법령일련번호(MST)는 법령의 특정 시행본 하나를 가리키므로 같은 MST의 XML은 바뀌지 않는다.
+# 그래서 만료 시간은 두지 않고, 전체 용량이 한도를 넘으면 가장 오래 쓰이지 않은 것부터 지운다.
+
+STALE_TMP_SECONDS = 10 * 60  # 이보다 오래된 임시 파일은 쓰던 프로세스가 중단된 것으로 보고 지움
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode="wb", encoding=None):
+    """path와 같은 디렉터리의 임시 파일을 열어 주고, 블록이 끝나면 그 파일로 path를 바꿈
+
+    도중에 멈추면 임시 파일을 지우고 path에는 이전 내용이 그대로 남는다.
+    임시 파일 이름은 mkstemp로 정하므로 여러 프로세스가 같은 path에 써도 서로 겹치지 않는다.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class LawXmlCache:
+    """MST를 키로 법령 XML을 디스크에 보관하는 용량 제한 LRU 캐시"""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # MST -> 파일 크기 (오래 쓰이지 않은 것이 앞)
+        self._total_bytes = 0
+        self.enabled = max_bytes > 0
+        if self.enabled:
+            try:
+                os.makedirs(directory, exist_ok=True)
+                self._load()
+            except OSError as e:
+                logger.warning("법령 캐시 디렉터리를 사용할 수 없습니다: %s", e)
+                self.enabled = False
+
+    def _path(self, mst):
+        return os.path.join(self.directory, f"{mst}.xml")
+
+    def _load(self):
+        """디스크에 남아 있는 캐시 파일을 마지막 사용 시각 순서로 읽어들임"""
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".tmp"):
+                # 쓰기 도중 중단된 임시 파일만 정리 (다른 프로세스가 지금 쓰고 있는 파일은 건드리지 않음)
+                try:
+                    if time.time() - os.stat(path).st_mtime > STALE_TMP_SECONDS:
+                        os.remove(path)
+                except OSError:
+                    pass
+                continue
+            if not name.endswith(".xml"):
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, name[:-4], st.st_size))
+        for _, mst, size in sorted(files):
+            self._entries[mst] = size
+            self._total_bytes += size
+        self._evict()
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            mst, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._path(mst))
+            except OSError:
+                pass
+
+    def __contains__(self, mst):
+        with self._lock:
+            return str(mst) in self._entries
+
+    def get(self, mst):
+        """캐시된 XML을 반환하고, 없으면 None"""
+        mst = str(mst)
+        if not self.enabled or not mst.isdigit():
+            return None
+        with self._lock:
+            if mst not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(mst)
+        try:
+            with open(self._path(mst), "rb") as f:
+                data = f.read()
+            # 재시작 후에도 LRU 순서를 알 수 있도록 사용 시각을 기록
+            os.utime(self._path(mst))
+        except OSError:
+            # 다른 프로세스가 지운 경우 등은 캐시 미스로 처리
+            with self._lock:
+                size = self._entries.pop(mst, None)
+                if size is not None:
+                    self._total_bytes -= size
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, mst, data):
+        """XML을 원자적으로 저장 (atomic_write)"""
+        mst = str(mst)
+        if not self.enabled or not mst.isdigit() or len(data) > self.max_bytes:
+            return
+        try:
+            with atomic_write(self._path(mst)) as f:
+                f.write(data)
+        except OSError as e:
+            logger.warning("법령 캐시 저장 실패 (MST: %s): %s", mst, e)
+            return
+        with self._lock:
+            old_size = self._entries.pop(mst, None)
+            if old_size is not None:
+                self._total_bytes -= old_size
+            self._entries[mst] = len(data)
+            self._total_bytes += len(data)
+            self._evict()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class ResultCache:
+    """검색ㆍ개정문 생성 결과(이벤트 목록)를 메모리에 보관하는 유효 시간ㆍ개수 제한 LRU 캐시
+
+    법령 XML과 달리 검색 목록은 새 법령이 공포되면 바뀌므로 유효 시간을 둔다.
+    """
+
+    def __init__(self, max_entries, ttl_seconds, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # 키 -> (만료 시각, 결과)
+        self.enabled = max_entries > 0 and ttl_seconds > 0
+
+    def get(self, key):
+        """유효 시간이 남은 결과를 반환하고, 없으면 None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (self._clock() + self.ttl_seconds, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
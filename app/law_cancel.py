@@ -0,0 +1,87 @@
+import contextlib
+import contextvars
+import threading
+import time
+
+# 검색ㆍ개정문 생성 요청 하나의 시간 한도와 취소.
+# 요청을 시작한 쪽이 CancelToken을 만들어 넘기면, 법률마다 작업을 시작하기 전과 본문 조회ㆍ조항 훑기 도중에
+# 확인해서 멈춘다. 작업 스레드에서는 scope()로 현재 토큰을 정해 두고, 깊은 곳(법령 조회 등)은 check()만 부른다.
+
+_current = contextvars.ContextVar("law_cancel", default=None)
+
+
+class Cancelled(Exception):
+    """요청이 취소되었거나 시간 한도를 넘김"""
+
+
+class CancelToken:
+    """시간 한도(초)가 지나거나 cancel()을 부르면 취소되는 표시. 여러 스레드에서 함께 확인해도 됨"""
+
+    def __init__(self, timeout=None, clock=time.monotonic):
+        self._clock = clock
+        self._event = threading.Event()
+        self.deadline = None
+        self.timeout = None
+        self.reason = None
+        if timeout is not None:
+            self.limit(timeout)
+
+    def limit(self, timeout):
+        """지금부터 timeout초 뒤로 한도를 정함 (이미 더 이른 한도가 있으면 그대로)"""
+        deadline = self._clock() + timeout
+        if self.deadline is None or deadline < self.deadline:
+            self.deadline = deadline
+            self.timeout = timeout
+
+    def cancel(self, reason="사용자가 중지함"):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self):
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and self._clock() >= self.deadline:
+            self.cancel(f"시간 한도({self.timeout:g}초) 초과")
+            return True
+        return False
+
+    def remaining(self):
+        """남은 시간(초). 한도가 없으면 None"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - self._clock())
+
+    def check(self):
+        if self.cancelled:
+            raise Cancelled(self.reason)
+
+
+def make_token(timeout=None, cancel=None):
+    """timeout과 cancel 인자로 요청에 쓸 토큰을 만듦. 둘 다 없으면 None"""
+    if cancel is None:
+        return CancelToken(timeout) if timeout is not None else None
+    if timeout is not None:
+        cancel.limit(timeout)
+    return cancel
+
+
+@contextlib.contextmanager
+def scope(token):
+    """감싼 동안 check()가 token을 확인하게 함 (token이 None이면 아무것도 하지 않음)"""
+    if token is None:
+        yield
+        return
+    reset = _current.set(token)
+    try:
+        yield
+    finally:
+        _current.reset(reset)
+
+
+def check():
+    """현재 요청이 취소되었으면 Cancelled 발생"""
+    token = _current.get()
+    if token is not None:
+        token.check()
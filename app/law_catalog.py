@@ -0,0 +1,138 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from law_cache import atomic_write
+
+logger = logging.getLogger("law_editor.catalog")
+
+# 법령 목록 대장: 법률마다 가장 최근에 받은 법령일련번호(MST)와 받은 시각을 적어 둔다.
+# 법률이 개정되면 lawSearch.do 목록의 MST가 바뀌므로, 새 목록과 대장을 비교하면 새로 받을 법률만 알 수 있다.
+# 법령ID가 있으면 법령ID로, 없으면 법령명으로 같은 법률인지 판단한다 (law_index와 같은 기준).
+#
+# 파일 구조 (JSON): {"version": 1, "refreshed_at": 마지막 갱신 시각,
+#                    "laws": {법령ID: {"name": 법령명, "id": 법령ID, "mst": MST, "fetched_at": 받은 시각}}}
+
+VERSION = 1
+
+
+def law_key(law):
+    """목록의 법률 정보({"법령명", "MST", "법령ID"})에서 대장 키"""
+    return law.get("법령ID") or law["법령명"]
+
+
+def _now():
+    return time.strftime("%Y-%m-%dT%H:%M:%S")
+
+
+class LawCatalog:
+    """법률별 최신 MST와 받은 시각. path가 없으면 메모리에만 둠"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.refreshed_at = None
+        self._lock = threading.Lock()
+        self._laws = {}
+        self._key_by_name = {}
+
+    @classmethod
+    def load(cls, path):
+        """저장된 대장이 있으면 읽고, 없거나 읽을 수 없으면 빈 대장을 만듦"""
+        catalog = cls(path)
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") != VERSION:
+                    raise ValueError(f"지원하지 않는 버전 {data.get('version')}")
+            except (OSError, ValueError) as e:
+                logger.warning("법령 목록 대장을 읽을 수 없어 새로 만듭니다 (%s): %s", path, e)
+            else:
+                catalog.refreshed_at = data.get("refreshed_at")
+                catalog._laws = data["laws"]
+                catalog._key_by_name = {entry["name"]: key for key, entry in catalog._laws.items()}
+        return catalog
+
+    def __len__(self):
+        return len(self._laws)
+
+    def get(self, key):
+        """법령ID나 법령명으로 찾은 {"name", "id", "mst", "fetched_at"}. 없으면 None"""
+        with self._lock:
+            entry = self._laws.get(key)
+            if entry is None and key in self._key_by_name:
+                entry = self._laws[self._key_by_name[key]]
+            return dict(entry) if entry else None
+
+    def latest_mst(self, key):
+        entry = self.get(key)
+        return entry["mst"] if entry else None
+
+    def diff(self, laws):
+        """새 목록과 대장을 비교해 {"new", "changed", "unchanged": [법률 정보], "removed": [대장 키]}로 나눔"""
+        result = {"new": [], "changed": [], "unchanged": [], "removed": []}
+        seen = set()
+        with self._lock:
+            for law in laws:
+                key = law_key(law)
+                if key in seen:
+                    continue
+                seen.add(key)
+                entry = self._laws.get(key)
+                if entry is None:
+                    result["new"].append(law)
+                elif entry["mst"] != law["MST"]:
+                    result["changed"].append(law)
+                else:
+                    result["unchanged"].append(law)
+            result["removed"] = [key for key in self._laws if key not in seen]
+        return result
+
+    def record(self, law, fetched_at=None):
+        """법률 하나의 최신 MST를 받았다고 기록"""
+        key = law_key(law)
+        entry = {"name": law["법령명"], "id": law.get("법령ID", ""), "mst": law["MST"],
+                 "fetched_at": fetched_at or _now()}
+        with self._lock:
+            old = self._laws.get(key)
+            if old is not None and old["name"] != entry["name"]:
+                self._key_by_name.pop(old["name"], None)
+            self._laws[key] = entry
+            self._key_by_name[entry["name"]] = key
+
+    def remove(self, key):
+        """목록에서 사라진(폐지된) 법률을 지움"""
+        with self._lock:
+            entry = self._laws.pop(key, None)
+            if entry is not None:
+                self._key_by_name.pop(entry["name"], None)
+
+    def save(self, path=None):
+        """원자적으로 저장 (law_cache.atomic_write)"""
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            self.refreshed_at = _now()
+            data = json.dumps({"version": VERSION, "refreshed_at": self.refreshed_at, "laws": self._laws},
+                              ensure_ascii=False)
+        with atomic_write(path, "w", encoding="utf-8") as f:
+            f.write(data)
+        self.path = path
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import law_processor
+
+    parser = argparse.ArgumentParser(description="법령 목록을 새로 받아 대장과 비교하고, 새로 생겼거나 개정된 법률의 본문만 받습니다.")
+    parser.add_argument("--workers", type=int, help="법령 본문 동시 조회 수 (기본: LAW_MAX_WORKERS)")
+    args = parser.parse_args()
+    summary = law_processor.refresh_law_catalog(args.workers)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    sys.exit(1 if summary["failed"] else 0)
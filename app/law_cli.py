@@ -0,0 +1,268 @@
+"""여러 (찾을 단어, 바꿀 단어) 쌍의 개정문을 화면 없이 한꺼번에 만드는 명령행 도구
+
+    python app/law_cli.py pairs.csv -o result.jsonl
+    python app/law_cli.py pairs.jsonl -o result.txt --format text --procs 4
+    python app/law_cli.py pairs.csv -o result.jsonl --resume      # 중단된 작업 이어서 하기
+
+입력 파일
+  .csv    한 줄에 "찾을 단어,바꿀 단어" (첫 줄이 find,replace 또는 찾을 단어,바꿀 단어이면 머리글로 봄)
+  .jsonl  한 줄에 {"find": "...", "replace": "..."} 또는 ["찾을 단어", "바꿀 단어"]
+  그 밖    앱의 일괄 개정문 입력과 같은 형식 ("찾을 단어, 바꿀 단어", 탭, ->, → 구분)
+
+단어쌍마다 앱의 개정문 생성 기능과 같은 개정문(번호는 쌍마다 ①부터)을 만든다. 법령 API 조회는 모든 쌍이
+함께 쓰는 스레드 풀(--workers)에서, XML 파싱과 검색ㆍ조사 처리는 프로세스 풀(--procs)에서 한다.
+법령 묶음 저장소(LAW_STORE_PATH)에 있는 법률은 조회 없이 프로세스 풀 작업자가 저장소에서 바로 읽는다.
+결과는 쌍 하나가 끝날 때마다 입력 순서대로 바로 써서, --resume으로 다시 실행하면 끝난 쌍은 건너뛴다.
+본문을 가져오지 못한 법률이 있던 쌍은 끝나지 않은 것으로 보고, 출력 파일에서 그 기록을 지운 뒤 다시 처리한다.
+
+출력 형식
+  jsonl  한 줄에 {"find", "replace", "laws": 검색된 법률 수, "amendments": [개정문...],
+         "skipped": [누락 사유...], "complete": true/false} (목록 조회에 실패하면 "error")
+  text   쌍마다 "### 찾을 단어 → 바꿀 단어" 제목 아래 개정문. 끝난 쌍은 <출력 파일>.done에 따로 기록
+"""
+import argparse
+import contextlib
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import law_processor as lp
+from law_cache import atomic_write
+
+logger = logging.getLogger("law_editor.cli")
+
+HEADER_NAMES = {"find", "찾을 단어", "찾을단어"}
+
+
+def read_pairs(path):
+    """입력 파일의 단어쌍 목록 (앞뒤 공백 제거, 같은 쌍은 한 번만)"""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if path.endswith((".jsonl", ".json")):
+            pairs = []
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                if isinstance(item, dict):
+                    item = (item.get("find", item.get("찾을 단어")), item.get("replace", item.get("바꿀 단어")))
+                if (not isinstance(item, (list, tuple)) or len(item) != 2
+                        or not all(isinstance(word, str) for word in item)):
+                    raise ValueError(f"{path}:{line_no}: 찾을 단어와 바꿀 단어를 찾을 수 없습니다: {line.strip()}")
+                pairs.append(tuple(item))
+        elif path.endswith(".csv"):
+            rows = [row for row in csv.reader(f) if any(cell.strip() for cell in row)]
+            if rows and rows[0][0].strip().lower() in HEADER_NAMES:
+                rows = rows[1:]
+            pairs = []
+            for row in rows:
+                if len(row) < 2:
+                    raise ValueError(f"{path}: 찾을 단어와 바꿀 단어를 구분할 수 없습니다: {','.join(row)}")
+                pairs.append((row[0], row[1]))
+        else:
+            pairs = lp.parse_replacement_pairs(f.read())
+    unique = []
+    for find_word, replace_word in pairs:
+        pair = (find_word.strip(), replace_word.strip())
+        if not all(pair):
+            raise ValueError(f"{path}: 찾을 단어와 바꿀 단어는 비워둘 수 없습니다: {pair}")
+        if pair not in unique:
+            unique.append(pair)
+    return unique
+
+
+class Runner:
+    """단어쌍 하나씩 목록 조회 → 본문 조회(공유 스레드 풀) → 파싱ㆍ검색(프로세스 풀) → 번호 붙이기
+
+    본문 조회와 파싱ㆍ검색은 law_processor.pipeline_in_order로 이어 붙여, 조회 스레드가 프로세스 풀의 결과를 기다리지 않는다.
+    """
+
+    def __init__(self, fetch_pool, fetch_workers, process_pool=None, use_index=None, process_workers=1):
+        self.fetch_pool = fetch_pool
+        self.fetch_workers = fetch_workers
+        self.process_pool = process_pool
+        self.process_workers = process_workers
+        self.use_index = lp.USE_INDEX if use_index is None else use_index
+
+    def run_pair(self, pair):
+        find_word, replace_word = pair
+        record = {"find": find_word, "replace": replace_word}
+        pairs = [pair]
+        failures = []
+        amendments, skipped = [], []
+        try:
+            laws = lp.stream_law_list(find_word, self.use_index)
+            results = lp.pipeline_in_order(lambda law: lp.prepare_amendment(law, pairs, failures), lp.amend_law_xml,
+                                           laws, self.fetch_workers, self.process_pool, self.process_workers,
+                                           self.fetch_pool)
+            for idx, (law, (result_lines, reason)) in enumerate(results):
+                if reason:
+                    skipped.append(reason)
+                if result_lines:
+                    amendments.append(lp.format_amendment(idx, law["법령명"], result_lines))
+        except lp.DrfError as e:
+            record.update(error=str(e), complete=False)
+            return record
+        record.update(laws=laws.total, amendments=amendments, skipped=skipped, complete=not failures)
+        return record
+
+    def run(self, pairs, jobs=1):
+        """단어쌍 결과를 입력 순서대로 하나씩 돌려줌. jobs개 쌍까지 동시에 처리"""
+        return lp.map_in_order(self.run_pair, pairs, max_workers=jobs)
+
+
+class JsonlOutput:
+    def __init__(self, path):
+        self.path = path
+
+    def finished(self):
+        """이미 끝난 단어쌍. 다시 처리할 쌍(미완료ㆍ오류)의 기록과 중단되어 잘린 마지막 줄은 파일에서 지움"""
+        done = set()
+        kept = []
+        with open(self.path, "rb") as f:
+            lines = f.readlines()
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if record.get("complete"):
+                done.add((record["find"], record["replace"]))
+                kept.append(line if line.endswith(b"\n") else line + b"\n")
+        if kept != lines:
+            logger.warning("%s에서 다시 처리할 쌍과 잘린 기록 %d줄을 지웁니다.", self.path, len(lines) - len(kept))
+            with atomic_write(self.path) as f:
+                f.write(b"".join(kept))
+        return done
+
+    @staticmethod
+    def format(record):
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+class TextOutput:
+    def __init__(self, path):
+        self.path = path
+        self.done_path = path + ".done" if path else None
+
+    def finished(self):
+        """<출력 파일>.done에 기록된 끝난 단어쌍. 출력 파일에서는 끝난 쌍의 부분만 남기고 나머지는 지움"""
+        done = set()
+        if os.path.exists(self.done_path):
+            with open(self.done_path, encoding="utf-8") as f:
+                for line in f:
+                    with contextlib.suppress(ValueError):
+                        done.add(tuple(json.loads(line)))
+        headings = {self.heading(*pair) for pair in done}
+        with open(self.path, encoding="utf-8") as f:
+            text = f.read()
+        # 쌍마다 "### " 제목 줄부터 다음 제목 줄 전까지가 한 부분
+        sections, keep = [], False
+        for line in text.splitlines(keepends=True):
+            if line.startswith("### "):
+                keep = line.rstrip("\n") in headings
+            if keep:
+                sections.append(line)
+        kept = "".join(sections)
+        if kept != text:
+            logger.warning("%s에서 끝나지 않은 쌍의 결과를 지웁니다.", self.path)
+            with atomic_write(self.path) as f:
+                f.write(kept.encode("utf-8"))
+        return done
+
+    @staticmethod
+    def heading(find_word, replace_word):
+        return f"### {find_word} → {replace_word}"
+
+    @classmethod
+    def format(cls, record):
+        lines = [cls.heading(record["find"], record["replace"])]
+        if "error" in record:
+            lines.append(f"⚠️ 법령 목록을 가져오지 못했습니다: {record['error']}")
+        else:
+            lines.extend(record["amendments"] or ["⚠️ 개정 대상 조문이 없습니다."])
+            if not record["complete"]:
+                lines.append("⚠️ 일부 법률의 본문을 가져오지 못했습니다. --resume으로 다시 실행하면 이 쌍을 다시 처리합니다.")
+        return "\n\n".join(lines) + "\n\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="단어쌍 파일 (.csv, .jsonl, 그 밖은 줄마다 \"찾을 단어, 바꿀 단어\")")
+    parser.add_argument("-o", "--output", help="결과 파일 (기본: 표준 출력)")
+    parser.add_argument("--format", choices=("jsonl", "text"), help="출력 형식 (기본: 출력 파일 확장자가 .jsonl이면 jsonl, 아니면 text)")
+    resume = parser.add_mutually_exclusive_group()
+    resume.add_argument("--resume", action="store_true", help="출력 파일에 이미 끝난 쌍은 건너뛰고 이어서 씀")
+    resume.add_argument("--overwrite", action="store_true", help="출력 파일이 있으면 지우고 새로 씀")
+    parser.add_argument("--workers", type=int, default=lp.MAX_WORKERS, help="법령 본문 동시 조회 수 (기본: LAW_MAX_WORKERS)")
+    parser.add_argument("--procs", type=int, default=os.cpu_count() or 1,
+                        help="파싱ㆍ검색 프로세스 수 (기본: CPU 수, 0이면 조회 스레드에서 직접 처리)")
+    parser.add_argument("--jobs", type=int, default=2, help="동시에 처리할 단어쌍 수")
+    parser.add_argument("--use-index", action="store_true", default=None, help="로컬 색인으로 법률 목록을 만듦")
+    args = parser.parse_args()
+
+    try:
+        pairs = read_pairs(args.input)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    fmt = args.format or ("jsonl" if args.output and args.output.endswith(".jsonl") else "text")
+    output = (JsonlOutput if fmt == "jsonl" else TextOutput)(args.output)
+
+    done = set()
+    if args.output and os.path.exists(args.output):
+        if args.resume:
+            done = output.finished()
+        elif not args.overwrite:
+            parser.error(f"출력 파일이 이미 있습니다: {args.output} (이어서 하려면 --resume, 새로 하려면 --overwrite)")
+    todo = [pair for pair in pairs if pair not in done]
+    print(f"단어쌍 {len(pairs)}개 중 {len(pairs) - len(todo)}개는 이미 끝남, {len(todo)}개 처리", file=sys.stderr)
+
+    start = time.perf_counter()
+    finished = incomplete = 0
+    mode = "a" if args.resume else "w"
+    with contextlib.ExitStack() as stack:
+        out = stack.enter_context(open(args.output, mode, encoding="utf-8")) if args.output else sys.stdout
+        done_file = None
+        if fmt == "text" and args.output:
+            done_file = stack.enter_context(open(output.done_path, mode, encoding="utf-8"))
+        fetch_pool = stack.enter_context(ThreadPoolExecutor(max_workers=max(args.workers, 1)))
+        process_pool = None
+        if args.procs > 0:
+            # 조회 스레드가 도는 중에 fork하지 않도록 spawn으로 작업자를 띄움
+            process_pool = stack.enter_context(ProcessPoolExecutor(
+                max_workers=args.procs, mp_context=multiprocessing.get_context("spawn")))
+        runner = Runner(fetch_pool, max(args.workers, 1), process_pool, args.use_index, args.procs)
+        try:
+            for record in runner.run(todo, args.jobs):
+                out.write(output.format(record))
+                out.flush()
+                if record["complete"]:
+                    finished += 1
+                    if done_file:
+                        done_file.write(json.dumps([record["find"], record["replace"]], ensure_ascii=False) + "\n")
+                        done_file.flush()
+                else:
+                    incomplete += 1
+                print(f"[{finished + incomplete}/{len(todo)}] {record['find']} → {record['replace']}: "
+                      + (f"오류 {record['error']}" if "error" in record
+                         else f"{record['laws']}개 법률 중 {len(record['amendments'])}개 개정"
+                              + ("" if record["complete"] else " (본문 조회 실패 있음)")),
+                      file=sys.stderr)
+        except KeyboardInterrupt:
+            print("중단되었습니다. --resume으로 이어서 할 수 있습니다.", file=sys.stderr)
+            fetch_pool.shutdown(wait=False, cancel_futures=True)
+            if process_pool:
+                process_pool.shutdown(wait=False, cancel_futures=True)
+            sys.exit(130)
+    print(f"완료 {finished}개, 미완료 {incomplete}개, {time.perf_counter() - start:.1f}초", file=sys.stderr)
+    sys.exit(1 if incomplete else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,108 @@
 import streamlit as st
+import itertools
 import os
-import importlib.util
+import sys
+
+# Streamlit은 위젯을 바꿀 때마다 이 스크립트를 다시 실행하지만, import한 모듈은 프로세스에 한 번만 올라가므로
+# 연결 풀ㆍ캐시ㆍ결과 캐시를 모든 세션이 함께 쓴다
+base_dir = os.path.abspath(os.path.dirname(__file__))
+if base_dir not in sys.path:
+    sys.path.insert(0, base_dir)
+import law_processor
 
 st.set_page_config(layout="wide")
 
 st.markdown("<h1 style='font-size:20px;'>📘 부칙개정 도우미 (100.001.14.09)</h1>", unsafe_allow_html=True)
 
-base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app"))
-processor_path = os.path.join(base_dir, "law_processor.py")
-spec = importlib.util.spec_from_file_location("law_processor", processor_path)
-law_processor = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(law_processor)
-
 run_amendment_logic = law_processor.run_amendment_logic
 # run_search_logic = lambda q, u: {}  # placeholder (기본형에서 미사용)
 run_search_logic = law_processor.run_search_logic 
 
+diagnostics_on = st.sidebar.checkbox("🩺 진단 정보 표시", help="단계별 소요 시간과 API 호출 통계를 결과 아래에 보여줍니다.")
+# 사이드바는 본문보다 먼저 그려지므로, 이번 실행에서 생긴 적중ㆍ미스까지 반영하려면 자리만 잡아 두고 마지막에 채움
+cache_panel = st.sidebar.empty()
+
+with st.sidebar:
+    catalog = law_processor.get_law_catalog()
+    if st.button("🔄 개정된 법률 받기", help="전체 법률 목록을 새로 받아 새로 생겼거나 개정된 법률의 본문만 미리 받아 둡니다."):
+        try:
+            with st.spinner("법률 목록 비교 중..."):
+                refreshed = law_processor.refresh_law_catalog()
+        except law_processor.DrfError as e:
+            st.error(f"법령 API 호출에 실패했습니다. ({e})")
+        else:
+            st.success(f"신규 {refreshed['new']} · 개정 {refreshed['changed']} · 폐지 {refreshed['removed']}건, "
+                       f"{refreshed['downloaded']}개 본문을 받았습니다."
+                       + (f" (저장소에 있는 {refreshed['from_store']}개는 받지 않음)" if refreshed["from_store"] else "")
+                       + (f" ({refreshed['failed']}개 실패)" if refreshed["failed"] else ""))
+    st.caption(f"법률 목록 대장: {len(catalog)}개 법률 · 마지막 갱신 {catalog.refreshed_at or '없음'}")
+    store = law_processor.get_law_store()
+    if len(store):
+        st.caption(f"법령 묶음 저장소: {len(store)}개 법률 (API 조회 없이 읽음)")
+
+time_budget = st.sidebar.number_input(
+    "⏱ 요청당 시간 한도(초)", min_value=0, step=30, value=int(law_processor.TIME_BUDGET),
+    help="0이면 제한 없음. 한도를 넘기면 그때까지의 결과를 보여주고, 남은 법률은 '이어서 처리'로 계속할 수 있습니다.")
+
+def budgeted_events(name, make_events):
+    """시간 한도 안에서 이벤트를 흘려보냄
+
+    다 끝내지 못했으면 지금까지의 이벤트를 세션에 보관해 두고, 다시 그릴 때는 보관한 것을 그대로 흘려보낸다.
+    "이어서 처리"를 누르면 보관한 결과 뒤에 남은 법률의 결과를 이어 붙인다.
+    make_events(timeout, resume)는 law_processor.iter_*_logic을 부르는 함수.
+    """
+    partial = st.session_state.setdefault("partial_runs", {})
+    saved = partial.get(name)
+    timeout = time_budget or None
+    if saved is None:
+        events = make_events(timeout, None)
+    elif st.session_state.pop(f"continue:{name}", False):
+        events = itertools.chain((e for e in saved if e["type"] == "result"), make_events(timeout, saved[-1]))
+    else:
+        events = iter(saved)
+    collected = []
+    for event in events:
+        collected.append(event)
+        yield event
+    if collected and collected[-1]["type"] == "incomplete":
+        partial[name] = collected
+    else:
+        partial.pop(name, None)
+
+def show_incomplete(status, name, event):
+    status.warning(law_processor.incomplete_message(event))
+    st.button("▶ 이어서 처리", key=f"continue_button:{name}",
+              on_click=lambda: st.session_state.update({f"continue:{name}": True}))
+
+def show_result_cache_stats():
+    stats = law_processor.result_cache.stats()
+    with cache_panel.container():
+        st.metric("결과 캐시 적중률", f"{stats['hit_rate']:.0%}",
+                  help="같은 검색어ㆍ단어쌍을 최근에 누군가 실행했다면 API를 다시 호출하지 않고 저장된 결과를 보여줍니다.")
+        st.caption(f"적중 {stats['hits']} · 미스 {stats['misses']} · 보관 {stats['entries']}/{stats['max_entries']}건 "
+                   f"(유효 {stats['ttl_seconds'] / 60:.0f}분)")
+
+def show_diagnostics(trace):
+    """요청 하나의 단계별 소요 시간(law_trace)과 API 호출ㆍ캐시 통계"""
+    if not diagnostics_on:
+        return
+    summary = trace.summary()
+    with st.expander(f"🩺 진단 정보 (전체 {summary['wall_seconds']:.2f}초)"):
+        st.caption("병렬로 처리되는 단계(fetch, parse, scan 등)의 합계는 작업자 시간의 합이라 전체 시간보다 클 수 있습니다.")
+        st.table([{"단계": name, **stats} for name, stats in summary["spans"].items()])
+        st.json({"counters": summary["counters"], "api": law_processor.drf_client.stats(),
+                 "rate_limit": law_processor.drf_client.limiter_stats(),
+                 "xml_cache": law_processor.xml_cache.stats(), "coalesced": law_processor.flight_stats()})
+
 with st.expander("ℹ️ 사용법 안내"):
     st.markdown(      
-             "- 이 앱은 다음 두 가지 기능을 제공합니다:\n"
+             "- 이 앱은 다음 세 가지 기능을 제공합니다:\n"
         "  1. **검색 기능**: 검색어가 포함된 법률 조항을 반환합니다.\n"
-        "     - 단일검색어 기반입니다. \n"
-        "     - 다중검색어 또는 논리연산자(AND, OR, NOT 등)는 지원하지 않습니다. 언젠가 기능이 추가될 수도 있어요. 언젠가는.\n" 
+        "     - 논리연산자(대문자 AND, OR, NOT)와 괄호로 여러 검색어를 조합할 수 있습니다. 예) `(법원 OR 검찰) AND 판사`, `법원 NOT 가정법원`\n"
+        "     - 조건은 조항(조문ㆍ항ㆍ호ㆍ목)마다 따집니다. 연산자를 검색어로 쓰려면 `\"AND\"`처럼 따옴표로 감싸주세요.\n"
         "  2. **개정문 생성**: 특정 단어를 다른 단어로 대체하는 부칙 개정문을 자동 생성합니다.\n"
         "     - 21번째 항목부터는 원문자가 아닌 일반숫자로 항목 번호가 표기됩니다. 오류가 아닙니다. 개선예정.\n" 
+        "  3. **일괄 개정문 생성**: 여러 단어쌍(기관명 변경 등)을 한 번에 처리해 법률별 개정문 하나로 묶어줍니다.\n"
         "- 이 앱은 업무망에서는 작동하지 않습니다. 인터넷망에서 사용해주세요. \n"
         "- 속도가 느립니다. 네트워크 속도나 시스템 성능 탓이 아닙니다. 원래 느린 앱이예요. \n"
         "- 오류가 있을 수 있습니다. 오류를 발견하시는 분은 사법법제과 김재우(jwkim@assembly.go.kr)로 알려주시면 감사하겠습니다. (캡쳐파일도 같이 주시면 좋아요)"
@@ -31,24 +110,127 @@ with st.expander("ℹ️ 사용법 안내"):
   
 st.header("🔍 검색 기능")
 search_query = st.text_input("검색어 입력", key="search_query")
-do_search = st.button("검색 시작")
-if do_search and search_query:
-    with st.spinner("🔍 검색 중..."):
-        result = law_processor.run_search_logic(search_query, unit="법률")
-        st.success(f"{len(result)}개의 법률을 찾았습니다")
-        for law_name, sections in result.items():
-            with st.expander(f"📄 {law_name}"):
-                for html in sections:
-                    st.markdown(html, unsafe_allow_html=True)
+if st.button("검색 시작") and search_query:
+    st.session_state["active_search"] = search_query
+    st.session_state["search_page"] = 1
+    st.session_state.get("partial_runs", {}).pop(f"search:{search_query}", None)
+# 다른 위젯을 바꿔 다시 실행될 때도 마지막 결과를 유지 (결과 캐시에서 바로 가져옴)
+active_search = st.session_state.get("active_search")
+
+def show_search_law(number, law_name, sections):
+    """법률 하나의 검색 결과. HTML은 펼쳤을 때만 만듦"""
+    expander = st.expander(f"📄 {law_name} ({len(sections)}개 조문)", key=f"search_law:{active_search}:{number}",
+                           on_change="rerun")
+    if expander.open:
+        with expander:
+            for hits in sections:
+                st.markdown(law_processor.render_search_section(hits), unsafe_allow_html=True)
+
+if active_search:
+    page_size = st.session_state.get("search_page_size", law_processor.SEARCH_PAGE_SIZE)
+    page = st.session_state.get("search_page", 1)
+    first, last = (page - 1) * page_size, page * page_size
+    # 법률별 결과가 나오는 대로 현재 페이지에 해당하는 것만 화면에 덧붙임
+    status = st.empty()
+    progress = st.progress(0.0)
+    found = 0
+    incomplete = None
+    search_name = f"search:{active_search}"
+    with law_processor.collect_trace("search") as trace:
+        try:
+            with st.spinner("🔍 검색 중..."):
+                events = budgeted_events(search_name, lambda timeout, resume: law_processor.iter_search_logic(
+                    active_search, unit="법률", timeout=timeout, resume=resume))
+                for event in events:
+                    if event["type"] == "progress":
+                        total = event["total"]
+                        progress.progress(event["done"] / total if total else 1.0)
+                        status.info(f"{event['done']}/{total}개 법률 확인 중... ({found}개 법률에서 발견)")
+                    elif event["type"] == "incomplete":
+                        incomplete = event
+                    else:
+                        found += 1
+                        if first < found <= last:
+                            show_search_law(found, event["law_name"], event["hits"])
+        except law_processor.QueryError as e:
+            status.error(f"검색식을 확인해주세요: {e}")
+        except law_processor.DrfError as e:
+            status.error(f"법령 API 호출에 실패했습니다. 잠시 후 다시 시도해주세요. ({e})")
+        else:
+            if incomplete:
+                show_incomplete(status, search_name, incomplete)
+            else:
+                status.success(f"{found}개의 법률을 찾았습니다")
+    progress.empty()
+    pages = max(1, -(-found // page_size))
+    if pages > 1 or page > 1:
+        col_page, col_size = st.columns(2)
+        col_page.number_input(f"페이지 (전체 {pages}쪽)", min_value=1, max_value=max(pages, page), key="search_page")
+        col_size.number_input("페이지당 법률 수", min_value=5, max_value=200, step=5,
+                              value=law_processor.SEARCH_PAGE_SIZE, key="search_page_size")
+    show_diagnostics(trace)
 
 st.header("✏️ 타법개정문 생성")
 find_word = st.text_input("찾을 단어")
 replace_word = st.text_input("바꿀 단어")
-do_amend = st.button("개정문 생성")
-
-if do_amend and find_word and replace_word:
-    with st.spinner("🛠 개정문 생성 중..."):
-        result = run_amendment_logic(find_word, replace_word)
-        st.success("개정문 생성 완료")
-        for amend in result:
-            st.markdown(amend, unsafe_allow_html=True)
+if st.button("개정문 생성") and find_word and replace_word:
+    st.session_state["active_amend"] = (find_word, replace_word)
+    st.session_state.get("partial_runs", {}).pop("amend", None)
+
+def show_amendments(make_events, name="amend"):
+    """개정문 이벤트를 받는 대로 화면에 덧붙임. make_events(timeout, resume)는 iter_*_logic을 부르는 함수"""
+    status = st.empty()
+    progress = st.progress(0.0)
+    found = 0
+    incomplete = None
+    with law_processor.collect_trace(name) as trace:
+        try:
+            with st.spinner("🛠 개정문 생성 중..."):
+                for event in budgeted_events(name, make_events):
+                    if event["type"] == "progress":
+                        total = event["total"]
+                        progress.progress(event["done"] / total if total else 1.0)
+                        status.info(f"{event['done']}/{total}개 법률 확인 중...")
+                    elif event["type"] == "incomplete":
+                        incomplete = event
+                    else:
+                        found += 1
+                        st.markdown(event["amendment"], unsafe_allow_html=True)
+        except law_processor.DrfError as e:
+            status.error(f"법령 API 호출에 실패했습니다. 잠시 후 다시 시도해주세요. ({e})")
+        else:
+            if incomplete:
+                show_incomplete(status, name, incomplete)
+            else:
+                status.success("개정문 생성 완료")
+                if not found:
+                    st.markdown("⚠️ 개정 대상 조문이 없습니다.")
+    progress.empty()
+    show_diagnostics(trace)
+
+if st.session_state.get("active_amend"):
+    show_amendments(lambda timeout, resume: law_processor.iter_amendment_logic(
+        *st.session_state["active_amend"], timeout=timeout, resume=resume))
+
+st.header("📚 일괄 개정문 생성")
+pairs_text = st.text_area(
+    "찾을 단어와 바꿀 단어 (한 줄에 한 쌍씩, 쉼표로 구분)",
+    placeholder="행정안전부, 행정자치부\n행정안전부장관, 행정자치부장관",
+)
+if st.button("일괄 개정문 생성") and pairs_text.strip():
+    try:
+        st.session_state["active_batch"] = law_processor.normalize_replacement_pairs(
+            law_processor.parse_replacement_pairs(pairs_text)
+        )
+        st.session_state.get("partial_runs", {}).pop("batch_amend", None)
+    except ValueError as e:
+        st.session_state.pop("active_batch", None)
+        st.error(str(e))
+
+if st.session_state.get("active_batch"):
+    pairs = st.session_state["active_batch"]
+    st.caption(f"{len(pairs)}개 단어쌍을 한 번에 처리합니다. 법률마다 하나의 개정문으로 묶어 보여줍니다.")
+    show_amendments(lambda timeout, resume: law_processor.iter_batch_amendment_logic(
+        pairs, timeout=timeout, resume=resume), "batch_amend")
+
+show_result_cache_stats()
@@ -0,0 +1,137 @@
+import threading
+
+from law_cancel import Cancelled, check as check_cancelled
+from law_trace import count
+
+# 같은 일을 동시에 여러 번 하지 않게 묶기 (singleflight)
+#
+# Streamlit 세션들은 한 프로세스의 스레드이므로, 여러 사람이 같은 검색어를 동시에 찾으면 같은 목록 페이지와
+# 같은 MST의 본문을 세션마다 따로 요청하게 된다. 같은 키의 호출이 진행 중이면 새로 시작하지 않고
+# 먼저 시작한 호출이 끝나기를 기다려 그 결과(또는 예외)를 함께 받는다. 끝난 뒤의 재사용은 캐시가 맡는다.
+
+_WAIT_SLICE = 0.1  # 기다리는 동안 자기 요청의 취소 여부를 확인하는 간격(초)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _Stream:
+    __slots__ = ("cond", "events", "closed", "finished", "error")
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.events = []
+        self.closed = False
+        self.finished = False
+        self.error = None
+
+
+class SingleFlight:
+    """키별로 진행 중인 호출을 하나만 두는 묶음. calls는 실제로 실행한 수, shared는 함께 받아 아낀 수"""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0
+        self.shared = 0
+
+    def _join(self, table, key, make):
+        with self._lock:
+            call = table.get(key)
+            if call is None:
+                call = table[key] = make()
+                self.calls += 1
+                return call, True
+            self.shared += 1
+        count(f"{self.name}_shared")
+        return call, False
+
+    def _leave(self, table, key):
+        with self._lock:
+            del table[key]
+
+    def do(self, key, func):
+        """func()를 실행해 결과를 반환. 같은 key로 진행 중인 호출이 있으면 그 결과를 기다려 받음
+
+        기다리는 쪽은 자기 요청이 취소되면(law_cancel) Cancelled로 빠져나온다. 먼저 시작한 호출이
+        그 요청의 취소로 멈췄으면 결과를 넘겨받지 않고 다시 시도한다.
+        """
+        while True:
+            call, leader = self._join(self._calls, key, _Call)
+            if leader:
+                try:
+                    call.result = func()
+                except BaseException as e:
+                    call.error = e
+                    raise
+                finally:
+                    self._leave(self._calls, key)
+                    call.done.set()
+                return call.result
+            while not call.done.wait(_WAIT_SLICE):
+                check_cancelled()
+            if isinstance(call.error, Cancelled):
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+    def stream(self, key, make_events):
+        """make_events()가 만드는 이벤트를 흘려보냄. 같은 key로 진행 중인 흐름이 있으면 그 이벤트를 함께 받음
+
+        먼저 시작한 쪽이 도중에 그만두면(화면을 떠나는 등) 이어 받던 쪽은 make_events()로 다시 만들면서
+        이미 받은 만큼 건너뛴다. 이벤트는 같은 입력이면 같은 순서로 나와야 한다.
+        """
+        shared, leader = self._join(self._calls, ("stream", key), _Stream)
+        if leader:
+            yield from self._lead(key, shared, make_events)
+            return
+        sent = 0
+        while True:
+            with shared.cond:
+                while sent == len(shared.events) and not shared.closed:
+                    shared.cond.wait()
+                batch = shared.events[sent:]
+                closed = shared.closed
+            for event in batch:
+                yield event
+            sent += len(batch)
+            if closed and sent == len(shared.events):
+                break
+        if shared.finished:
+            return
+        if shared.error is not None:
+            raise shared.error
+        for i, event in enumerate(make_events()):
+            if i >= sent:
+                yield event
+
+    def _lead(self, key, shared, make_events):
+        try:
+            for event in make_events():
+                with shared.cond:
+                    shared.events.append(event)
+                    shared.cond.notify_all()
+                yield event
+            shared.finished = True
+        except GeneratorExit:
+            raise
+        except BaseException as e:
+            shared.error = e
+            raise
+        finally:
+            self._leave(self._calls, ("stream", key))
+            with shared.cond:
+                shared.closed = True
+                shared.cond.notify_all()
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self.calls, "shared": self.shared}
@@ -0,0 +1,280 @@
+import array
+import bisect
+import json
+import logging
+import mmap
+import os
+import sys
+import threading
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+
+from law_cache import atomic_write
+from law_provisions import clean, parse_provisions
+
+logger = logging.getLogger("law_editor.index")
+
+# 로컬 법령 본문 색인
+#
+# 조문ㆍ항ㆍ호ㆍ목 하나하나를 "조항"으로 보고, 공백을 없앤 조항 본문의 글자 2-gram마다
+# 그 2-gram이 들어 있는 조항 번호 목록(postings)을 둔다. 한국어는 띄어쓰기와 조사 때문에
+# 단어 단위 색인이 잘 맞지 않으므로 글자 n-gram을 쓴다.
+# 색인 파일은 mmap으로 열어 필요한 부분만 읽으므로 시작할 때 드는 비용이 거의 없다.
+#
+# 파일 구조: MAGIC(8) | 헤더 길이(4) | 헤더 JSON | 8바이트 정렬된 구역들
+#   gram_keys   Q  2-gram 키 (정렬됨)
+#   gram_starts I  2-gram별 postings 시작 위치 (개수+1)
+#   postings    I  조항 번호
+#   prov_law    I  조항별 법률 슬롯
+#   text_starts Q  조항별 본문 시작 바이트 (개수+1)
+#   texts       B  공백을 없앤 조항 본문 (UTF-8)
+
+MAGIC = b"LAWIDX01"
+
+
+def _gram_keys(text):
+    return {(ord(text[i]) << 21) | ord(text[i + 1]) for i in range(len(text) - 1)}
+
+
+def _is_newer(mst, than):
+    if mst.isdigit() and than.isdigit():
+        return int(mst) > int(than)
+    return mst != than
+
+
+class LawIndex:
+    """조항 단위 2-gram 역색인. 저장된 부분은 mmap으로 읽고, 이후 바뀐 법률은 메모리에 덧붙임"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.laws = []  # 슬롯별 {"key", "name", "mst", "first", "count"}
+        self._slot_by_key = {}
+        self._dead = set()  # 새 MST로 대체된 법률 슬롯
+        # 검색 중인 다른 스레드가 구역을 참조하고 있을 수 있으므로 mmap은 직접 닫지 않음
+        self._base = None
+        self._base_count = 0
+        self._delta_texts = []
+        self._delta_law = array.array("I")
+        self._delta_postings = defaultdict(lambda: array.array("I"))
+
+    @classmethod
+    def load(cls, path):
+        """저장된 색인 파일이 있으면 mmap으로 열고, 없으면 빈 색인을 만듦"""
+        index = cls(path)
+        if path and os.path.exists(path):
+            index._open(path)
+        return index
+
+    def _open(self, path):
+        header, self._base = map_sections(path, MAGIC)
+        self._base_count = len(self._base["prov_law"])
+        self.laws = header["laws"]
+        self._slot_by_key = {law["key"]: slot for slot, law in enumerate(self.laws)}
+
+    @property
+    def provision_count(self):
+        return self._base_count + len(self._delta_texts)
+
+    def _text(self, pid):
+        if pid < self._base_count:
+            starts = self._base["text_starts"]
+            return bytes(self._base["texts"][starts[pid]:starts[pid + 1]]).decode("utf-8")
+        return self._delta_texts[pid - self._base_count]
+
+    def _law_slot(self, pid):
+        if pid < self._base_count:
+            return self._base["prov_law"][pid]
+        return self._delta_law[pid - self._base_count]
+
+    def _postings(self, key):
+        """2-gram 키의 (저장된 postings, 추가된 postings). 두 목록 모두 오름차순"""
+        base = ()
+        if self._base is not None:
+            keys = self._base["gram_keys"]
+            i = bisect.bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                starts = self._base["gram_starts"]
+                base = self._base["postings"][starts[i]:starts[i + 1]]
+        return base, self._delta_postings.get(key, ())
+
+    def update_law(self, mst, xml_data):
+        """법률 하나를 색인에 반영. 같은 법률의 이전 MST는 대체하며, 변경이 있으면 True"""
+        mst = str(mst)
+        # 조항 순번은 검색ㆍ개정문 생성이 쓰는 조항 표의 순서와 같음
+        provisions = parse_provisions(xml_data)
+        # 법령ID가 없으면 법령명으로 같은 법률인지 판단
+        key, name = provisions.law_id or provisions.name, provisions.name
+        if not key:
+            return False
+        texts = [row.compact for row in provisions]
+        with self._lock:
+            slot = self._slot_by_key.get(key)
+            if slot is not None:
+                if not _is_newer(mst, self.laws[slot]["mst"]):
+                    return False
+                self._dead.add(slot)
+            new_slot = len(self.laws)
+            first = self.provision_count
+            for pid, text in enumerate(texts, first):
+                self._delta_texts.append(text)
+                self._delta_law.append(new_slot)
+                for gram in _gram_keys(text):
+                    self._delta_postings[gram].append(pid)
+            self.laws.append({"key": key, "name": name, "mst": mst, "first": first, "count": len(texts)})
+            self._slot_by_key[key] = new_slot
+            return True
+
+    def update_from_directory(self, directory):
+        """디렉터리의 <MST>.xml 파일들을 색인에 반영하고 바뀐 법률 수를 반환"""
+        indexed = {law["mst"] for slot, law in enumerate(self.laws) if slot not in self._dead}
+        changed = 0
+        for name in sorted(os.listdir(directory)):
+            mst = name[:-4]
+            if not name.endswith(".xml") or mst in indexed:
+                continue
+            try:
+                with open(os.path.join(directory, name), "rb") as f:
+                    changed += self.update_law(mst, f.read())
+            except (OSError, ET.ParseError) as e:
+                logger.warning("색인 제외 (%s): %s", name, e)
+        return changed
+
+    def search(self, query):
+        """공백을 무시하고 query가 들어 있는 조항을 찾아 [(법률 정보, [조항 순번, ...])]로 반환 (법령명 순)"""
+        q = clean(query)
+        if not q:
+            return []
+        with self._lock:
+            if len(q) == 1:
+                candidates = range(self.provision_count)
+            else:
+                lists = sorted((self._postings(key) for key in _gram_keys(q)), key=lambda p: len(p[0]) + len(p[1]))
+                first, rest = lists[0], lists[1:]
+                candidates = [
+                    pid for part in first for pid in part
+                    if all(_contains(base, pid) or _contains(delta, pid) for base, delta in rest)
+                ]
+            hits = defaultdict(list)
+            for pid in candidates:
+                slot = self._law_slot(pid)
+                if slot in self._dead or q not in self._text(pid):
+                    continue
+                hits[slot].append(pid - self.laws[slot]["first"])
+            return [(self.laws[slot], hits[slot]) for slot in sorted(hits, key=lambda s: self.laws[s]["name"])]
+
+    def save(self, path=None):
+        """살아 있는 법률만 모아 색인 파일을 새로 쓰고(임시 파일 후 교체) 다시 mmap으로 엶"""
+        path = path or self.path
+        with self._lock:
+            laws = []
+            texts = []
+            for slot, law in enumerate(self.laws):
+                if slot in self._dead:
+                    continue
+                laws.append(dict(law, first=len(texts)))
+                texts.extend(self._text(law["first"] + i) for i in range(law["count"]))
+
+            postings = defaultdict(lambda: array.array("I"))
+            prov_law = array.array("I")
+            text_starts = array.array("Q", [0])
+            blob = bytearray()
+            for slot, law in enumerate(laws):
+                for pid in range(law["first"], law["first"] + law["count"]):
+                    for gram in _gram_keys(texts[pid]):
+                        postings[gram].append(pid)
+                    prov_law.append(slot)
+                    blob += texts[pid].encode("utf-8")
+                    text_starts.append(len(blob))
+            gram_keys = array.array("Q", sorted(postings))
+            gram_starts = array.array("I", [0])
+            flat = array.array("I")
+            for key in gram_keys:
+                flat.extend(postings[key])
+                gram_starts.append(len(flat))
+
+            sections = [
+                ("gram_keys", gram_keys), ("gram_starts", gram_starts), ("postings", flat),
+                ("prov_law", prov_law), ("text_starts", text_starts), ("texts", blob),
+            ]
+            write_sections(path, MAGIC, {"laws": laws}, sections)
+
+            self.path = path
+            self._reset()
+            self._open(path)
+
+
+def _contains(sorted_ids, pid):
+    i = bisect.bisect_left(sorted_ids, pid)
+    return i < len(sorted_ids) and sorted_ids[i] == pid
+
+
+def map_sections(path, magic):
+    """write_sections로 쓴 파일을 mmap으로 열어 (헤더, {구역 이름: 배열처럼 쓰는 memoryview})를 반환
+
+    구역은 파일을 그대로 가리키므로 여러 프로세스가 같은 파일을 열어도 운영체제의 페이지 캐시 하나를 함께 쓴다.
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mm[:8] != magic:
+        mm.close()
+        raise ValueError(f"{magic.decode()} 파일 형식이 아닙니다: {path}")
+    header_len = int.from_bytes(mm[8:12], "little")
+    header = json.loads(mm[12:12 + header_len].decode("utf-8"))
+    if header["byteorder"] != sys.byteorder:
+        mm.close()
+        raise ValueError(f"다른 바이트 순서로 만든 파일입니다: {path}")
+    view = memoryview(mm)
+    sections = {
+        name: view[start:start + length].cast(code)
+        for name, (start, length, code) in header["sections"].items()
+    }
+    return header, sections
+
+
+def write_sections(path, magic, header_fields, sections):
+    """MAGIC(8) | 헤더 길이(4) | 헤더 JSON | 8바이트 정렬된 구역들 형식으로 임시 파일에 쓴 뒤 path로 교체
+
+    sections는 [(이름, array.array 또는 bytes류), ...]. 헤더에는 header_fields와 구역 위치가 들어간다.
+    """
+    # 헤더에 적을 구역 위치를 먼저 계산 (헤더 길이가 위치에 영향을 주므로 길이가 변하지 않을 때까지 반복)
+    layout = {}
+    header = b""
+    while True:
+        header_len = len(header)
+        offset = 12 + header_len
+        offset += -offset % 8
+        for name, data in sections:
+            code = data.typecode if isinstance(data, array.array) else "B"
+            length = len(data) * (data.itemsize if isinstance(data, array.array) else 1)
+            layout[name] = [offset, length, code]
+            offset += length + (-length % 8)
+        header = json.dumps(
+            {"byteorder": sys.byteorder, "sections": layout, **header_fields}, ensure_ascii=False
+        ).encode("utf-8")
+        header += b" " * (-(12 + len(header)) % 8)
+        if len(header) == header_len:
+            break
+
+    with atomic_write(path) as f:
+        f.write(magic + len(header).to_bytes(4, "little") + header)
+        for name, data in sections:
+            start = layout[name][0]
+            f.write(b"\0" * (start - f.tell()))
+            f.write(data)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="캐시된 법령 XML로 로컬 검색 색인을 만들거나 갱신합니다.")
+    parser.add_argument("xml_dir", help="<MST>.xml 파일이 있는 디렉터리 (법령 XML 캐시)")
+    parser.add_argument("index_path", help="색인 파일 경로")
+    args = parser.parse_args()
+    law_index = LawIndex.load(args.index_path)
+    changed = law_index.update_from_directory(args.xml_dir)
+    law_index.save()
+    print(f"{changed}개 법률 반영, 전체 {len(law_index.laws)}개 법률ㆍ{law_index.provision_count}개 조항")
@@ -0,0 +1,77 @@
+from collections import deque
+
+# 여러 검색어를 본문 한 번 훑기로 찾는 Aho-Corasick 오토마톤.
+# 일괄 개정문 생성에서 조항마다 수십 개의 찾을 단어를 각각 `in`으로 확인하는 대신 쓴다.
+
+
+class AhoCorasick:
+    """patterns 중 어떤 것이 본문에 들어 있는지 한 번의 훑기로 찾는 다중 패턴 매처"""
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._goto = [{}]
+        self._fail = [0]
+        outputs = [set()]
+        for pid, pattern in enumerate(self.patterns):
+            if not pattern:
+                raise ValueError("빈 검색어는 사용할 수 없습니다.")
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    outputs.append(set())
+                state = nxt
+            outputs[state].add(pid)
+
+        # 너비 우선으로 실패 링크를 만들고, 실패 링크를 따라 도달하는 출력도 합쳐 둠
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                outputs[nxt] |= outputs[self._fail[nxt]]
+        self._out = [frozenset(out) for out in outputs]
+
+    def search(self, text):
+        """text에 들어 있는 패턴 번호의 집합"""
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+
+class SubstringMatcher:
+    """패턴마다 `in`으로 확인하는 매처 (패턴이 적을 때는 이쪽이 더 빠름)"""
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+
+    def search(self, text):
+        return {pid for pid, pattern in enumerate(self.patterns) if pattern in text}
+
+
+# CPython에서는 글자마다 도는 오토마톤보다 C로 구현된 `in`이 빨라서,
+# 200자 안팎의 조항 기준으로 패턴이 이보다 많을 때만 Aho-Corasick이 유리하다.
+AHO_CORASICK_MIN_PATTERNS = 128
+
+
+def build_matcher(patterns):
+    """패턴 수에 맞는 다중 패턴 매처를 만듦. 두 매처 모두 search(text)는 같은 결과를 냄"""
+    patterns = list(patterns)
+    if len(patterns) >= AHO_CORASICK_MIN_PATTERNS:
+        return AhoCorasick(patterns)
+    return SubstringMatcher(patterns)
@@ -1,350 +1,731 @@
-import requests
 import xml.etree.ElementTree as ET
 from urllib.parse import quote
 import re
 import os
-import unicodedata
-from collections import defaultdict
+import contextvars
+import functools
+import itertools
+import logging
+import multiprocessing
+import threading
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from law_cache import LawXmlCache, ResultCache
+from law_cancel import Cancelled, make_token, check as check_cancelled, scope as cancel_scope
+from law_catalog import LawCatalog
+from law_flight import SingleFlight
+from drf_client import AdaptiveLimiter, DrfClient, DrfError
+from law_index import LawIndex
+from law_matcher import build_matcher
+from law_provisions import 조, 항, 호, 목, Location, OffsetMap, clean, parse_provisions
+from law_store import LawStore
+from law_query import QueryError, Term, parse_query, plan_listing_terms
+from law_trace import collect as collect_trace, count, span
+
+# 디버깅 출력은 LAW_LOG_LEVEL=DEBUG일 때만 (law_trace에서 설정)
+logger = logging.getLogger("law_editor.processor")
 
 OC = os.getenv("OC", "chetera")
-BASE = "http://www.law.go.kr"
+BASE = os.getenv("LAW_API_BASE", "http://www.law.go.kr")  # 벤치마크에서는 bench/fake_drf.py 서버 주소
+# 법령 본문을 동시에 가져오고 파싱할 작업자 수 (1이면 순차 처리)
+MAX_WORKERS = int(os.getenv("LAW_MAX_WORKERS", "8"))
+# 개정문 생성의 XML 파싱ㆍ검색ㆍ조사 처리를 맡길 프로세스 수. 0이면 조회 스레드에서 처리, auto면 CPU 코어 수
+PROCESS_WORKERS = os.getenv("LAW_PROCESS_WORKERS", "0")
+PROCESS_WORKERS = (os.cpu_count() or 1) if PROCESS_WORKERS == "auto" else int(PROCESS_WORKERS)
+# 법령 XML 디스크 캐시 위치와 용량 한도(MB, 0이면 사용 안 함)
+CACHE_DIR = os.getenv("LAW_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "law_xml"))
+CACHE_MAX_MB = int(os.getenv("LAW_CACHE_MAX_MB", "512"))
+
+# DRF API 연결ㆍ응답 대기 시간(초)과 재시도 횟수
+CONNECT_TIMEOUT = float(os.getenv("LAW_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("LAW_READ_TIMEOUT", "10"))
+MAX_RETRIES = int(os.getenv("LAW_MAX_RETRIES", "3"))
+# DRF API 호출 속도: 처음 초당 호출 수(0이면 제한하지 않음)와 늘려 볼 수 있는 최대 초당 호출 수
+RATE_LIMIT = float(os.getenv("LAW_RATE_LIMIT", "10"))
+MAX_RATE = float(os.getenv("LAW_MAX_RATE", "100"))
+# 로컬 검색 색인 위치. LAW_USE_INDEX=1이면 법률 목록을 lawSearch.do 대신 색인에서 찾음
+INDEX_PATH = os.getenv("LAW_INDEX_PATH", os.path.join(os.path.expanduser("~"), ".cache", "law_index.bin"))
+USE_INDEX = os.getenv("LAW_USE_INDEX", "0") == "1"
+# 파싱한 조항 표를 메모리에 남겨둘 법률 수
+PROVISION_MEMO_SIZE = int(os.getenv("LAW_PROVISION_MEMO_SIZE", "128"))
+# lawSearch.do 한 페이지의 법률 수, 목록 페이지를 동시에 받을 수, 깨졌거나 모자란 페이지를 다시 요청할 횟수
+LIST_PAGE_SIZE = 100
+LIST_WORKERS = int(os.getenv("LAW_LIST_WORKERS", "4"))
+LIST_PAGE_RETRIES = int(os.getenv("LAW_LIST_PAGE_RETRIES", "2"))
+# 검색 결과 화면에서 한 페이지에 보여줄 법률 수 (앱의 기본값)
+SEARCH_PAGE_SIZE = int(os.getenv("LAW_SEARCH_PAGE_SIZE", "20"))
+# 검색ㆍ개정문 생성 결과를 프로세스 안에서 재사용할 개수와 유효 시간(초). 0이면 사용 안 함
+RESULT_CACHE_SIZE = int(os.getenv("LAW_RESULT_CACHE_SIZE", "64"))
+RESULT_CACHE_TTL = float(os.getenv("LAW_RESULT_CACHE_TTL", "600"))
+# 앱에서 요청 하나에 쓸 기본 시간 한도(초). 0이면 제한 없음
+TIME_BUDGET = float(os.getenv("LAW_TIME_BUDGET", "0"))
+# 법률별 최신 MST 대장 (refresh_law_catalog가 갱신)
+CATALOG_PATH = os.getenv("LAW_CATALOG_PATH", os.path.join(os.path.expanduser("~"), ".cache", "law_catalog.json"))
+# 법령 묶음 저장소 (python app/law_store.py로 만듦). 여기 있는 MST는 API 조회와 XML 파싱 없이 조항 표를 꺼냄
+STORE_PATH = os.getenv("LAW_STORE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "law_store.bin"))
+
+xml_cache = LawXmlCache(CACHE_DIR, CACHE_MAX_MB * 1024 * 1024)
+drf_client = DrfClient(
+    pool_size=max(MAX_WORKERS, 1) * 2,
+    connect_timeout=CONNECT_TIMEOUT,
+    read_timeout=READ_TIMEOUT,
+    max_retries=MAX_RETRIES,
+    limiter=AdaptiveLimiter(
+        rate=RATE_LIMIT, max_rate=MAX_RATE, window=min(4, max(MAX_WORKERS, 1)), max_window=max(MAX_WORKERS, 1) * 2,
+    ) if RATE_LIMIT > 0 else None,
+)
+result_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL)
+# 세션들이 동시에 같은 목록 페이지ㆍ같은 MST 본문ㆍ같은 검색(개정문 생성)을 요청하면 한 번만 처리해 함께 씀
+page_flights = SingleFlight("list_page")
+law_flights = SingleFlight("law_xml")
+query_flights = SingleFlight("query")
+
+def flight_stats():
+    """묶어서 처리한 호출 수. calls는 실제로 처리한 수, shared는 진행 중인 것을 함께 받아 아낀 수"""
+    return {flights.name: flights.stats() for flights in (page_flights, law_flights, query_flights)}
+
+@functools.lru_cache(maxsize=64)
+def highlight_pattern(*queries):
+    """검색어 하이라이트용 정규식 (검색어마다 한 번만 컴파일). 검색어가 여럿이면 긴 것부터 맞춤"""
+    # 정규식 특수문자 이스케이프, 대소문자 구분없이 검색
+    alternatives = "|".join(re.escape(q) for q in sorted(set(queries), key=len, reverse=True))
+    return re.compile(f'({alternatives})', re.IGNORECASE)
+
+@functools.lru_cache(maxsize=64)
+def compact_highlight_pattern(*queries):
+    """공백을 없앤 조항 본문(Provision.compact)에서 검색어를 찾는 하이라이트용 정규식. 검색어의 공백도 없앰"""
+    terms = {clean(q) for q in queries} - {""}
+    return highlight_pattern(*terms) if terms else re.compile("(?!)")
 
 def highlight(text, query):
     """검색어를 HTML로 하이라이트 처리해주는 함수"""
     if not query or not text:
         return text
-    # 정규식 특수문자 이스케이프
-    escaped_query = re.escape(query)
-    # 대소문자 구분없이 검색
-    pattern = re.compile(f'({escaped_query})', re.IGNORECASE)
-    return pattern.sub(r'<mark>\1</mark>', text)
+    return highlight_pattern(query).sub(r'<mark>\1</mark>', text)
+
+def mark_spans(text, spans):
+    """spans [(시작, 끝), ...] 위치를 <mark>로 감싼 HTML (highlight와 같은 결과)"""
+    if not spans:
+        return text
+    parts = []
+    pos = 0
+    for start, end in spans:
+        parts += [text[pos:start], "<mark>", text[start:end], "</mark>"]
+        pos = end
+    parts.append(text[pos:])
+    return "".join(parts)
 
 def get_law_list_from_api(query):
-    exact_query = f'"{query}"'
-    encoded_query = quote(exact_query)
-    page = 1
-    laws = []
-    while True:
-        url = f"{BASE}/DRF/lawSearch.do?OC={OC}&target=law&type=XML&display=100&page={page}&search=2&knd=A0002&query={encoded_query}"
+    """검색어가 본문에 포함된 법률 목록. 재시도 후에도 실패한 페이지가 있으면 DrfError 발생"""
+    with span("list"):
+        laws = list(stream_law_list_from_api(query))
+    logger.info("검색된 법률 수: %d", len(laws))
+    if logger.isEnabledFor(logging.DEBUG):
+        for idx, law in enumerate(laws):
+            logger.debug("%d. %s", idx + 1, law["법령명"])
+    return laws
+
+class LawListing:
+    """검색 목록. total은 전체 법률 수이고, 반복하면 목록 순서대로 법률을 돌려줌 (한 번만 반복할 수 있음)"""
+
+    def __init__(self, total, laws):
+        self.total = total
+        self._laws = iter(laws)
+
+    def __iter__(self):
+        return self._laws
+
+def stream_law_list_from_api(query):
+    """첫 페이지를 받아 전체 수(totalCnt)를 안 뒤 나머지 페이지를 한꺼번에 요청하고 곧바로 돌려주는 검색 목록
+
+    뒤쪽 페이지를 받는 동안에도 앞쪽 법률부터 꺼내 쓸 수 있으며, 순서는 페이지 순서대로 유지된다.
+    query가 None이면 본문 검색 없이 전체 법률 목록을 받는다.
+    어느 페이지든 끝내 받지 못하면 그 페이지에 이르렀을 때 DrfError가 발생한다.
+    뒤쪽 페이지는 부른 쪽의 컨텍스트(현재 요청의 취소 토큰 포함)에서 받으므로, 그 요청이 취소되면 그 페이지에 이르렀을 때
+    law_cancel.Cancelled가 발생한다.
+    """
+    total, first = _fetch_law_page(query, 1)
+    if total is None:
+        # totalCnt가 없으면 이전처럼 모자란 페이지가 나올 때까지 차례로 받음
+        laws = list(first)
+        page = 1
+        while len(first) >= LIST_PAGE_SIZE:
+            page += 1
+            _, first = _fetch_law_page(query, page)
+            laws.extend(first)
+        return LawListing(len(laws), laws)
+    pages = range(2, -(-total // LIST_PAGE_SIZE) + 1)
+    if not pages:
+        return LawListing(total, first)
+    # 나머지 페이지는 목록을 꺼내 쓰는 속도와 상관없이 지금 바로 요청해 둠
+    executor = ThreadPoolExecutor(max_workers=max(1, min(LIST_WORKERS, len(pages))))
+    futures = [
+        executor.submit(contextvars.copy_context().run, _fetch_law_page, query, page, total)
+        for page in pages
+    ]
+    executor.shutdown(wait=False)
+
+    def laws():
+        try:
+            yield from first
+            for future in futures:
+                yield from future.result()[1]
+        finally:
+            for future in futures:
+                future.cancel()
+    return LawListing(total, laws())
+
+def _fetch_law_page(query, page, total=None, display=LIST_PAGE_SIZE):
+    """목록 한 페이지를 (totalCnt, 법률 목록)으로 반환
+
+    깨졌거나 전체 수에 비해 모자란 페이지는 LIST_PAGE_RETRIES번까지 다시 요청하고, 그래도 안 되면 DrfError 발생.
+    다른 세션이 같은 페이지를 받는 중이면 그 결과를 함께 쓴다 (법률 목록은 고치지 말 것).
+    """
+    return page_flights.do((query, page, total, display), lambda: _download_law_page(query, page, total, display))
+
+def _download_law_page(query, page, total, display):
+    url = f"{BASE}/DRF/lawSearch.do?OC={OC}&target=law&type=XML&display={display}&page={page}&knd=A0002"
+    if query is not None:
+        encoded_query = quote(f'"{query}"')
+        url += f"&search=2&query={encoded_query}"
+    error = None
+    for attempt in range(LIST_PAGE_RETRIES + 1):
+        count("list_pages")
+        with span("list_page"):
+            res = drf_client.get(url)
+        if res.status_code != 200:
+            raise DrfError(f"법률 검색 실패 ({page}페이지): 상태 코드 {res.status_code}")
         try:
-            res = requests.get(url, timeout=10)
-            res.encoding = 'utf-8'
-            if res.status_code != 200:
-                break
             root = ET.fromstring(res.content)
-            for law in root.findall("law"):
-                laws.append({
-                    "법령명": law.findtext("법령명한글", "").strip(),
-                    "MST": law.findtext("법령일련번호", "")
-                })
-            if len(root.findall("law")) < 100:
-                break
-            page += 1
-        except Exception as e:
-            print(f"법률 검색 중 오류 발생: {e}")
-            break
-    # 디버깅을 위해 검색된 법률 목록 출력
-    print(f"검색된 법률 수: {len(laws)}")
-    for idx, law in enumerate(laws):
-        print(f"{idx+1}. {law['법령명']}")
-    return laws
+        except ET.ParseError as e:
+            error = f"결과를 해석할 수 없음: {e}"
+            continue
+        laws = [
+            {"법령명": law.findtext("법령명한글", "").strip(), "MST": law.findtext("법령일련번호", ""),
+             "법령ID": law.findtext("법령ID", "").strip()}
+            for law in root.findall("law")
+        ]
+        page_total = (root.findtext("totalCnt") or "").strip()
+        page_total = int(page_total) if page_total.isdigit() else None
+        expected = total if total is not None else page_total
+        if expected is not None and len(laws) < min(display, expected - (page - 1) * display):
+            error = f"{len(laws)}건만 받음 (전체 {expected}건)"
+            continue
+        return page_total, laws
+    raise DrfError(f"법률 검색 실패 ({page}페이지, {LIST_PAGE_RETRIES + 1}번 시도): {error}")
+
+_law_index = None
+_law_index_lock = threading.Lock()
+
+def get_law_index():
+    """로컬 검색 색인을 처음 쓸 때 한 번만 열어둠"""
+    global _law_index
+    with _law_index_lock:
+        if _law_index is None:
+            _law_index = LawIndex.load(INDEX_PATH)
+        return _law_index
+
+def update_law_index():
+    """캐시된 법령 XML 중 색인에 없거나 MST가 바뀐 법률을 반영하고 저장. 반영된 법률 수를 반환"""
+    if not xml_cache.enabled:
+        return 0
+    law_index = get_law_index()
+    changed = law_index.update_from_directory(CACHE_DIR)
+    if changed:
+        law_index.save()
+    return changed
+
+_law_store = None  # (저장소, 파일의 mtime). 둘을 한 튜플로 함께 바꿔 잠금 없이 읽어도 어긋나지 않게 함
+_law_store_lock = threading.Lock()
+
+def get_law_store():
+    """법령 묶음 저장소. 처음 쓸 때 mmap으로 열고, 파일을 다시 만들었으면 새 파일을 엶
+
+    법률마다 부르므로 파일이 그대로면 잠그지 않고 돌려주고, 새로 열 때만 잠근다.
+    """
+    global _law_store
+    try:
+        mtime = os.stat(STORE_PATH).st_mtime_ns
+    except OSError:
+        mtime = None
+    current = _law_store
+    if current is not None and current[1] == mtime:
+        return current[0]
+    with _law_store_lock:
+        if _law_store is None or _law_store[1] != mtime:
+            _law_store = (LawStore.load(STORE_PATH if mtime is not None else None), mtime)
+        return _law_store[0]
+
+_law_catalog = None
+_law_catalog_lock = threading.Lock()
+
+def get_law_catalog():
+    """법령 목록 대장을 처음 쓸 때 한 번만 읽어둠"""
+    global _law_catalog
+    with _law_catalog_lock:
+        if _law_catalog is None:
+            _law_catalog = LawCatalog.load(CATALOG_PATH)
+        return _law_catalog
+
+def refresh_law_catalog(max_workers=None):
+    """전체 법률 목록을 새로 받아 대장과 비교하고, 새로 생겼거나 MST가 바뀐 법률의 본문만 받아 캐시에 넣음
+
+    그 MST가 이미 법령 묶음 저장소에 있으면 받지 않고 바로 대장에 반영한다. MST는 그대로인데 캐시에서 지워진 법률도 (법령 묶음 저장소에 없으면) 다시 받는다. 받지 못한 법률은 대장에 반영하지 않으므로
+    다음 갱신 때 다시 시도한다. 로컬 색인을 쓰면 받은 본문을 색인에도 반영한다. 갱신 결과 요약을 반환.
+    """
+    catalog = get_law_catalog()
+    with span("list"):
+        laws = list(stream_law_list_from_api(None))
+    diff = catalog.diff(laws)
+    store = get_law_store()
+    missing = [
+        law for law in diff["unchanged"] if law["MST"] not in xml_cache and law["MST"] not in store
+    ] if xml_cache.enabled else []
+    stored = [law for law in diff["new"] + diff["changed"] if law["MST"] in store]
+    for law in stored:
+        catalog.record(law)
+    to_fetch = [law for law in diff["new"] + diff["changed"] if law["MST"] not in store] + missing
+    cached = sum(law["MST"] in xml_cache for law in to_fetch)
+    fetched = failed = 0
+    for law, xml_data in map_in_order(lambda law: (law, get_law_text_by_mst(law["MST"])), to_fetch, max_workers):
+        if xml_data and is_law_xml(xml_data):
+            catalog.record(law)
+            fetched += 1
+        else:
+            failed += 1
+    for key in diff["removed"]:
+        catalog.remove(key)
+    catalog.save()
+    summary = {
+        "listed": len(laws),
+        "new": len(diff["new"]),
+        "changed": len(diff["changed"]),
+        "unchanged": len(diff["unchanged"]),
+        "removed": len(diff["removed"]),
+        "missing_from_cache": len(missing),
+        "from_store": len(stored),
+        "downloaded": fetched - cached,
+        "failed": failed,
+        "indexed": update_law_index() if USE_INDEX else 0,
+    }
+    logger.info("법령 목록 갱신: %s", summary)
+    return summary
+
+def get_law_list(query, use_index=None):
+    """검색어가 포함된 법률 목록. 로컬 색인을 쓰면 API를 호출하지 않음 (법령명 순)"""
+    if USE_INDEX if use_index is None else use_index:
+        # "조항"에는 검색어가 들어 있는 조항의 순번(조항 표 기준)을 함께 담음
+        with span("list_index"):
+            return [
+                {"법령명": law["name"], "MST": law["mst"], "조항": positions}
+                for law, positions in get_law_index().search(query)
+            ]
+    return get_law_list_from_api(query)
+
+def count_laws(query, use_index=None):
+    """검색어가 들어 있는 법률 수. API에서는 한 건짜리 목록 페이지의 totalCnt만 읽음"""
+    if USE_INDEX if use_index is None else use_index:
+        return len(get_law_index().search(query))
+    with span("count"):
+        total, laws = _fetch_law_page(query, 1, display=1)
+    return total if total is not None else len(laws)
+
+def stream_law_list(query, use_index=None):
+    """get_law_list와 같은 목록을 LawListing으로 반환. API를 쓰면 첫 페이지만 받고 바로 돌아옴"""
+    if USE_INDEX if use_index is None else use_index:
+        laws = get_law_list(query, True)
+        return LawListing(len(laws), laws)
+    return stream_law_list_from_api(query)
+
+def is_law_xml(data):
+    """API 오류 안내 대신 실제 법령 본문 XML이 왔는지 확인"""
+    return "<법령".encode("utf-8") in data[:1024]
 
 def get_law_text_by_mst(mst):
+    cached = xml_cache.get(mst)
+    if cached is not None:
+        count("xml_cache_hits")
+        return cached
+    check_cancelled()
+    # 다른 세션이 같은 MST를 받는 중이면 그 결과를 함께 씀
+    return law_flights.do(mst, lambda: _download_law_text(mst))
+
+def _download_law_text(mst):
+    # 기다리는 사이에 먼저 받은 호출이 캐시에 넣었을 수 있음
+    cached = xml_cache.get(mst)
+    if cached is not None:
+        return cached
     url = f"{BASE}/DRF/lawService.do?OC={OC}&target=law&MST={mst}&type=XML"
     try:
-        res = requests.get(url, timeout=10)
-        res.encoding = 'utf-8'
+        with span("fetch"):
+            res = drf_client.get(url)
         if res.status_code == 200:
-            # XML 내용 출력 (디버깅)
-            # print(f"XML 데이터 크기: {len(res.content)} 바이트")
+            logger.debug("XML 데이터 크기: %d 바이트 (MST: %s)", len(res.content), mst)
+            if is_law_xml(res.content):
+                xml_cache.put(mst, res.content)
             return res.content
         else:
-            print(f"법령 XML 가져오기 실패: 상태 코드 {res.status_code}")
+            logger.warning("법령 XML 가져오기 실패 (MST: %s): 상태 코드 %s", mst, res.status_code)
+    except DrfError as e:
+        logger.warning("법령 XML 가져오기 중 오류 발생 (MST: %s): %s", mst, e)
+    return None
+
+def _cached_events(key, make_events, shared=True):
+    """같은 키의 결과가 캐시에 있으면 그대로 다시 흘려보내고, 없으면 만들면서 흘려보낸 뒤 저장
+
+    끝까지 흘려보내지 못했거나, 도중에 본문을 가져오지 못한 법률이 있거나(progress 이벤트의 failed), 시간 한도로 멈췄으면
+    저장하지 않는다.
+    shared이면 다른 세션에서 같은 키로 진행 중인 요청의 이벤트를 함께 받는다. 시간 한도나 취소가 있는
+    요청은 멈추는 시점이 요청마다 다르므로 shared=False로 따로 처리한다.
+    """
+    events = result_cache.get(key)
+    if events is not None:
+        count("result_cache_hits")
+        yield from events
+        return
+    if shared:
+        # 캐시는 위에서 한 번만 찾음 (먼저 시작한 쪽도 다시 찾지 않고 바로 만듦)
+        yield from query_flights.stream(key, lambda: _store_events(key, make_events))
+        return
+    yield from _store_events(key, make_events)
+
+def _store_events(key, make_events):
+    """make_events()의 이벤트를 흘려보내면서 모아 두고, 온전히 끝났으면 result_cache에 저장"""
+    events = []
+    for event in make_events():
+        events.append(event)
+        yield event
+    if not (events and events[-1]["type"] == "incomplete") and not any(event.get("failed") for event in events):
+        result_cache.put(key, tuple(events))
+
+_provision_memo = OrderedDict()
+_provision_memo_lock = threading.Lock()
+
+def get_law_provisions(mst):
+    """MST별로 한 번만 파싱한 조항 표. 본문을 가져오지 못하면 None, XML이 깨져 있으면 ET.ParseError
+
+    법령 묶음 저장소에 있는 MST는 API를 부르거나 XML을 파싱하지 않고 저장소에서 꺼낸다.
+    """
+    with _provision_memo_lock:
+        table = _provision_memo.get(mst)
+        if table is not None:
+            _provision_memo.move_to_end(mst)
+            count("provision_memo_hits")
+            return table
+    store = get_law_store()
+    if mst in store:
+        with span("store"):
+            table = store.provisions(mst)
+    else:
+        xml_data = get_law_text_by_mst(mst)
+        if not xml_data:
             return None
-    except Exception as e:
-        print(f"법령 XML 가져오기 중 오류 발생: {e}")
-        return None
+        with span("parse"):
+            table = parse_provisions(xml_data)
+    with _provision_memo_lock:
+        _provision_memo[mst] = table
+        while len(_provision_memo) > PROVISION_MEMO_SIZE:
+            _provision_memo.popitem(last=False)
+    return table
+
+def map_in_order(func, items, max_workers=None, executor=None):
+    """items 각각에 func를 병렬로 적용하고, 결과는 입력 순서대로 하나씩 돌려줌
 
-def clean(text):
-    return re.sub(r"\s+", "", text or "")
+    executor를 주면 새 스레드 풀을 만들지 않고 그 풀에 제출한다 (여러 작업이 조회 풀 하나를 나눠 쓸 때).
+    """
+    workers = MAX_WORKERS if max_workers is None else max_workers
+    if workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+    if executor is not None:
+        yield from _map_in_order(executor, func, items, workers)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from _map_in_order(executor, func, items, workers)
 
-def normalize_number(text):
+def _map_in_order(executor, func, items, workers):
+    # 메모리가 늘어나지 않도록 작업자 수의 2배까지만 미리 제출
+    # 작업마다 현재 컨텍스트를 복사해 넘겨 작업 스레드의 단계 시간도 같은 요청에 기록되게 함
+    pending = deque()
     try:
-        return str(int(unicodedata.numeric(text)))
-    except:
-        return text
+        for item in items:
+            pending.append(executor.submit(contextvars.copy_context().run, func, item))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # 공유 풀이면 중간에 그만둔 작업이 풀에 남지 않도록 취소
+        for future in pending:
+            future.cancel()
+
+class _Done:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+def pipeline_done(value):
+    """pipeline_in_order의 fetch가 돌려주면 process를 건너뛰고 value를 그대로 결과로 씀"""
+    return _Done(value)
+
+def pipeline_in_order(fetch, process, items, max_workers=None, process_pool=None, process_workers=1, executor=None):
+    """items마다 조회 스레드에서 fetch(item)를, 프로세스 풀에서 process(*fetch 결과)를 실행해 (item, 결과)를 입력 순서대로 돌려줌
+
+    조회가 끝난 항목은 곧바로 프로세스 풀로 넘어가므로 조회 스레드는 CPU 작업을 기다리지 않고 다음 항목을 받는다.
+    두 단계에 걸쳐 진행 중인 항목은 (조회 작업자 수 + process_workers)의 2배까지만 두어 받아 둔 XML이 쌓이지 않게 한다.
+    process_pool이 없으면 process도 조회 스레드에서 실행한다 (map_in_order와 같음).
+    """
+    def run_inline(item):
+        args = fetch(item)
+        return item, args.value if isinstance(args, _Done) else process(*args)
+
+    if process_pool is None:
+        yield from map_in_order(run_inline, items, max_workers, executor)
+        return
+    workers = max(MAX_WORKERS if max_workers is None else max_workers, 1)
+    if executor is not None:
+        yield from _pipeline_in_order(executor, process_pool, fetch, process, items, workers + process_workers)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from _pipeline_in_order(executor, process_pool, fetch, process, items, workers + process_workers)
+
+def _pipeline_in_order(executor, process_pool, fetch, process, items, workers):
+    pending = deque()  # (항목, 최종 결과 Future, [조회 Future, 처리 Future])
+    try:
+        for item in items:
+            pending.append(_submit_stages(executor, process_pool, fetch, process, item))
+            if len(pending) >= workers * 2:
+                item, result, _ = pending.popleft()
+                yield item, result.result()
+        while pending:
+            item, result, _ = pending.popleft()
+            yield item, result.result()
+    finally:
+        for _, _, stages in pending:
+            for future in stages:
+                future.cancel()
+
+def _submit_stages(executor, process_pool, fetch, process, item):
+    result = Future()
+    stages = []
+
+    def fetched(future):
+        try:
+            args = future.result()
+            if isinstance(args, _Done):
+                result.set_result(args.value)
+                return
+            processing = process_pool.submit(process, *args)
+        except BaseException as e:
+            result.set_exception(e)
+            return
+        stages.append(processing)
+        processing.add_done_callback(lambda f: _copy_outcome(f, result))
+
+    fetching = executor.submit(contextvars.copy_context().run, fetch, item)
+    stages.append(fetching)
+    fetching.add_done_callback(fetched)
+    return item, result, stages
+
+def _copy_outcome(source, target):
+    if source.cancelled():
+        target.cancel()
+    elif source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+def get_process_pool():
+    """개정문 생성의 CPU 작업을 맡을 프로세스 풀 (처음 쓸 때 만듦). PROCESS_WORKERS가 0이면 None"""
+    global _process_pool
+    if PROCESS_WORKERS <= 0:
+        return None
+    with _process_pool_lock:
+        if _process_pool is None:
+            # 작업자는 law_processor를 새로 import하므로 fork한 스레드ㆍ연결 상태를 물려받지 않도록 spawn
+            _process_pool = ProcessPoolExecutor(PROCESS_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _process_pool
 
 def make_article_number(조문번호, 조문가지번호):
     return f"제{조문번호}조의{조문가지번호}" if 조문가지번호 and 조문가지번호 != "0" else f"제{조문번호}조"
 
-def has_batchim(word):
-    """단어의 마지막 글자에 받침이 있는지 확인"""
-    if not word:
-        return False
-    code = ord(word[-1]) - 0xAC00
-    return (code % 28) != 0
+# 덩어리에 포함시키지 않을 접미사와 처리할 조사
+SUFFIX_EXCLUDE = ["의", "에", "에서", "으로서", "등", "등인", "에게", "만", "만을", "만이", "만은", "만에", "만으로"]
+JOSA_LIST = ["을", "를", "과", "와", "이", "가", "이나", "나", "으로", "로", "은", "는", "란", "이란", "라", "이라"]
+# 개정문 생성에서 본문을 토큰으로 나누는 패턴
+TOKEN_PATTERN = re.compile(r'[가-힣A-Za-z0-9]+')
 
-def has_rieul_batchim(word):
-    """단어의 마지막 글자의 받침이 ㄹ인지 확인"""
-    if not word:
-        return False
-    code = ord(word[-1]) - 0xAC00
-    return (code % 28) == 8  # ㄹ받침 코드는 8
-
-def extract_chunk_and_josa(token, searchword):
-    """검색어를 포함하는 덩어리와 조사를 추출"""
-    # 제외할 접미사 리스트 (덩어리에 포함시키지 않을 것들)
-    suffix_exclude = ["의", "에", "에서", "으로서", "등", "등인", "에게", "만", "만을", "만이", "만은", "만에", "만으로"]
-    
-    # 처리할 조사 리스트
-    josa_list = ["을", "를", "과", "와", "이", "가", "이나", "나", "으로", "로", "은", "는", "란", "이란", "라", "이라"]
-    
-    # 원본 토큰 저장
-    original_token = token
-    suffix = None
-    
-    # 검색어 자체가 토큰인 경우 바로 반환
-    if token == searchword:
-        return token, None, None
-    
-    # 토큰에 검색어가 포함되어 있지 않으면 바로 반환
-    if searchword not in token:
-        return token, None, None
-    
-    # 1. 접미사 제거 시도 (단, 이 접미사들은 덩어리에 포함시키지 않음)
-    for s in sorted(suffix_exclude, key=len, reverse=True):
-        if token.endswith(s) and len(token) > len(s):
-            # 검색어와 접미사가 분리되어 있는지 확인
-            if searchword + s == token:
-                # 이 경우 검색어 자체를 반환하고 접미사는 별도로 처리
-                return searchword, None, s
-            elif token.endswith(searchword + s):
-                # 뒤쪽에 접미사가 붙은 경우 (예: "검색어의")
-                prefix = token[:-len(searchword + s)]
-                # 접두어가 있는 경우 전체 토큰 반환
-                if prefix:
-                    return token, None, None
-                # 접두어가 없는 경우 검색어만 반환
-                else:
-                    return searchword, None, s
-            suffix = s
-            token = token[:-len(s)]
+def _build_trie(words, reverse=False):
+    """글자 단위 트라이. 단어가 끝나는 노드에는 None 키에 단어를 넣어 둠"""
+    root = {}
+    for word in words:
+        node = root
+        for ch in (reversed(word) if reverse else word):
+            node = node.setdefault(ch, {})
+        node[None] = word
+    return root
+
+_SUFFIX_TRIE = _build_trie(SUFFIX_EXCLUDE, reverse=True)
+_JOSA_TRIE = _build_trie(JOSA_LIST)
+_JOSA_SET = frozenset(JOSA_LIST)
+
+def _longest_suffix(token):
+    """token 끝에 붙은 가장 긴 제외 접미사 (token 전체와 같은 길이는 제외)"""
+    node = _SUFFIX_TRIE
+    found = None
+    for i in range(len(token) - 1, 0, -1):
+        node = node.get(token[i])
+        if node is None:
             break
-    
-    # 2. 조사 확인
-    josa = None
-    chunk = token
-    
-    # 토큰이 "검색어 + 조사"로 정확히 구성된 경우
-    for j in sorted(josa_list, key=len, reverse=True):
-        if token == searchword + j:
-            return searchword, j, suffix
-    
-    # 3. 토큰 내의 위치 찾기
-    start_pos = token.find(searchword)
-    if start_pos != -1:
-        end_pos = start_pos + len(searchword)
+        found = node.get(None, found)
+    return found
+
+def _longest_josa_at(token, start):
+    """token[start:]가 시작하는 가장 긴 조사"""
+    node = _JOSA_TRIE
+    found = None
+    for i in range(start, len(token)):
+        node = node.get(token[i])
+        if node is None:
+            break
+        found = node.get(None, found)
+    return found
+
+class ChunkExtractor:
+    """검색어 하나에 맞춰 미리 준비한 덩어리ㆍ조사 추출기 (bench/josa_reference.py의 이전 구현과 결과가 같음)
+
+    같은 토큰이 한 번의 실행에서 수천 번 반복되므로 토큰별 결과를 크기 제한 캐시에 담아 둔다.
+    """
+
+    def __init__(self, searchword, cache_size=8192):
+        self.searchword = searchword
+        self.extract = functools.lru_cache(maxsize=cache_size)(self._extract)
+
+    def _extract(self, token):
+        searchword = self.searchword
+        if token == searchword or searchword not in token:
+            return token, None, None
         
-        # 검색어가 토큰의 끝에 있는 경우
-        if end_pos == len(token):
-            if start_pos == 0:  # 토큰이 정확히 검색어인 경우
-                return searchword, None, suffix
-            else:  # 검색어 앞에 다른 내용이 있는 경우
-                return token, None, suffix
-                
-        # 검색어 뒤에 조사가 있는지 확인
-        for j in sorted(josa_list, key=len, reverse=True):
-            if token[end_pos:].startswith(j):
-                # 검색어 + 조사 앞에 다른 내용이 있는 경우
-                if start_pos > 0:
-                    return token, None, suffix
-                # 검색어 + 조사 뒤에 다른 내용이 있는 경우
-                elif end_pos + len(j) < len(token):
+        # 1. 접미사 제거 (접미사는 덩어리에 포함시키지 않음)
+        suffix = _longest_suffix(token)
+        if suffix:
+            if token.endswith(searchword + suffix):
+                # "검색어+접미사"만으로 된 토큰이면 검색어만, 앞에 다른 내용이 있으면 토큰 전체
+                if len(token) == len(searchword) + len(suffix):
+                    return searchword, None, suffix
+                return token, None, None
+            token = token[:-len(suffix)]
+        
+        # 2. 토큰이 "검색어 + 조사"로 정확히 구성된 경우
+        if token.startswith(searchword) and token[len(searchword):] in _JOSA_SET:
+            return searchword, token[len(searchword):], suffix
+        
+        # 3. 토큰 내의 위치로 판단
+        start_pos = token.find(searchword)
+        if start_pos != -1:
+            end_pos = start_pos + len(searchword)
+            if end_pos == len(token):
+                return (searchword if start_pos == 0 else token), None, suffix
+            josa = _longest_josa_at(token, end_pos)
+            if josa:
+                if start_pos > 0 or end_pos + len(josa) < len(token):
                     return token, None, suffix
-                # 정확히 "검색어 + 조사"인 경우
-                else:
-                    return searchword, j, suffix
-    
-    # 4. 토큰이 검색어를 포함하지만 조건에 맞지 않는 경우 토큰 전체 반환
-    return token, None, suffix
-    
-def apply_josa_rule(orig, replaced, josa):
-    """개정문 조사 규칙에 따라 적절한 형식 반환"""
-    # 동일한 단어면 변경할 필요 없음
-    if orig == replaced:
-        return f'"{orig}"를 "{replaced}"로 한다.'
+                return searchword, josa, suffix
         
-    orig_has_batchim = has_batchim(orig)
-    replaced_has_batchim = has_batchim(replaced)
-    replaced_has_rieul = has_rieul_batchim(replaced)
-    
-    # 조사가 없는 경우 (규칙 0)
-    if josa is None:
-        if not orig_has_batchim:  # 규칙 0-1: A가 받침 없는 경우
-            if not replaced_has_batchim or replaced_has_rieul:  # 규칙 0-1-1, 0-1-2-1
-                return f'"{orig}"를 "{replaced}"로 한다.'
-            else:  # 규칙 0-1-2-2: B의 받침이 ㄹ이 아닌 경우
-                return f'"{orig}"를 "{replaced}"으로 한다.'
-        else:  # 규칙 0-2: A가 받침 있는 경우
-            if not replaced_has_batchim or replaced_has_rieul:  # 규칙 0-2-1, 0-2-2-1
-                return f'"{orig}"을 "{replaced}"로 한다.'
-            else:  # 규칙 0-2-2-2: B의 받침이 ㄹ이 아닌 경우
-                return f'"{orig}"을 "{replaced}"으로 한다.'
-    
-    # 조사별 규칙 처리
-    if josa == "을":  # 규칙 1
-        if replaced_has_batchim:
-            if replaced_has_rieul:  # 규칙 1-1-1
-                return f'"{orig}"을 "{replaced}"로 한다.'
-            else:  # 규칙 1-1-2
-                return f'"{orig}"을 "{replaced}"으로 한다.'
-        else:  # 규칙 1-2
-            return f'"{orig}을"을 "{replaced}를"로 한다.'
-    
-    elif josa == "를":  # 규칙 2
-        if replaced_has_batchim:  # 규칙 2-1
-            return f'"{orig}를"을 "{replaced}을"로 한다.'
-        else:  # 규칙 2-2
-            return f'"{orig}"를 "{replaced}"로 한다.'
-    
-    elif josa == "과":  # 규칙 3
-        if replaced_has_batchim:
-            if replaced_has_rieul:  # 규칙 3-1-1
-                return f'"{orig}"을 "{replaced}"로 한다.'
-            else:  # 규칙 3-1-2
-                return f'"{orig}"을 "{replaced}"으로 한다.'
-        else:  # 규칙 3-2
-            return f'"{orig}과"를 "{replaced}와"로 한다.'
-    
-    elif josa == "와":  # 규칙 4
-        if replaced_has_batchim:  # 규칙 4-1
-            return f'"{orig}와"를 "{replaced}과"로 한다.'
-        else:  # 규칙 4-2
-            return f'"{orig}"를 "{replaced}"로 한다.'
-    
-    elif josa == "이":  # 규칙 5
-        if replaced_has_batchim:
-            if replaced_has_rieul:  # 규칙 5-1-1
-                return f'"{orig}"을 "{replaced}"로 한다.'
-            else:  # 규칙 5-1-2
-                return f'"{orig}"을 "{replaced}"으로 한다.'
-        else:  # 규칙 5-2
-            return f'"{orig}이"를 "{replaced}가"로 한다.'
-    
-    elif josa == "가":  # 규칙 6
-        if replaced_has_batchim:  # 규칙 6-1
-            return f'"{orig}가"를 "{replaced}이"로 한다.'
-        else:  # 규칙 6-2
-            return f'"{orig}"를 "{replaced}"로 한다.'
-    
-    elif josa == "이나":  # 규칙 7
-        if replaced_has_batchim:
-            if replaced_has_rieul:  # 규칙 7-1-1
-                return f'"{orig}"을 "{replaced}"로 한다.'
-            else:  # 규칙 7-1-2
-                return f'"{orig}"을 "{replaced}"으로 한다.'
-        else:  # 규칙 7-2
-            return f'"{orig}이나"를 "{replaced}나"로 한다.'
-    
-    elif josa == "나":  # 규칙 8
-        if replaced_has_batchim:  # 규칙 8-1
-            return f'"{orig}나"를 "{replaced}이나"로 한다.'
-        else:  # 규칙 8-2
-            return f'"{orig}"를 "{replaced}"로 한다.'
-    
-    elif josa == "으로":  # 규칙 9
-        if replaced_has_batchim:
-            if replaced_has_rieul:  # 규칙 9-1-1
-                return f'"{orig}으로"를 "{replaced}로"로 한다.'
-            else:  # 규칙 9-1-2
-                return f'"{orig}"을 "{replaced}"으로 한다.'
-        else:  # 규칙 9-2
-            return f'"{orig}으로"를 "{replaced}로"로 한다.'
-    
-    elif josa == "로":  # 규칙 10
-        if orig_has_batchim:  # 규칙 10-1: A에 받침이 있는 경우
-            if replaced_has_batchim:
-                if replaced_has_rieul:  # 규칙 10-1-1-1
-                    return f'"{orig}"을 "{replaced}"로 한다.'
-                else:  # 규칙 10-1-1-2
-                    return f'"{orig}로"를 "{replaced}으로"로 한다.'
-            else:  # 규칙 10-1-2
-                return f'"{orig}"을 "{replaced}"로 한다.'
-        else:  # 규칙 10-2: A에 받침이 없는 경우
-            if replaced_has_batchim:
-                if replaced_has_rieul:  # 규칙 10-2-1-1
-                    return f'"{orig}"를 "{replaced}"로 한다.'
-                else:  # 규칙 10-2-1-2
-                    return f'"{orig}로"를 "{replaced}으로"로 한다.'
-            else:  # 규칙 10-2-2
-                return f'"{orig}"를 "{replaced}"로 한다.'
-    
-    elif josa == "는":  # 규칙 11
-        if replaced_has_batchim:  # 규칙 11-1
-            return f'"{orig}는"을 "{replaced}은"으로 한다.'
-        else:  # 규칙 11-2
-            return f'"{orig}"를 "{replaced}"로 한다.'
-    
-    elif josa == "은":  # 규칙 12
-        if replaced_has_batchim:
-            if replaced_has_rieul:  # 규칙 12-1-1
-                return f'"{orig}"을 "{replaced}"로 한다.'
-            else:  # 규칙 12-1-2
-                return f'"{orig}"을 "{replaced}"으로 한다.'
-        else:  # 규칙 12-2
-            return f'"{orig}은"을 "{replaced}는"으로 한다.'
-    
-    elif josa == "란":  # 규칙 13
-        if replaced_has_batchim:  # 규칙 13-1
-            return f'"{orig}란"을 "{replaced}이란"으로 한다.'
-        else:  # 규칙 13-2
-            return f'"{orig}"를 "{replaced}"로 한다.'
-    
-    elif josa == "이란":  # 규칙 14
-        if replaced_has_batchim:
-            if replaced_has_rieul:  # 규칙 14-1-1
-                return f'"{orig}"을 "{replaced}"로 한다.'
-            else:  # 규칙 14-1-2
-                return f'"{orig}"을 "{replaced}"으로 한다.'
-        else:  # 규칙 14-2
-            return f'"{orig}이란"을 "{replaced}란"으로 한다.'
-            
-    elif josa == "라":  # 추가 규칙: "라" 조사
-        if replaced_has_batchim:  # 받침이 있으면 "이라"
-            return f'"{orig}라"를 "{replaced}이라"로 한다.'
-        else:  # 받침이 없으면 그대로 "라"
-            return f'"{orig}라"를 "{replaced}라"로 한다.'
-            
-    elif josa == "이라":  # 추가 규칙: "이라" 조사
-        if replaced_has_batchim:
-            if replaced_has_rieul:
-                return f'"{orig}이라"를 "{replaced}이라"로 한다.'
-            else:
-                return f'"{orig}이라"를 "{replaced}이라"로 한다.'
-        else:
-            return f'"{orig}이라"를 "{replaced}라"로 한다.'
-    
-    # 기본 출력 형식
-    if orig_has_batchim:
-        return f'"{orig}"을 "{replaced}"로 한다.'
-    else:
-        return f'"{orig}"를 "{replaced}"로 한다.'
+        # 4. 조건에 맞지 않으면 토큰 전체 반환
+        return token, None, suffix
 
-def format_location(location):
-    """위치 정보 형식 수정: 항번호가 비어있는 경우와 호번호, 목번호의 period 제거"""
-    # 항번호가 비어있는 경우 "제항" 제거
-    location = re.sub(r'제(?=항)', '', location)
-    
-    # 호번호와 목번호 뒤의 period(.) 제거
-    location = re.sub(r'(\d+)\.호', r'\1호', location)
-    location = re.sub(r'([가-힣])\.목', r'\1목', location)
-    
-    return location
+@functools.lru_cache(maxsize=256)
+def get_chunk_extractor(searchword):
+    """검색어별 ChunkExtractor (같은 검색어는 여러 작업자가 함께 씀)"""
+    return ChunkExtractor(searchword)
+
+# 조사별 개정문 형식: (B 받침 없음, B 받침 ㄹ, B 그 밖의 받침) 순서의 형식 문자열.
+# {A}는 원래 단어, {B}는 바꿀 단어, {을를}은 A의 받침 유무에 따라 "을"/"를"로 채움.
+# 새 조사는 여기에 한 줄을 추가하면 되며, 결과는 이전의 조사별 if 문(bench/josa_reference.py)과 같음
+JOSA_RULES = {
+    None: ('"{A}"{을를} "{B}"로 한다.', '"{A}"{을를} "{B}"로 한다.', '"{A}"{을를} "{B}"으로 한다.'),  # 규칙 0
+    "을": ('"{A}을"을 "{B}를"로 한다.', '"{A}"을 "{B}"로 한다.', '"{A}"을 "{B}"으로 한다.'),  # 규칙 1
+    "를": ('"{A}"를 "{B}"로 한다.', '"{A}를"을 "{B}을"로 한다.', '"{A}를"을 "{B}을"로 한다.'),  # 규칙 2
+    "과": ('"{A}과"를 "{B}와"로 한다.', '"{A}"을 "{B}"로 한다.', '"{A}"을 "{B}"으로 한다.'),  # 규칙 3
+    "와": ('"{A}"를 "{B}"로 한다.', '"{A}와"를 "{B}과"로 한다.', '"{A}와"를 "{B}과"로 한다.'),  # 규칙 4
+    "이": ('"{A}이"를 "{B}가"로 한다.', '"{A}"을 "{B}"로 한다.', '"{A}"을 "{B}"으로 한다.'),  # 규칙 5
+    "가": ('"{A}"를 "{B}"로 한다.', '"{A}가"를 "{B}이"로 한다.', '"{A}가"를 "{B}이"로 한다.'),  # 규칙 6
+    "이나": ('"{A}이나"를 "{B}나"로 한다.', '"{A}"을 "{B}"로 한다.', '"{A}"을 "{B}"으로 한다.'),  # 규칙 7
+    "나": ('"{A}"를 "{B}"로 한다.', '"{A}나"를 "{B}이나"로 한다.', '"{A}나"를 "{B}이나"로 한다.'),  # 규칙 8
+    "으로": ('"{A}으로"를 "{B}로"로 한다.', '"{A}으로"를 "{B}로"로 한다.', '"{A}"을 "{B}"으로 한다.'),  # 규칙 9
+    "로": ('"{A}"{을를} "{B}"로 한다.', '"{A}"{을를} "{B}"로 한다.', '"{A}로"를 "{B}으로"로 한다.'),  # 규칙 10
+    "는": ('"{A}"를 "{B}"로 한다.', '"{A}는"을 "{B}은"으로 한다.', '"{A}는"을 "{B}은"으로 한다.'),  # 규칙 11
+    "은": ('"{A}은"을 "{B}는"으로 한다.', '"{A}"을 "{B}"로 한다.', '"{A}"을 "{B}"으로 한다.'),  # 규칙 12
+    "란": ('"{A}"를 "{B}"로 한다.', '"{A}란"을 "{B}이란"으로 한다.', '"{A}란"을 "{B}이란"으로 한다.'),  # 규칙 13
+    "이란": ('"{A}이란"을 "{B}란"으로 한다.', '"{A}"을 "{B}"로 한다.', '"{A}"을 "{B}"으로 한다.'),  # 규칙 14
+    "라": ('"{A}라"를 "{B}라"로 한다.', '"{A}라"를 "{B}이라"로 한다.', '"{A}라"를 "{B}이라"로 한다.'),
+    "이라": ('"{A}이라"를 "{B}라"로 한다.', '"{A}이라"를 "{B}이라"로 한다.', '"{A}이라"를 "{B}이라"로 한다.'),
+}
+# 표에 없는 조사의 기본 형식
+DEFAULT_JOSA_RULE = ('"{A}"{을를} "{B}"로 한다.',) * 3
+
+def _compile_josa_rules(rules):
+    """(조사, A 받침 유무, B 받침 종류) → (A 앞, A와 B 사이, B 뒤) 문자열 표. B 받침 종류는 0 없음, 1 ㄹ, 2 그 밖의 받침"""
+    table = {}
+    for josa, templates in rules.items():
+        for orig_batchim in (False, True):
+            for kind, template in enumerate(templates):
+                template = template.replace("{을를}", "을" if orig_batchim else "를")
+                head, rest = template.split("{A}")
+                middle, tail = rest.split("{B}")
+                table[josa, orig_batchim, kind] = (head, middle, tail)
+    return table
+
+_JOSA_RULE_TABLE = _compile_josa_rules(JOSA_RULES)
+_DEFAULT_JOSA_RULE_TABLE = _compile_josa_rules({None: DEFAULT_JOSA_RULE})
+
+def _batchim_kind(word):
+    """마지막 글자의 받침 종류 (0 없음, 1 ㄹ, 2 그 밖의 받침)"""
+    if not word:
+        return 0
+    code = (ord(word[-1]) - 0xAC00) % 28
+    return 0 if code == 0 else 1 if code == 8 else 2
+
+def format_josa_rule(orig, replaced, josa):
+    """(orig, replaced, josa) 하나의 개정문 형식. 여러 개를 만들 때는 format_josa_rules를 씀"""
+    return format_josa_rules(((orig, replaced, josa),))[0]
+
+def format_josa_rules(triples):
+    """(orig, replaced, josa) 여러 개를 한 번에 개정문 형식으로 바꿈. 단어별 받침 판단은 한 번만 함"""
+    kinds = {}
+    table, default = _JOSA_RULE_TABLE, _DEFAULT_JOSA_RULE_TABLE
+    results = []
+    for orig, replaced, josa in triples:
+        if orig == replaced:
+            results.append(f'"{orig}"를 "{replaced}"로 한다.')
+            continue
+        orig_kind = kinds.get(orig)
+        if orig_kind is None:
+            orig_kind = kinds[orig] = _batchim_kind(orig)
+        replaced_kind = kinds.get(replaced)
+        if replaced_kind is None:
+            replaced_kind = kinds[replaced] = _batchim_kind(replaced)
+        key = (josa, orig_kind != 0, replaced_kind)
+        head, middle, tail = table.get(key) or default[None, key[1], key[2]]
+        results.append(head + orig + middle + replaced + tail)
+    return results
+
+PROVISION_KIND_NAMES = {조: "조문내용", 항: "항내용", 호: "호내용", 목: "목내용"}
+
+def provision_location(row):
+    """조항 위치 (Location, str()하면 예: 제3조제2항제1호가목). 한 법률 안에서는 ProvisionTable.location을 씀"""
+    return Location.from_row(row)
 
 def group_locations(loc_list):
-    """위치 정보 그룹화"""
-    # 각 위치 문자열에 형식 수정 적용
-    formatted_locs = [format_location(loc) for loc in loc_list]
+    """위치 정보 그룹화 (loc_list는 법령 순서로 정렬된 Location 목록)"""
+    # 위치 문자열은 여기서 처음 만듦
+    formatted_locs = [str(loc) for loc in loc_list]
     
     if len(formatted_locs) == 1:
         return formatted_locs[0]
@@ -386,249 +767,587 @@ def consolidate_locations_by_rule(law_name, rule_map):
     # 결과 반환
     return result_lines
 
-def run_search_logic(query, unit="법률"):
-    """검색 로직 실행 함수"""
-    result_dict = {}
-    keyword_clean = clean(query)
-    for law in get_law_list_from_api(query):
-        mst = law["MST"]
-        xml_data = get_law_text_by_mst(mst)
-        if not xml_data:
-            continue
-        tree = ET.fromstring(xml_data)
-        articles = tree.findall(".//조문단위")
-        law_results = []
-        for article in articles:
-            조번호 = article.findtext("조문번호", "").strip()
-            조가지번호 = article.findtext("조문가지번호", "").strip()
-            조문식별자 = make_article_number(조번호, 조가지번호)
-            조문내용 = article.findtext("조문내용", "") or ""
-            항들 = article.findall("항")
-            출력덩어리 = []
-            조출력 = keyword_clean in clean(조문내용)
-            첫_항출력됨 = False
-            if 조출력:
-                출력덩어리.append(highlight(조문내용, query))
-            for 항 in 항들:
-                항번호 = normalize_number(항.findtext("항번호", "").strip())
-                항내용 = 항.findtext("항내용", "") or ""
-                항출력 = keyword_clean in clean(항내용)
-                항덩어리 = []
-                하위검색됨 = False
-                for 호 in 항.findall("호"):
-                    호내용 = 호.findtext("호내용", "") or ""
-                    호출력 = keyword_clean in clean(호내용)
-                    if 호출력:
-                        하위검색됨 = True
-                        항덩어리.append("&nbsp;&nbsp;" + highlight(호내용, query))
-                    for 목 in 호.findall("목"):
-                        for m in 목.findall("목내용"):
-                            if m.text and keyword_clean in clean(m.text):
-                                줄들 = [line.strip() for line in m.text.splitlines() if line.strip()]
-                                줄들 = [highlight(line, query) for line in 줄들]
-                                if 줄들:
-                                    하위검색됨 = True
-                                    항덩어리.append(
-                                        "<div style='margin:0;padding:0'>" +
-                                        "<br>".join("&nbsp;&nbsp;&nbsp;&nbsp;" + line for line in 줄들) +
-                                        "</div>"
-                                    )
-                if 항출력 or 하위검색됨:
-                    if not 조출력 and not 첫_항출력됨:
-                        출력덩어리.append(f"{highlight(조문내용, query)} {highlight(항내용, query)}")
-                        첫_항출력됨 = True
-                    elif not 첫_항출력됨:
-                        출력덩어리.append(highlight(항내용, query))
-                        첫_항출력됨 = True
-                    else:
-                        출력덩어리.append(highlight(항내용, query))
-                    출력덩어리.extend(항덩어리)
-            if 출력덩어리:
-                law_results.append("<br>".join(출력덩어리))
+class SearchHit:
+    """검색 결과로 보여줄 조항 하나. spans는 text 안에서 검색어가 나온 (시작, 끝) 위치
+
+    matched가 False이면 검색어가 들어 있지는 않지만 아래 호ㆍ목이나 첫 항을 보여주기 위해 함께 싣는 조문ㆍ항이다.
+    목은 내용을 줄 단위로 다듬어 "\n"으로 이은 text를 쓴다.
+    """
+
+    __slots__ = ("kind", "location", "text", "spans", "matched")
+
+    def __init__(self, kind, location, text, spans, matched):
+        self.kind = kind
+        self.location = location
+        self.text = text
+        self.spans = spans
+        self.matched = matched
+
+def _make_hit(provisions, row, pattern, matched, text=None):
+    """text는 화면에 보일 본문(목은 줄을 다듬은 것). 공백만 다르므로 row.compact에서 찾은 위치를 text의 위치로 바꿈"""
+    text = row.text if text is None else text
+    spans = []
+    offsets = None
+    # 줄바꿈이나 여러 칸 띄어쓰기를 사이에 둔 검색어도 하이라이트됨
+    for m in pattern.finditer(row.compact):
+        if offsets is None:
+            offsets = OffsetMap(text)
+        spans.append(offsets.raw_span(*m.span()))
+    return SearchHit(row.kind, provisions.location(row), text, spans, matched)
+
+def search_law(law, query):
+    """법률 하나의 본문을 가져와 검색어가 포함된 조문별 SearchHit 목록의 목록으로 반환. 본문을 가져오지 못하면 None
+
+    query는 검색어 문자열이나 law_query.parse_query로 만든 논리 검색식이다.
+    """
+    if isinstance(query, str):
+        keyword_clean = clean(query)
+        matches = lambda compact: keyword_clean in compact
+        pattern = compact_highlight_pattern(query)
+    else:
+        matches = query.matches
+        pattern = compact_highlight_pattern(*query.positive_terms())
+    try:
+        provisions = get_law_provisions(law["MST"])
+    except ET.ParseError as e:
+        logger.warning("법령 XML 파싱 오류 (%s): %s", law["법령명"], e)
+        return []
+    if provisions is None:
+        return None
+    if not provisions:
+        return []
+    # 로컬 색인에서 온 법률이면 검색어가 들어 있는 조항을 이미 알고 있음
+    if "조항" in law:
+        matched_rows = {provisions.rows[k] for k in law["조항"] if k < len(provisions)}
+        is_match = lambda row: row in matched_rows
+    else:
+        is_match = lambda row: matches(row.compact)
+    with span("scan"):
+        return _search_provisions(provisions, is_match, pattern)
+
+def _search_provisions(provisions, is_match, pattern):
+    law_results = []
+    for 조문, 항들 in provisions.iter_articles():
+        check_cancelled()
+        조출력 = is_match(조문)
+        hits = [_make_hit(provisions, 조문, pattern, True)] if 조출력 else []
+        for 항_, 하위들 in 항들:
+            하위hits = []
+            for row in 하위들:
+                if row.kind == 호:
+                    if is_match(row):
+                        하위hits.append(_make_hit(provisions, row, pattern, True))
+                elif row.text and is_match(row):
+                    줄들 = [line.strip() for line in row.text.splitlines() if line.strip()]
+                    if 줄들:
+                        하위hits.append(_make_hit(provisions, row, pattern, True, "\n".join(줄들)))
+            항출력 = is_match(항_)
+            if 항출력 or 하위hits:
+                if not hits:
+                    # 조문에 검색어가 없어도 첫 항 앞에 조문을 함께 보여줌
+                    hits.append(_make_hit(provisions, 조문, pattern, False))
+                hits.append(_make_hit(provisions, 항_, pattern, 항출력))
+                hits.extend(하위hits)
+        if hits:
+            law_results.append(hits)
+    return law_results
+
+def render_search_section(hits):
+    """조문 하나의 SearchHit 목록을 화면에 보여줄 HTML로 변환"""
+    with span("render"):
+        출력덩어리 = []
+        앞_조문 = None
+        for hit in hits:
+            html = mark_spans(hit.text, hit.spans)
+            if hit.kind == 조:
+                if hit.matched:
+                    출력덩어리.append(html)
+                else:
+                    앞_조문 = html
+            elif hit.kind == 항:
+                if 앞_조문 is not None:
+                    html = f"{앞_조문} {html}"
+                    앞_조문 = None
+                출력덩어리.append(html)
+            elif hit.kind == 호:
+                출력덩어리.append("&nbsp;&nbsp;" + html)
+            else:
+                줄들 = []
+                pos = 0
+                for line in hit.text.split("\n"):
+                    end = pos + len(line)
+                    # 줄을 넘어가는 검색어는 줄마다 나눠서 표시
+                    line_spans = [(max(a, pos) - pos, min(b, end) - pos) for a, b in hit.spans if a < end and b > pos]
+                    줄들.append("&nbsp;&nbsp;&nbsp;&nbsp;" + mark_spans(line, line_spans))
+                    pos = end + 1
+                출력덩어리.append("<div style='margin:0;padding:0'>" + "<br>".join(줄들) + "</div>")
+        return "<br>".join(출력덩어리)
+
+def iter_search_logic(query, unit="법률", max_workers=None, use_index=None, timeout=None, cancel=None, resume=None):
+    """검색 로직을 법률 단위로 흘려보내는 제너레이터
+
+    {"type": "progress", "done": 처리한 법률 수, "total": 전체 법률 수, "failed": 본문을 가져오지 못한 법률 수} 와
+    {"type": "result", "index": 목록 순번, "law_name": 법령명, "hits": 조문별 SearchHit 목록} 이벤트를 차례로 내보낸다.
+    HTML은 render_search_section으로 화면에 보여줄 조문만 만든다.
+    같은 검색어의 결과는 RESULT_CACHE_TTL초 동안 result_cache에서 다시 쓴다.
+
+    timeout(초)이 지나거나 cancel(law_cancel.CancelToken)이 취소되면 거기까지의 결과 뒤에
+    {"type": "incomplete", "reason", "done", "total", "listed": 처음 목록의 법률 수, "pending": [{"index", "law"}, ...]}
+    이벤트를 내보내고 끝난다.
+    그 이벤트를 resume으로 넘겨 다시 부르면 남은 법률만 처리한다 (이어서 처리한 결과는 캐시하지 않음).
+    목록을 다 받기 전에 멈췄으면 incomplete 이벤트의 unlisted_from이 받지 못한 첫 순번이고, 이어서 처리할 때 목록을 다시 받는다.
+    """
+    query = query.strip()
+    condition = parse_query(query)  # 잘못된 검색식이면 여기서 QueryError
+    use_index = USE_INDEX if use_index is None else use_index
+    token = make_token(timeout, cancel)
+    if isinstance(condition, Term):
+        make_events = lambda: _iter_search(condition.text, max_workers, use_index, token=token, resume=resume)
+    else:
+        make_events = lambda: _iter_boolean_search(condition, max_workers, use_index, token, resume)
+    if resume is not None:
+        return make_events()
+    return _cached_events(("search", query, use_index), make_events, shared=token is None)
+
+def _iter_boolean_search(condition, max_workers, use_index, token=None, resume=None):
+    """논리 검색식: 가장 적게 걸리는 검색어의 목록만 받아(OR는 각 목록의 합집합) 법률마다 조건을 조항 단위로 확인"""
+    def list_laws():
+        terms = plan_listing_terms(
+            condition,
+            lambda candidates: list(map_in_order(lambda t: count_laws(t, use_index), candidates, max_workers)),
+        )
+        logger.info("논리 검색 %r: 목록은 %s로 받음", condition, terms)
+        if len(terms) == 1 and not use_index:
+            return stream_law_list(terms[0], use_index)
+        laws = get_law_list_for_words(terms, use_index, max_workers)
+        # 색인의 "조항"은 검색어 하나에 대한 것이므로 조건은 본문 전체에서 다시 확인
+        return LawListing(len(laws), [{"법령명": law["법령명"], "MST": law["MST"]} for law in laws])
+    yield from _iter_search(condition, max_workers, use_index, list_laws, token, resume)
+
+def _iter_search(query, max_workers, use_index, list_laws=None, token=None, resume=None):
+    if list_laws is None:
+        list_laws = lambda: stream_law_list(query, use_index)
+    # 법률별 본문 조회와 파싱은 병렬로 처리하되, 결과는 검색 목록 순서를 유지
+    # (목록의 뒤쪽 페이지를 받는 동안에도 앞쪽 법률부터 조회를 시작함)
+    def make_event(idx, law, law_results):
         if law_results:
-            result_dict[law["법령명"]] = law_results
-    return result_dict
+            return {"type": "result", "index": idx, "law_name": law["법령명"], "hits": law_results}
+    yield from _run_laws(list_laws, resume, lambda law: search_law(law, query), make_event, max_workers, token,
+                         failed=lambda law_results: law_results is None)
 
-def run_amendment_logic(find_word, replace_word):
-    """개정문 생성 로직"""
-    amendment_results = []
-    skipped_laws = []  # 디버깅을 위해 누락된 법률 추적
-    
-    laws = get_law_list_from_api(find_word)
-    print(f"총 {len(laws)}개 법률이 검색되었습니다.")
-    
-    for idx, law in enumerate(laws):
-        law_name = law["법령명"]
-        mst = law["MST"]
-        print(f"처리 중: {idx+1}/{len(laws)} - {law_name} (MST: {mst})")  # 디버깅 추가
-        
-        xml_data = get_law_text_by_mst(mst)
-        if not xml_data:
-            skipped_laws.append(f"{law_name}: XML 데이터 없음")
-            continue
-            
+_SKIPPED = object()
+
+def _run_laws(list_laws, resume, work, make_event, max_workers, token, offload=None, failed=None):
+    """법률마다 work(law)를 병렬로 적용하고 make_event(순번, 법률, 결과)로 만든 이벤트와 진행 상황을 목록 순서대로 흘려보냄
+
+    list_laws()는 목록이나 LawListing을 돌려주는 함수로, 뒤쪽 페이지까지 token의 범위 안에서 받는다.
+    resume이 있으면 이전 요청의 incomplete 이벤트에 남은 법률만 처리하고, 그때 목록을 다 받지 못했으면(unlisted_from)
+    목록을 다시 받아 그 순번부터의 법률도 처리한다.
+    token이 취소되면 그 뒤의 법률은 모두(이미 끝난 것도) 남은 법률로 돌려, 이어서 처리해도 순서가 그대로 유지되게 한다.
+    목록을 받는 도중에 취소되면 받은 법률까지만 처리하고 incomplete 이벤트의 unlisted_from에 받지 못한 첫 순번을 담는다.
+    offload가 (prepare, process)이고 프로세스 풀을 쓰면 work 대신 조회 스레드에서 prepare(law)로 본문을 받고
+    프로세스 풀에서 process(*인자)로 처리한다 (pipeline_in_order).
+    failed(결과)가 참인 법률은 본문을 가져오지 못한 것으로 세어 progress 이벤트의 failed에 담는다.
+    """
+    if resume is not None:
+        items = [(p["index"], p["law"]) for p in resume["pending"]]
+        total, listed, start = len(items), resume["listed"], resume.get("unlisted_from")
+    else:
+        items, total, listed, start = [], 0, 0, 0
+    unlisted = []  # 목록을 받다가 취소되면 받지 못한 첫 순번
+    if start is not None:
         try:
-            tree = ET.fromstring(xml_data)
-        except ET.ParseError as e:
-            skipped_laws.append(f"{law_name}: XML 파싱 오류 - {str(e)}")
-            continue
-            
-        articles = tree.findall(".//조문단위")
-        if not articles:
-            skipped_laws.append(f"{law_name}: 조문단위 없음")
+            with cancel_scope(token):
+                laws = list_laws()
+        except Cancelled:
+            unlisted.append(start)
+        else:
+            listed = laws.total if isinstance(laws, LawListing) else len(laws)
+            total += listed - start
+            items = itertools.chain(items, _listed_items(laws, start, unlisted))
+
+    def run(item):
+        idx, law = item
+        if token is None:
+            return idx, law, work(law)
+        if token.cancelled:
+            return idx, law, _SKIPPED
+        try:
+            with cancel_scope(token):
+                return idx, law, work(law)
+        except Cancelled:
+            return idx, law, _SKIPPED
+
+    process_pool = get_process_pool() if offload is not None else None
+    if process_pool is None:
+        results = map_in_order(run, items, max_workers)
+    else:
+        prepare, process = offload
+
+        def fetch(item):
+            if token is not None and token.cancelled:
+                return pipeline_done(_SKIPPED)
+            try:
+                with cancel_scope(token):
+                    return prepare(item[1])
+            except Cancelled:
+                return pipeline_done(_SKIPPED)
+
+        results = (
+            (idx, law, result)
+            for (idx, law), result in pipeline_in_order(fetch, process, items, max_workers, process_pool,
+                                                         PROCESS_WORKERS)
+        )
+
+    yield {"type": "progress", "done": 0, "total": total, "failed": 0}
+    pending = []
+    done = fetch_failed = 0
+    for idx, law, result in results:
+        if pending or result is _SKIPPED:
+            pending.append({"index": idx, "law": law})
             continue
-            
-        print(f"조문 개수: {len(articles)}")  # 디버깅 추가
-        
-        chunk_map = defaultdict(list)
+        if failed is not None and failed(result):
+            fetch_failed += 1
+        event = make_event(idx, law, result)
+        if event:
+            yield event
+        done += 1
+        yield {"type": "progress", "done": done, "total": total, "failed": fetch_failed}
+    if pending or unlisted:
+        logger.info("%s: %d개 법률 중 %d개 처리하지 못함%s", token.reason, total, len(pending),
+                    f" (목록은 {unlisted[0]}번째까지 받음)" if unlisted else "")
+        yield {"type": "incomplete", "reason": token.reason, "done": done, "total": total, "listed": listed,
+               "pending": pending, "unlisted_from": unlisted[0] if unlisted else None}
+
+def _listed_items(laws, start, unlisted):
+    """(순번, 법률)을 start번부터 흘려보냄. 뒤쪽 페이지를 받다가 취소되면 멈추고 unlisted에 받지 못한 첫 순번을 담음"""
+    laws = iter(laws)
+    idx = 0
+    while True:
+        try:
+            law = next(laws)
+        except StopIteration:
+            return
+        except Cancelled:
+            unlisted.append(max(idx, start))
+            return
+        if idx >= start:
+            yield idx, law
+        idx += 1
+
+def incomplete_message(event):
+    """incomplete 이벤트를 사용자에게 보여줄 문장으로"""
+    names = [p["law"]["법령명"] for p in event["pending"]]
+    shown = ", ".join(names[:10]) + (f" 외 {len(names) - 10}개" if len(names) > 10 else "")
+    unlisted_from = event.get("unlisted_from")
+    if unlisted_from is None:
+        return f"⚠️ {event['reason']}: 전체 {event['listed']}개 법률 중 {len(names)}개 법률을 처리하지 못했습니다 ({shown})."
+    message = f"⚠️ {event['reason']}: 법률 목록을 다 받지 못했습니다"
+    if event["listed"]:
+        message += f" (전체 {event['listed']}개 중 {unlisted_from}개까지 받음)"
+    if names:
+        message += f". 받은 법률 중 {len(names)}개 법률도 처리하지 못했습니다 ({shown})"
+    return message + ". 이어서 처리하면 목록을 다시 받습니다."
+
+def run_search_logic(query, unit="법률", max_workers=None, use_index=None, timeout=None, cancel=None):
+    """검색 로직 실행 함수. {법령명: 조문별 HTML 목록}
+
+    시간 한도로 멈추면 마지막에 {"⚠️ 처리하지 못한 법률": [안내 문장]}을 덧붙인다.
+    """
+    result_dict = {}
+    for event in iter_search_logic(query, unit, max_workers, use_index, timeout, cancel):
+        if event["type"] == "result":
+            result_dict[event["law_name"]] = [render_search_section(hits) for hits in event["hits"]]
+        elif event["type"] == "incomplete":
+            result_dict["⚠️ 처리하지 못한 법률"] = [incomplete_message(event)]
+    return result_dict
+
+def amend_law(law, find_word, replace_word):
+    """법률 하나에 대한 개정 문장 목록을 만들어 (결과줄, 누락 사유)로 반환"""
+    return amend_law_pairs(law, [(find_word, replace_word)])
+
+def amend_law_pairs(law, pairs, matcher=None, load=get_law_provisions):
+    """법률 하나에 여러 (찾을 단어, 바꿀 단어) 쌍을 한꺼번에 적용한 개정 문장 목록과 누락 사유를 반환
+
+    본문을 가져오지 못했으면(load가 None을 돌려주면) 개정 문장 목록 대신 None을 돌려준다.
+    load(MST)는 조항 표를 돌려주는 함수. 이미 받아 둔 XML을 다른 프로세스에서 파싱할 때 바꿔 넣는다 (law_cli).
+    """
+    law_name = law["법령명"]
+    mst = law["MST"]
+    debug = logger.isEnabledFor(logging.DEBUG)
+    if debug:
+        logger.debug("처리 중: %s (MST: %s)", law_name, mst)
+    
+    try:
+        provisions = load(mst)
+    except ET.ParseError as e:
+        return [], f"{law_name}: XML 파싱 오류 - {str(e)}"
+    if provisions is None:
+        return None, f"{law_name}: XML 데이터 없음"
+    if not provisions:
+        return [], f"{law_name}: XML 데이터 없음"
+    if not provisions.article_count:
+        return [], f"{law_name}: 조문단위 없음"
         
-        # 법률에서 검색어의 모든 출현을 찾기 위한 디버깅 변수
-        found_matches = 0
+    if debug:
+        logger.debug("조문 개수: %d", provisions.article_count)
+    
+    # 로컬 색인에서 온 법률이면 검색어가 들어 있을 수 있는 조항만 살펴봄
+    if "조항" in law:
+        rows = [provisions.rows[k] for k in law["조항"] if k < len(provisions)]
+    else:
+        rows = provisions.rows
+    if matcher is None:
+        matcher = build_matcher(find_word for find_word, _ in pairs)
+    
+    # 개정 대상 단어별 위치 집합. 같은 조항에서 여러 번 나와도 한 번만 담음
+    chunk_map = defaultdict(set)
+    
+    # 법률에서 검색어의 모든 출현을 찾기 위한 디버깅 변수
+    found_matches = 0
+    
+    # 법률의 모든 텍스트 내용(조문ㆍ항ㆍ호ㆍ목)을 한 번씩만 훑어 들어 있는 찾을 단어를 확인
+    with span("scan"):
+        for i, row in enumerate(rows):
+            if not i & 255:
+                check_cancelled()
+            if not row.text:
+                continue
+            matched = sorted(matcher.search(row.text))
+            if not matched:
+                continue
+            found_matches += len(matched)
+            location = provisions.location(row)
+            if debug:
+                logger.debug("매치 발견: %s %s", location, PROVISION_KIND_NAMES[row.kind])
+            # 목내용은 줄 단위로 나누어 검색어가 있는 줄만 살펴봄
+            줄들 = [line.strip() for line in row.text.splitlines() if line.strip()] if row.kind == 목 else [row.text]
+            found = []  # (쌍 순번, chunk_map 키)
+            for 줄 in 줄들:
+                line_pairs = [pair_idx for pair_idx in matched if pairs[pair_idx][0] in 줄]
+                if not line_pairs:
+                    continue
+                for token in TOKEN_PATTERN.findall(줄):
+                    # 찾을 단어가 서로 겹치면(행정안전부, 행정안전부장관) 토큰마다 가장 긴 단어의 쌍 하나만 적용
+                    candidates = [pair_idx for pair_idx in line_pairs if pairs[pair_idx][0] in token]
+                    if not candidates:
+                        continue
+                    pair_idx = max(candidates, key=lambda k: len(pairs[k][0]))
+                    find_word, replace_word = pairs[pair_idx]
+                    chunk, josa, suffix = get_chunk_extractor(find_word).extract(token)
+                    found.append((pair_idx, (chunk, chunk.replace(find_word, replace_word), josa, suffix)))
+            # 개정 문장 순서는 조항 안에서 쌍의 순서를 따름
+            for _, key in sorted(found, key=lambda item: item[0]):
+                chunk_map[key].add(location)
+
+    # 매칭된 내용이 있지만 chunk_map에 추가되지 않은 경우
+    if found_matches > 0 and not chunk_map:
+        logger.warning("%s에서 %d개 매치 발견되었으나 chunk_map에 추가되지 않음", law_name, found_matches)
         
-        # 법률의 모든 텍스트 내용을 검색
-        for article in articles:
-            # 조문
-            조번호 = article.findtext("조문번호", "").strip()
-            조가지번호 = article.findtext("조문가지번호", "").strip()
-            조문식별자 = make_article_number(조번호, 조가지번호)
-            
-            # 조문내용에서 검색
-            조문내용 = article.findtext("조문내용", "") or ""
-            if find_word in 조문내용:
-                found_matches += 1
-                print(f"매치 발견: {조문식별자} 조문내용")  # 디버깅 추가
-                tokens = re.findall(r'[가-힣A-Za-z0-9]+', 조문내용)
-                for token in tokens:
-                    if find_word in token:
-                        chunk, josa, suffix = extract_chunk_and_josa(token, find_word)
-                        replaced = chunk.replace(find_word, replace_word)
-                        location = f"{조문식별자}"
-                        chunk_map[(chunk, replaced, josa, suffix)].append(location)
-
-            # 항 내용 검색
-            for 항 in article.findall("항"):
-                항번호 = normalize_number(항.findtext("항번호", "").strip())
-                항번호_부분 = f"제{항번호}항" if 항번호 else ""
-                
-                항내용 = 항.findtext("항내용", "") or ""
-                if find_word in 항내용:
-                    found_matches += 1
-                    print(f"매치 발견: {조문식별자}{항번호_부분} 항내용")  # 디버깅 추가
-                    tokens = re.findall(r'[가-힣A-Za-z0-9]+', 항내용)
-                    for token in tokens:
-                        if find_word in token:
-                            chunk, josa, suffix = extract_chunk_and_josa(token, find_word)
-                            replaced = chunk.replace(find_word, replace_word)
-                            location = f"{조문식별자}{항번호_부분}"
-                            chunk_map[(chunk, replaced, josa, suffix)].append(location)
-                
-                # 호 내용 검색
-                for 호 in 항.findall("호"):
-                    호번호 = 호.findtext("호번호")
-                    호내용 = 호.findtext("호내용", "") or ""
-                    if find_word in 호내용:
-                        found_matches += 1
-                        print(f"매치 발견: {조문식별자}{항번호_부분}제{호번호}호 호내용")  # 디버깅 추가
-                        tokens = re.findall(r'[가-힣A-Za-z0-9]+', 호내용)
-                        for token in tokens:
-                            if find_word in token:
-                                chunk, josa, suffix = extract_chunk_and_josa(token, find_word)
-                                replaced = chunk.replace(find_word, replace_word)
-                                location = f"{조문식별자}{항번호_부분}제{호번호}호"
-                                chunk_map[(chunk, replaced, josa, suffix)].append(location)
-
-                    # 목 내용 검색
-                    for 목 in 호.findall("목"):
-                        목번호 = 목.findtext("목번호")
-                        for m in 목.findall("목내용"):
-                            if not m.text:
-                                continue
-                                
-                            if find_word in m.text:
-                                found_matches += 1
-                                print(f"매치 발견: {조문식별자}{항번호_부분}제{호번호}호{목번호}목 목내용")  # 디버깅 추가
-                                줄들 = [line.strip() for line in m.text.splitlines() if line.strip()]
-                                for 줄 in 줄들:
-                                    if find_word in 줄:
-                                        tokens = re.findall(r'[가-힣A-Za-z0-9]+', 줄)
-                                        for token in tokens:
-                                            if find_word in token:
-                                                chunk, josa, suffix = extract_chunk_and_josa(token, find_word)
-                                                replaced = chunk.replace(find_word, replace_word)
-                                                location = f"{조문식별자}{항번호_부분}제{호번호}호{목번호}목"
-                                                chunk_map[(chunk, replaced, josa, suffix)].append(location)
-
-        # 매칭된 내용이 있지만 chunk_map에 추가되지 않은 경우
-        if found_matches > 0 and not chunk_map:
-            print(f"경고: {law_name}에서 {found_matches}개 매치 발견되었으나 chunk_map에 추가되지 않음")
-            
-            # 디버깅: 검색어를 포함하는 부분을 출력하여 문제 원인 파악
-            for article in articles:
-                조문내용 = article.findtext("조문내용", "") or ""
-                if find_word in 조문내용:
-                    print(f"누락된 검색어 위치 (조문내용): {조문내용}")
-                    print(f"토큰: {re.findall(r'[가-힣A-Za-z0-9]+', 조문내용)}")
-                
-                for 항 in article.findall("항"):
-                    항내용 = 항.findtext("항내용", "") or ""
-                    if find_word in 항내용:
-                        print(f"누락된 검색어 위치 (항내용): {항내용}")
-                        print(f"토큰: {re.findall(r'[가-힣A-Za-z0-9]+', 항내용)}")
-                    
-                    for 호 in 항.findall("호"):
-                        호내용 = 호.findtext("호내용", "") or ""
-                        if find_word in 호내용:
-                            print(f"누락된 검색어 위치 (호내용): {호내용}")
-                            print(f"토큰: {re.findall(r'[가-힣A-Za-z0-9]+', 호내용)}")
-            
-            skipped_laws.append(f"{law_name}: 검색어 {found_matches}개 발견되었으나 chunk_map에 추가되지 않음")
-            
-        if not chunk_map:
-            continue
+        # 디버깅: 검색어를 포함하는 부분을 출력하여 문제 원인 파악
+        if debug:
+            for row in rows:
+                if row.kind != 목 and matcher.search(row.text):
+                    logger.debug("누락된 검색어 위치 (%s): %s", PROVISION_KIND_NAMES[row.kind], row.text)
+                    logger.debug("토큰: %s", TOKEN_PATTERN.findall(row.text))
         
-        # 디버깅: chunk_map 내용 출력
-        print(f"chunk_map 항목 수: {len(chunk_map)}")
-        for (chunk, replaced, josa, suffix), locations in chunk_map.items():
-            print(f"chunk: '{chunk}', replaced: '{replaced}', josa: '{josa}', suffix: '{suffix}', locations: {locations}")
+        return [], f"{law_name}: 검색어 {found_matches}개 발견되었으나 chunk_map에 추가되지 않음"
         
-        # 같은 출력 형식을 가진 항목들을 그룹화
-        rule_map = defaultdict(list)
+    if not chunk_map:
+        return [], None
+    
+    # 디버깅: chunk_map 내용 출력
+    if debug:
+        logger.debug("chunk_map 항목 수: %d", len(chunk_map))
         for (chunk, replaced, josa, suffix), locations in chunk_map.items():
+            logger.debug("chunk: '%s', replaced: '%s', josa: '%s', suffix: '%s', locations: %s",
+                         chunk, replaced, josa, suffix, locations)
+    
+    # 같은 출력 형식을 가진 항목들을 그룹화
+    with span("format"):
+        triples = []
+        for chunk, replaced, josa, suffix in chunk_map:
             # 접미사 처리
             if suffix and suffix != "의":  # "의"는 개별 처리하지 않음
-                orig_with_suffix = chunk + suffix
-                replaced_with_suffix = replaced + suffix
-                rule = apply_josa_rule(orig_with_suffix, replaced_with_suffix, josa)
+                triples.append((chunk + suffix, replaced + suffix, josa))
             else:
-                rule = apply_josa_rule(chunk, replaced, josa)
-                
-            rule_map[rule].extend(sorted(set(locations)))
-        
-                # 디버깅: rule_map 내용 출력
-        print(f"rule_map 항목 수: {len(rule_map)}")
+                triples.append((chunk, replaced, josa))
+        rule_map = defaultdict(set)
+        for rule, locations in zip(format_josa_rules(triples), chunk_map.values()):
+            rule_map[rule] |= locations
+    
+    # 디버깅: rule_map 내용 출력
+    if debug:
+        logger.debug("rule_map 항목 수: %d", len(rule_map))
         for rule, locations in rule_map.items():
-            print(f"rule: '{rule}', locations: {locations}")
-        
-        # 그룹화된 항목들을 정렬하여 출력
+            logger.debug("rule: '%s', locations: %s", rule, locations)
+    
+    # 그룹화된 항목들을 정렬하여 출력
+    with span("render"):
         result_lines = []
         for rule, locations in rule_map.items():
-            loc_str = group_locations(sorted(set(locations)))
+            loc_str = group_locations(sorted(locations))
             result_lines.append(f"{loc_str} 중 {rule}")
-        
-        # run_amendment_logic 함수 내의 결과 생성 부분 (전체 함수 중 일부만 수정)
+    
+    if not result_lines:
+        return [], f"{law_name}: 결과줄이 생성되지 않음"
+    return result_lines, None
+
+@functools.lru_cache(maxsize=256)
+def _pair_matcher(find_words):
+    return build_matcher(find_words)
+
+def prepare_amendment(law, pairs, failures=None):
+    """프로세스 풀로 넘길 amend_law_xml 인자. 본문을 받지 못하면 pipeline_done(누락 결과)이고 failures에 MST를 담음
+
+    법령 묶음 저장소에 있는 법률은 XML 없이 넘기고 작업자가 저장소에서 직접 읽는다.
+    """
+    if law["MST"] in get_law_store():
+        return law, pairs
+    xml_data = get_law_text_by_mst(law["MST"])
+    if not xml_data:
+        if failures is not None:
+            failures.append(law["MST"])
+        return pipeline_done(amend_law_pairs(law, pairs, load=lambda mst: None))
+    return law, pairs, xml_data
+
+def amend_law_xml(law, pairs, xml_data=None):
+    """amend_law_pairs를 프로세스 풀 작업자에서 실행. xml_data가 없으면 법령 묶음 저장소에서 읽음"""
+    matcher = _pair_matcher(tuple(find_word for find_word, _ in pairs))
+    load = get_law_provisions if xml_data is None else lambda mst: parse_provisions(xml_data)
+    return amend_law_pairs(law, pairs, matcher, load)
+
+def format_amendment(idx, law_name, result_lines):
+    """검색 목록에서 idx번째(0부터) 법률의 개정문. 20번째까지는 원문자, 그 뒤로는 (21)처럼 번호를 붙임"""
+    prefix = chr(9312 + idx) if idx < 20 else f'({idx + 1})'
+    amendment = f"{prefix} {law_name} 일부를 다음과 같이 개정한다.\n"
+    # 각 개정 규칙마다 줄바꿈 추가
+    return amendment + "\n".join(result_lines)
+
+def _iter_amendments(list_laws, amend, max_workers=None, token=None, resume=None, pairs=None):
+    """법률마다 amend(law)를 적용해 번호를 붙인 개정문과 진행 상황 이벤트를 흘려보냄
+
+    list_laws()는 목록이나 LawListing을 돌려주는 함수 (_run_laws). 한 번만 반복하므로 흘러나오는 목록도 받을 수 있다.
+    번호는 검색 목록의 순번으로 붙이므로 resume으로 이어서 처리해도 처음부터 한 것과 같다.
+    pairs를 주면 프로세스 풀(LAW_PROCESS_WORKERS)을 쓸 때 amend 대신 조회 → 프로세스 풀 파싱ㆍ검색 → 번호 붙이기로 나눠 처리한다.
+    """
+    skipped_laws = []  # 디버깅을 위해 누락된 법률 추적
+
+    def make_event(idx, law, result):
+        result_lines, skipped = result
+        if skipped:
+            skipped_laws.append(skipped)
         # 변경된 법률에 대한 개정문 생성 (줄바꿈 개선)
         if result_lines:
-            prefix = chr(9312 + idx) if idx < 20 else f'({idx + 1})'
-            amendment = f"{prefix} {law_name} 일부를 다음과 같이 개정한다.\n"
-            # 각 개정 규칙마다 줄바꿈 추가
-            amendment += "\n".join(result_lines)
-            amendment_results.append(amendment)
-        else:
-            skipped_laws.append(f"{law_name}: 결과줄이 생성되지 않음")
+            amendment = format_amendment(idx, law["법령명"], result_lines)
+            return {"type": "result", "index": idx, "law_name": law["법령명"], "amendment": amendment}
+
+    # 법률별 조회ㆍ파싱ㆍ검색은 병렬로 처리하고, 번호는 검색 목록 순서대로 부여
+    offload = (lambda law: prepare_amendment(law, pairs), amend_law_xml) if pairs else None
+    yield from _run_laws(list_laws, resume, amend, make_event, max_workers, token, offload,
+                         failed=lambda result: result[0] is None)
 
     # 디버깅 정보 출력
     if skipped_laws:
-        print("누락된 법률 목록:", skipped_laws)
+        logger.info("누락된 법률 목록: %s", skipped_laws)
+
+def iter_amendment_logic(find_word, replace_word, max_workers=None, use_index=None, timeout=None, cancel=None,
+                         resume=None):
+    """개정문 생성 로직을 법률 단위로 흘려보내는 제너레이터
+
+    {"type": "progress", "done": 처리한 법률 수, "total": 전체 법률 수, "failed": 본문을 가져오지 못한 법률 수} 와
+    {"type": "result", "index": 목록 순번, "law_name": 법령명, "amendment": 개정문} 이벤트를 차례로 내보낸다.
+    timeout, cancel, resume과 incomplete 이벤트는 iter_search_logic과 같다.
+    """
+    find_word, replace_word = find_word.strip(), replace_word.strip()
+    use_index = USE_INDEX if use_index is None else use_index
+    token = make_token(timeout, cancel)
+    if resume is not None:
+        return _iter_amendment(find_word, replace_word, max_workers, use_index, token, resume)
+    key = ("amend", find_word, replace_word, use_index)
+    return _cached_events(key, lambda: _iter_amendment(find_word, replace_word, max_workers, use_index, token),
+                          shared=token is None)
+
+def _iter_amendment(find_word, replace_word, max_workers, use_index, token=None, resume=None):
+    def list_laws():
+        laws = stream_law_list(find_word, use_index)
+        logger.info("총 %d개 법률이 검색되었습니다.", laws.total)
+        return laws
+    yield from _iter_amendments(list_laws, lambda law: amend_law(law, find_word, replace_word), max_workers, token, resume,
+                                [(find_word, replace_word)])
 
-    # 함수의 리턴문 (함수 마지막에 위치, 들여쓰기 주의)
+def _amendment_results(events):
+    amendment_results = []
+    for event in events:
+        if event["type"] == "result":
+            amendment_results.append(event["amendment"])
+        elif event["type"] == "incomplete":
+            amendment_results.append(incomplete_message(event))
     return amendment_results if amendment_results else ["⚠️ 개정 대상 조문이 없습니다."]
+
+def run_amendment_logic(find_word, replace_word, max_workers=None, use_index=None, timeout=None, cancel=None):
+    """개정문 생성 로직. 시간 한도로 멈추면 마지막에 처리하지 못한 법률 안내를 덧붙임"""
+    return _amendment_results(iter_amendment_logic(find_word, replace_word, max_workers, use_index, timeout, cancel))
+
+def parse_replacement_pairs(text):
+    """한 줄에 하나씩 "찾을 단어, 바꿀 단어"로 적은 목록을 쌍의 목록으로 변환 (쉼표ㆍ탭ㆍ->ㆍ→로 구분)"""
+    pairs = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        parts = re.split(r"\s*(?:,|\t|->|→)\s*", line, maxsplit=1)
+        if len(parts) != 2 or not parts[0] or not parts[1]:
+            raise ValueError(f"찾을 단어와 바꿀 단어를 구분할 수 없습니다: {line}")
+        pairs.append((parts[0], parts[1]))
+    return pairs
+
+def normalize_replacement_pairs(pairs):
+    """중복된 쌍을 없애고, 같은 단어를 서로 다르게 바꾸라는 쌍이 있으면 ValueError 발생"""
+    replacements = {}
+    for find_word, replace_word in pairs:
+        if not find_word or not replace_word:
+            raise ValueError("찾을 단어와 바꿀 단어는 비워둘 수 없습니다.")
+        if replacements.setdefault(find_word, replace_word) != replace_word:
+            raise ValueError(f'"{find_word}"을(를) 바꿀 단어가 둘 이상입니다: "{replacements[find_word]}", "{replace_word}"')
+    return list(replacements.items())
+
+def get_law_list_for_words(words, use_index=None, max_workers=None):
+    """여러 검색어의 법률 목록을 합쳐 법률마다 한 번씩만 담은 목록 (처음 나온 순서 유지)"""
+    merged = {}
+    for laws in map_in_order(lambda word: get_law_list(word, use_index), words, max_workers):
+        for law in laws:
+            entry = merged.get(law["MST"])
+            if entry is None:
+                merged[law["MST"]] = dict(law)
+            elif "조항" in entry:
+                entry["조항"] = sorted(set(entry["조항"]) | set(law["조항"]))
+    return list(merged.values())
+
+def iter_batch_amendment_logic(pairs, max_workers=None, use_index=None, timeout=None, cancel=None, resume=None):
+    """여러 (찾을 단어, 바꿀 단어) 쌍을 한 번에 처리하는 개정문 생성 제너레이터
+
+    법률마다 본문을 한 번만 가져와 한 번만 훑고, 모든 쌍의 개정 위치를 법률별 개정문 하나로 묶는다.
+    이벤트 형식과 timeout, cancel, resume은 iter_amendment_logic과 같다.
+    """
+    pairs = normalize_replacement_pairs(pairs)
+    use_index = USE_INDEX if use_index is None else use_index
+    token = make_token(timeout, cancel)
+    if resume is not None:
+        return _iter_batch_amendment(pairs, max_workers, use_index, token, resume)
+    key = ("batch", tuple(pairs), use_index)
+    return _cached_events(key, lambda: _iter_batch_amendment(pairs, max_workers, use_index, token),
+                          shared=token is None)
+
+def _iter_batch_amendment(pairs, max_workers, use_index, token=None, resume=None):
+    def list_laws():
+        laws = get_law_list_for_words([find_word for find_word, _ in pairs], use_index, max_workers)
+        logger.info("총 %d개 단어쌍, %d개 법률이 검색되었습니다.", len(pairs), len(laws))
+        return laws
+    matcher = build_matcher(find_word for find_word, _ in pairs)
+    yield from _iter_amendments(list_laws, lambda law: amend_law_pairs(law, pairs, matcher), max_workers, token, resume,
+                                pairs)
+
+def run_batch_amendment_logic(pairs, max_workers=None, use_index=None, timeout=None, cancel=None):
+    """일괄 개정문 생성 로직. 시간 한도로 멈추면 마지막에 처리하지 못한 법률 안내를 덧붙임"""
+    return _amendment_results(iter_batch_amendment_logic(pairs, max_workers, use_index, timeout, cancel))
@@ -0,0 +1,277 @@
+import bisect
+import functools
+import io
+import re
+import unicodedata
+import xml.etree.ElementTree as ET
+
+# 법령 XML의 조문단위 → 항 → 호 → 목 구조를 한 번만 훑어서 문서 순서대로 펼친 조항 표.
+# 검색과 개정문 생성, 로컬 색인이 모두 이 표를 함께 쓴다.
+
+조, 항, 호, 목 = 0, 1, 2, 3  # Provision.kind
+
+_WHITESPACE = re.compile(r"\s+")
+_NON_WHITESPACE = re.compile(r"\S+")
+
+
+def clean(text):
+    return _WHITESPACE.sub("", text or "")
+
+
+class OffsetMap:
+    """clean(text)의 글자 위치를 text의 위치로 바꿈
+
+    공백 없이 이어진 구간마다 (원문 시작, 압축문 시작)만 두므로 글자마다 위치를 두는 것보다 작다.
+    """
+
+    __slots__ = ("_raw_starts", "_compact_starts")
+
+    def __init__(self, text):
+        self._raw_starts = []
+        self._compact_starts = []
+        n = 0
+        for m in _NON_WHITESPACE.finditer(text or ""):
+            self._raw_starts.append(m.start())
+            self._compact_starts.append(n)
+            n += m.end() - m.start()
+
+    def raw(self, index):
+        k = bisect.bisect_right(self._compact_starts, index) - 1
+        return self._raw_starts[k] + index - self._compact_starts[k]
+
+    def raw_span(self, start, end):
+        """압축문의 [start, end) 구간을 원문의 구간으로. 사이에 낀 공백ㆍ줄바꿈도 구간에 들어감"""
+        return self.raw(start), self.raw(end - 1) + 1
+
+
+def normalize_number(text):
+    try:
+        return str(int(unicodedata.numeric(text)))
+    except:
+        return text
+
+
+class Provision:
+    """조문내용ㆍ항내용ㆍ호내용ㆍ목내용 하나와 그 위치"""
+
+    __slots__ = ("kind", "article", "조번호", "조가지번호", "항번호", "호번호", "목번호", "text", "compact")
+
+    def __init__(self, kind, article, 조번호, 조가지번호, 항번호, 호번호, 목번호, text, compact=None):
+        self.kind = kind
+        self.article = article  # 법률 안에서 몇 번째 조문단위인지
+        self.조번호 = 조번호
+        self.조가지번호 = 조가지번호
+        self.항번호 = 항번호  # 원문자를 숫자로 바꾼 값 (없으면 "")
+        self.호번호 = 호번호  # XML 값 그대로 (예: "1.", 없으면 None)
+        self.목번호 = 목번호  # XML 값 그대로 (예: "가.", 없으면 None)
+        self.text = text
+        self.compact = clean(text) if compact is None else compact  # 저장소에서 읽을 때는 저장된 값을 씀
+
+
+_HO_NUMBER = re.compile(r"(\d+)(?:의(\d+))?\.?")
+_MOK_LETTERS = "가나다라마바사아자차카타파하"
+
+
+@functools.total_ordering
+class Location:
+    """조항 위치. 조ㆍ조의 가지ㆍ항ㆍ호ㆍ호의 가지ㆍ목 번호를 정수로(없으면 0) 갖고 법령 순서대로 비교된다
+
+    번호를 숫자로 읽지 못한 위치(raw)는 같은 조의 읽은 위치들 뒤에, 조번호를 읽지 못했으면 모든 조 뒤에 둔다.
+    문자열(예: 제3조의2제1항제4호가목)은 처음 str()할 때 한 번만 만든다.
+    """
+
+    __slots__ = ("조", "가지", "항", "호", "호가지", "목", "raw", "_label")
+
+    def __init__(self, 조, 가지=0, 항=0, 호=0, 호가지=0, 목=0, raw=""):
+        self.조 = 조
+        self.가지 = 가지
+        self.항 = 항
+        self.호 = 호
+        self.호가지 = 호가지
+        self.목 = 목  # 가목이 1
+        self.raw = raw  # 번호를 숫자로 읽지 못했을 때만 XML 값으로 만든 표기
+        self._label = raw or None
+
+    @classmethod
+    def from_row(cls, row):
+        """조항 행의 위치. 번호를 숫자로 읽을 수 없으면 순서는 0으로 두고 XML 값 그대로 표기"""
+        조번호 = _to_int(row.조번호)
+        가지 = _to_int(row.조가지번호 or "0")
+        항번호 = _to_int(row.항번호 or "0") if row.kind != 조 else 0
+        호번호 = 호가지 = 목번호 = 0
+        ho = mok = None
+        if row.kind in (호, 목):
+            ho = _HO_NUMBER.fullmatch((row.호번호 or "").strip())
+            if ho:
+                호번호, 호가지 = int(ho[1]), int(ho[2] or 0)
+        if row.kind == 목:
+            mok = (row.목번호 or "").strip().rstrip(".")
+            목번호 = _MOK_LETTERS.find(mok) + 1 if len(mok) == 1 else 0
+        if (조번호 is None or 가지 is None or 항번호 is None
+                or (row.kind in (호, 목) and not ho) or (row.kind == 목 and not 목번호)):
+            return cls(조번호 or 0, 가지 or 0, 항번호 or 0, 호번호, 호가지, 목번호, _raw_label(row))
+        return cls(조번호, 가지, 항번호, 호번호, 호가지, 목번호)
+
+    @property
+    def key(self):
+        if not self.raw:
+            return (self.조, self.가지, False, self.항, self.호, self.호가지, self.목, "")
+        return (self.조 or float("inf"), self.가지, True, self.항, self.호, self.호가지, self.목, self.raw)
+
+    def __eq__(self, other):
+        if not isinstance(other, Location):
+            return NotImplemented
+        return self.key == other.key
+
+    def __lt__(self, other):
+        if not isinstance(other, Location):
+            return NotImplemented
+        return self.key < other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __str__(self):
+        if self._label is None:
+            label = f"제{self.조}조의{self.가지}" if self.가지 else f"제{self.조}조"
+            if self.항:
+                label += f"제{self.항}항"
+            if self.호:
+                label += f"제{self.호}의{self.호가지}호" if self.호가지 else f"제{self.호}호"
+            if self.목:
+                label += f"{_MOK_LETTERS[self.목 - 1]}목"
+            self._label = label
+        return self._label
+
+    def __repr__(self):
+        return f"Location({self})"
+
+
+def _to_int(text):
+    text = (text or "").strip()
+    return int(text) if text.isdigit() else None
+
+
+def _raw_label(row):
+    # 숫자로 읽을 수 없는 번호는 XML 값 그대로 쓰되, 빈 항번호와 호ㆍ목 번호 뒤의 마침표는 뺌
+    label = f"제{row.조번호}조의{row.조가지번호}" if row.조가지번호 and row.조가지번호 != "0" else f"제{row.조번호}조"
+    if row.kind != 조 and row.항번호:
+        label += f"제{row.항번호}항"
+    if row.kind in (호, 목):
+        label += f"제{row.호번호}호"
+    if row.kind == 목:
+        label += f"{row.목번호}목"
+    label = re.sub(r"(\d+)\.호", r"\1호", label)
+    return re.sub(r"([가-힣])\.목", r"\1목", label)
+
+
+class ProvisionTable:
+    """법률 하나의 조항을 문서 순서대로 담은 표"""
+
+    __slots__ = ("rows", "article_count", "name", "law_id", "_locations")
+
+    def __init__(self, rows, article_count, name="", law_id=""):
+        self.rows = rows
+        self.article_count = article_count
+        self.name = name  # 기본정보의 법령명_한글
+        self.law_id = law_id  # 기본정보의 법령ID
+        self._locations = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def location(self, row):
+        """row의 Location. 같은 위치(한 목의 여러 줄, 항번호 없는 항과 그 조문 등)는 같은 객체를 돌려줌"""
+        raw = (row.조번호, row.조가지번호,
+               row.항번호 if row.kind != 조 else "",
+               row.호번호 if row.kind in (호, 목) else None,
+               row.목번호 if row.kind == 목 else None)
+        location = self._locations.get(raw)
+        if location is None:
+            location = self._locations.setdefault(raw, Location.from_row(row))
+        return location
+
+    def iter_articles(self):
+        """(조문 행, [(항 행, [호ㆍ목 행, ...]), ...])를 조문단위 순서대로 돌려줌"""
+        article_row = None
+        paragraphs = []
+        for row in self.rows:
+            if row.kind == 조:
+                if article_row is not None:
+                    yield article_row, paragraphs
+                article_row, paragraphs = row, []
+            elif row.kind == 항:
+                paragraphs.append((row, []))
+            else:
+                paragraphs[-1][1].append(row)
+        if article_row is not None:
+            yield article_row, paragraphs
+
+
+def parse_provisions(xml_data):
+    """법령 XML을 조항 표로 변환. XML이 깨져 있으면 ET.ParseError 발생
+
+    ET.iterparse로 읽으면서 조문단위 하나를 다 읽을 때마다 조항을 뽑고 바로 버린다.
+    부칙ㆍ별표ㆍ개정이력 등 쓰지 않는 부분도 읽는 즉시 버리므로 큰 법률도 전체 트리를 만들지 않는다.
+    """
+    rows = []
+    article_count = 0
+    name = law_id = first_name = ""
+    stack = []  # 현재 열려 있는 요소들
+    in_article = 0
+    for event, elem in ET.iterparse(io.BytesIO(xml_data), events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            if elem.tag == "조문단위":
+                in_article += 1
+            continue
+        stack.pop()
+        if elem.tag == "조문단위":
+            in_article -= 1
+            _append_article_rows(rows, elem, article_count)
+            article_count += 1
+        elif in_article:
+            # 조문단위 안의 요소는 조문단위가 끝날 때 함께 처리
+            continue
+        elif elem.tag == "법령명_한글":
+            if stack and stack[-1].tag == "기본정보" and not name:
+                name = (elem.text or "").strip()
+            first_name = first_name or (elem.text or "").strip()
+        elif elem.tag == "법령ID" and stack and stack[-1].tag == "기본정보":
+            law_id = (elem.text or "").strip()
+        elem.clear()
+        if stack:
+            stack[-1].remove(elem)
+    return ProvisionTable(rows, article_count, name or first_name, law_id)
+
+
+def provisions_from_tree(tree):
+    """이미 만들어 둔 ElementTree에서 조항 표를 만듦 (parse_provisions와 같은 결과)"""
+    rows = []
+    article_count = 0
+    for article in tree.iter("조문단위"):
+        _append_article_rows(rows, article, article_count)
+        article_count += 1
+    name = (tree.findtext(".//기본정보/법령명_한글") or tree.findtext(".//법령명_한글") or "").strip()
+    law_id = (tree.findtext(".//기본정보/법령ID") or "").strip()
+    return ProvisionTable(rows, article_count, name, law_id)
+
+
+def _append_article_rows(rows, article, article_index):
+    조번호 = article.findtext("조문번호", "").strip()
+    조가지번호 = article.findtext("조문가지번호", "").strip()
+    위치 = (article_index, 조번호, 조가지번호)
+    rows.append(Provision(조, *위치, "", None, None, article.findtext("조문내용", "") or ""))
+    for 항_ in article.findall("항"):
+        항번호 = normalize_number(항_.findtext("항번호", "").strip())
+        rows.append(Provision(항, *위치, 항번호, None, None, 항_.findtext("항내용", "") or ""))
+        for 호_ in 항_.findall("호"):
+            호번호 = 호_.findtext("호번호")
+            rows.append(Provision(호, *위치, 항번호, 호번호, None, 호_.findtext("호내용", "") or ""))
+            for 목_ in 호_.findall("목"):
+                목번호 = 목_.findtext("목번호")
+                for m in 목_.findall("목내용"):
+                    rows.append(Provision(목, *위치, 항번호, 호번호, 목번호, m.text or ""))
@@ -0,0 +1,259 @@
+import re
+
+from law_provisions import clean
+
+# 검색 기능의 논리 검색식
+#
+#   법원 AND 판사            두 검색어가 모두 들어 있는 조항
+#   법원 OR 검찰             둘 중 하나라도 들어 있는 조항
+#   법원 NOT 가정법원        "법원"은 있고 "가정법원"은 없는 조항 (A NOT B는 A AND NOT B)
+#   (법원 OR 검찰) AND 판사  괄호로 묶기
+#   "AND 조건"               따옴표 안은 연산자 없이 그대로 한 구절
+#
+# 연산자는 대문자로 쓰며 우선순위는 NOT > AND > OR 이다. 연산자 없이 띄어 쓴 낱말은 이전처럼 한 구절로 본다
+# ("행정 안전부"는 "행정안전부"와 같음). 연산자도 따옴표도 없으면 "제3조(목적)"처럼 괄호가 있어도 입력 전체가
+# 한 구절이다. 조건은 조항(조문ㆍ항ㆍ호ㆍ목) 하나하나에 대해 따지고, 본문 비교는 지금까지와 같이 공백을 없앤 글자로 한다.
+
+
+class QueryError(ValueError):
+    """검색식을 해석할 수 없거나 법률 목록을 정할 수 없는 경우"""
+
+
+class Term:
+    __slots__ = ("text", "compact")
+
+    def __init__(self, text):
+        self.text = text
+        self.compact = clean(text)
+
+    def matches(self, compact):
+        return self.compact in compact
+
+    def positive_terms(self):
+        return [self.text]
+
+    def __repr__(self):
+        return f"Term({self.text!r})"
+
+
+class And:
+    __slots__ = ("children",)
+
+    def __init__(self, children):
+        self.children = children
+
+    def matches(self, compact):
+        return all(child.matches(compact) for child in self.children)
+
+    def positive_terms(self):
+        return [t for child in self.children for t in child.positive_terms()]
+
+    def __repr__(self):
+        return f"And({self.children!r})"
+
+
+class Or:
+    __slots__ = ("children",)
+
+    def __init__(self, children):
+        self.children = children
+
+    def matches(self, compact):
+        return any(child.matches(compact) for child in self.children)
+
+    def positive_terms(self):
+        return [t for child in self.children for t in child.positive_terms()]
+
+    def __repr__(self):
+        return f"Or({self.children!r})"
+
+
+class Not:
+    __slots__ = ("child",)
+
+    def __init__(self, child):
+        self.child = child
+
+    def matches(self, compact):
+        return not self.child.matches(compact)
+
+    def positive_terms(self):
+        # 제외하는 검색어는 하이라이트하지 않음
+        return []
+
+    def __repr__(self):
+        return f"Not({self.child!r})"
+
+
+_OPERATOR = re.compile(r'(?:^|(?<=[\s()"]))(?:AND|OR|NOT)(?=[\s()"]|$)')
+_TOKEN = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"|(AND|OR|NOT)(?=[\s()"]|$)|([^\s()"]+))')
+
+
+def _tokenize(text):
+    tokens = []  # (종류, 값): "(", ")", "op", "term"
+    words = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if not m or m.end() == pos:
+            raise QueryError(f"검색식을 해석할 수 없습니다: {text[pos:]}")
+        pos = m.end()
+        lparen, rparen, phrase, op, word = m.groups()
+        if word is not None:
+            words.append(word)
+            continue
+        if words:
+            tokens.append(("term", " ".join(words)))
+            words = []
+        if lparen:
+            tokens.append(("(", None))
+        elif rparen:
+            tokens.append((")", None))
+        elif op:
+            tokens.append(("op", op))
+        else:
+            if not clean(phrase):
+                raise QueryError("따옴표 안에 검색어가 없습니다.")
+            tokens.append(("term", phrase))
+    if words:
+        tokens.append(("term", " ".join(words)))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def parse_or(self):
+        children = [self.parse_and()]
+        while self.peek() == ("op", "OR"):
+            self.take()
+            children.append(self.parse_and())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def parse_and(self):
+        children = [self.parse_not()]
+        while True:
+            kind, value = self.peek()
+            if (kind, value) in (("op", "AND"), ("op", "NOT")):
+                if value == "AND":
+                    self.take()
+                # "A NOT B"는 "A AND NOT B"
+                children.append(self.parse_not())
+            elif kind in ("term", "("):
+                # 연산자 없이 이어진 구절ㆍ괄호는 AND로 봄
+                children.append(self.parse_not())
+            else:
+                break
+        return children[0] if len(children) == 1 else And(children)
+
+    def parse_not(self):
+        if self.peek() == ("op", "NOT"):
+            self.take()
+            return Not(self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self):
+        kind, value = self.take()
+        if kind == "term":
+            return Term(value)
+        if kind == "(":
+            node = self.parse_or()
+            if self.take()[0] != ")":
+                raise QueryError("괄호가 닫히지 않았습니다.")
+            return node
+        if kind is None:
+            raise QueryError("검색식이 연산자로 끝났습니다.")
+        raise QueryError(f"검색어가 와야 할 자리에 {value or kind}이(가) 있습니다.")
+
+
+def parse_query(text):
+    """검색식을 Term/And/Or/Not 조건으로 변환. 잘못된 식이면 QueryError"""
+    text = text.strip()
+    if not text:
+        raise QueryError("검색어를 입력해주세요.")
+    if '"' not in text and not _OPERATOR.search(text):
+        return Term(text)
+    tokens = _tokenize(text)
+    if not tokens:
+        raise QueryError("검색어를 입력해주세요.")
+    parser = _Parser(tokens)
+    node = parser.parse_or()
+    if parser.pos != len(tokens):
+        raise QueryError(f"검색식을 해석할 수 없습니다: 짝이 맞지 않는 {parser.peek()[1] or parser.peek()[0]}")
+    return node
+
+
+def plan_listing_terms(node, estimate):
+    """법률 목록을 받아 올 검색어 목록. 이 검색어들의 목록을 합치면 조건에 맞을 수 있는 법률이 모두 들어 있다
+
+    AND는 후보 중 estimate(검색어 목록)로 어림한 법률 수가 가장 적은 쪽 하나만, OR는 모든 쪽을 합쳐서 쓴다.
+    estimate는 검색어 목록을 받아 같은 순서의 법률 수 목록을 돌려주는 함수이며, 후보가 둘 이상일 때만 부른다.
+    NOT만으로 된 조건처럼 목록을 정할 수 없으면 QueryError.
+    """
+    options = _plan(node)
+    if options is None:
+        raise QueryError("NOT만으로는 검색할 수 없습니다. 찾을 검색어를 하나 이상 넣어주세요.")
+    counts = {}
+    if _has_choice(options):
+        candidates = sorted(set(_plan_terms(options)))
+        counts = dict(zip(candidates, estimate(candidates)))
+    return _choose(options, counts)
+
+
+# _plan은 목록을 정하는 방법을 트리로 돌려줌: ("term", 검색어) / ("all", [...]) 모두 필요 / ("any", [...]) 하나만 고르면 됨
+
+def _plan(node):
+    if isinstance(node, Term):
+        return ("term", node.text)
+    if isinstance(node, Not):
+        return None
+    children = [_plan(child) for child in node.children]
+    if isinstance(node, Or):
+        if any(child is None for child in children):
+            return None
+        return ("all", children)
+    children = [child for child in children if child is not None]
+    if not children:
+        return None
+    return children[0] if len(children) == 1 else ("any", children)
+
+
+def _plan_terms(plan):
+    kind, value = plan
+    if kind == "term":
+        return [value]
+    return [t for child in value for t in _plan_terms(child)]
+
+
+def _has_choice(plan):
+    kind, value = plan
+    if kind == "term":
+        return False
+    return kind == "any" or any(_has_choice(child) for child in value)
+
+
+def _choose(plan, counts):
+    kind, value = plan
+    if kind == "term":
+        return [value]
+    if kind == "all":
+        terms = []
+        for child in value:
+            for term in _choose(child, counts):
+                if term not in terms:
+                    terms.append(term)
+        return terms
+    choices = [_choose(child, counts) for child in value]
+    # 어림값이 없으면(후보가 하나뿐이면) 첫 번째를 씀
+    return min(choices, key=lambda terms: sum(counts.get(t, 0) for t in terms))
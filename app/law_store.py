@@ -0,0 +1,217 @@
+import array
+import logging
+import os
+import threading
+import xml.etree.ElementTree as ET
+import zipfile
+
+from law_index import map_sections, write_sections
+from law_provisions import Provision, ProvisionTable, parse_provisions
+
+logger = logging.getLogger("law_editor.store")
+
+# 법령 묶음 저장소
+#
+# 법령 XML 묶음(zip 파일이나 디렉터리)을 한 번 읽어, 법률마다 조항 표(parse_provisions의 결과)를 한 파일에 모아 둔다.
+# 처음 쓰는 환경에서 법률마다 lawService.do를 부르고 XML을 파싱하는 대신, 이 파일을 mmap으로 열어 조항 표를 바로 꺼낸다.
+# 읽기 전용으로 열기 때문에 Streamlit 작업 프로세스나 law_cli의 프로세스 풀이 같은 파일을 열어도 복사 없이 페이지 캐시를 함께 쓴다.
+# 법령일련번호(MST)로 찾으므로 개정되어 MST가 바뀐 법률은 저장소에 없는 것으로 보고 이전처럼 API에서 받는다.
+#
+# 파일 구조: law_index와 같은 MAGIC(8) | 헤더 길이(4) | 헤더 JSON | 8바이트 정렬된 구역들
+#   헤더 "laws"     [{"mst", "name", "id", "articles": 조문단위 수, "first": 첫 조항 번호, "count": 조항 수,
+#                     "texts": [texts 안의 시작, 끝 바이트], "compacts": [compacts 안의 시작, 끝 바이트]}]
+#   row_kind        B  조항별 종류 (조ㆍ항ㆍ호ㆍ목)
+#   row_article     I  조항별 조문단위 순번
+#   row_fields      I  조항마다 조번호ㆍ조가지번호ㆍ항번호ㆍ호번호ㆍ목번호의 문자열 번호 5개 (0은 None)
+#   text_starts     Q  조항별 본문 시작 위치 (글자 단위, 개수+1)
+#   texts           B  조항 본문 (UTF-8, 원문 그대로)
+#   compact_starts  Q  조항별 공백을 없앤 본문 시작 위치 (글자 단위, 개수+1)
+#   compacts        B  공백을 없앤 조항 본문 (UTF-8)
+#   string_starts   I  문자열 시작 바이트 (개수+1)
+#   strings         B  번호 문자열 (UTF-8)
+# 본문은 법률마다 한 번에 풀고 글자 위치로 자르며, 공백을 없앤 본문도 저장해 두어 꺼낼 때 다시 만들지 않는다.
+
+MAGIC = b"LAWSTO01"
+
+_FIELDS = ("조번호", "조가지번호", "항번호", "호번호", "목번호")
+
+
+class LawStore:
+    """MST별 조항 표를 담은 읽기 전용 저장소. 법률 하나를 꺼낼 때 그 법률의 구역만 읽음"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.laws = {}  # MST별 헤더의 법률 정보
+        self._sections = None
+        self._strings = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        """저장소 파일이 있으면 mmap으로 열고, 없으면 빈 저장소를 만듦"""
+        store = cls(path)
+        if path and os.path.exists(path):
+            header, store._sections = map_sections(path, MAGIC)
+            store.laws = {law["mst"]: law for law in header["laws"]}
+        return store
+
+    def __len__(self):
+        return len(self.laws)
+
+    def __contains__(self, mst):
+        return str(mst) in self.laws
+
+    def _string_table(self):
+        # 번호 문자열은 종류가 적으므로 처음 쓸 때 한 번에 풀어 둠
+        with self._lock:
+            if self._strings is None:
+                starts, blob = self._sections["string_starts"], self._sections["strings"]
+                self._strings = [None] + [
+                    bytes(blob[starts[i]:starts[i + 1]]).decode("utf-8") for i in range(len(starts) - 1)
+                ]
+            return self._strings
+
+    def provisions(self, mst):
+        """MST의 조항 표. 저장소에 없으면 None"""
+        law = self.laws.get(str(mst))
+        if law is None:
+            return None
+        strings = self._string_table()
+        first, end = law["first"], law["first"] + law["count"]
+        kinds = self._sections["row_kind"][first:end].tolist()
+        articles = self._sections["row_article"][first:end].tolist()
+        fields = [strings[i] for i in self._sections["row_fields"][first * len(_FIELDS):end * len(_FIELDS)]]
+        texts = self._column(law, "texts", "text_starts")
+        compacts = self._column(law, "compacts", "compact_starts")
+        rows = [
+            Provision(kinds[i], articles[i], *fields[i * len(_FIELDS):(i + 1) * len(_FIELDS)], texts[i], compacts[i])
+            for i in range(law["count"])
+        ]
+        return ProvisionTable(rows, law["articles"], law["name"], law["id"])
+
+    def _column(self, law, blob_name, starts_name):
+        # 법률 하나의 본문을 한 번에 풀고 조항별 글자 위치로 자름
+        byte_start, byte_end = law[blob_name]
+        block = bytes(self._sections[blob_name][byte_start:byte_end]).decode("utf-8")
+        starts = self._sections[starts_name][law["first"]:law["first"] + law["count"] + 1].tolist()
+        base = starts[0]
+        return [block[a - base:b - base] for a, b in zip(starts, starts[1:])]
+
+
+def write_store(path, tables):
+    """(MST, 조항 표)들을 저장소 파일로 씀 (임시 파일에 쓴 뒤 교체). 같은 MST가 또 나오면 처음 것만 씀"""
+    laws = []
+    seen = set()
+    string_ids = {}
+    string_starts = array.array("I", [0])
+    strings = bytearray()
+    row_kind = array.array("B")
+    row_article = array.array("I")
+    row_fields = array.array("I")
+    columns = {"texts": (array.array("Q", [0]), bytearray()), "compacts": (array.array("Q", [0]), bytearray())}
+
+    def string_id(value):
+        if value is None:
+            return 0
+        sid = string_ids.get(value)
+        if sid is None:
+            strings.extend(value.encode("utf-8"))
+            string_starts.append(len(strings))
+            sid = string_ids[value] = len(string_ids) + 1
+        return sid
+
+    for mst, table in tables:
+        mst = str(mst)
+        if mst in seen:
+            continue
+        seen.add(mst)
+        law = {"mst": mst, "name": table.name, "id": table.law_id, "articles": table.article_count,
+               "first": len(row_kind), "count": len(table)}
+        for row in table:
+            row_kind.append(row.kind)
+            row_article.append(row.article)
+            row_fields.extend(string_id(getattr(row, name)) for name in _FIELDS)
+        for name, values in (("texts", [row.text for row in table]), ("compacts", [row.compact for row in table])):
+            starts, blob = columns[name]
+            for value in values:
+                starts.append(starts[-1] + len(value))
+            law[name] = [len(blob)]
+            blob.extend("".join(values).encode("utf-8"))
+            law[name].append(len(blob))
+        laws.append(law)
+
+    sections = [
+        ("row_kind", row_kind), ("row_article", row_article), ("row_fields", row_fields),
+        ("text_starts", columns["texts"][0]), ("texts", columns["texts"][1]),
+        ("compact_starts", columns["compacts"][0]), ("compacts", columns["compacts"][1]),
+        ("string_starts", string_starts), ("strings", strings),
+    ]
+    write_sections(path, MAGIC, {"laws": laws}, sections)
+    return len(laws)
+
+
+def iter_archive(source):
+    """zip 파일이나 디렉터리(하위 디렉터리 포함) 안의 .xml 파일을 (파일 이름, 내용)으로 이름 순서대로 돌려줌"""
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for name in sorted(archive.namelist()):
+                if name.lower().endswith(".xml"):
+                    yield name, archive.read(name)
+        return
+    paths = []
+    for directory, _, names in os.walk(source):
+        paths.extend(os.path.join(directory, name) for name in names if name.lower().endswith(".xml"))
+    for path in sorted(paths):
+        with open(path, "rb") as f:
+            yield os.path.relpath(path, source), f.read()
+
+
+def import_archive(source, path):
+    """법령 XML 묶음을 읽어 저장소 파일을 새로 만들고 {"stored", "skipped", "skipped_files"} 요약을 반환
+
+    파일 이름(확장자 제외)이 숫자인 파일만 그 MST의 본문으로 담는다 (lawService.do 응답을 <MST>.xml로 저장한 묶음ㆍ캐시ㆍfixture).
+    법령 XML에는 MST가 없으므로, 다른 이름의 파일을 최신 MST로 담으면 이전 판을 최신으로 잘못 내줄 수 있어 건너뛴다.
+    """
+    skipped = []
+
+    def tables():
+        for name, xml_data in iter_archive(source):
+            stem = os.path.splitext(os.path.basename(name))[0]
+            if not stem.isdigit():
+                logger.warning("저장소 제외 (%s): 파일 이름이 <MST>.xml이 아님", name)
+                skipped.append(name)
+                continue
+            try:
+                table = parse_provisions(xml_data)
+            except ET.ParseError as e:
+                logger.warning("저장소 제외 (%s): XML 파싱 오류 %s", name, e)
+                skipped.append(name)
+                continue
+            if not table.name:
+                logger.warning("저장소 제외 (%s): 법령 본문 XML이 아님", name)
+                skipped.append(name)
+                continue
+            yield stem, table
+
+    stored = write_store(path, tables())
+    return {"stored": stored, "skipped": len(skipped), "skipped_files": skipped}
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import law_processor
+
+    parser = argparse.ArgumentParser(
+        description="법령 XML 묶음(zip 또는 디렉터리)으로 법령 묶음 저장소를 만듭니다. "
+                    "파일 이름이 <MST>.xml인 파일만 담고, 나머지는 건너뛴 파일로 알려 줍니다."
+    )
+    parser.add_argument("source", help="법령 XML zip 파일 또는 디렉터리 (법령 XML 캐시, fixture의 laws 디렉터리 등)")
+    parser.add_argument("store_path", nargs="?", default=law_processor.STORE_PATH,
+                        help="저장소 파일 경로 (기본: LAW_STORE_PATH)")
+    args = parser.parse_args()
+    summary = import_archive(args.source, args.store_path)
+    print(json.dumps(summary, ensure_ascii=False))
@@ -0,0 +1,124 @@
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+
+# 검색ㆍ개정문 생성 요청 하나 동안 단계별(목록 조회, 본문 조회, 파싱, 검색, 조사 규칙, 출력) 소요 시간을 모은다.
+# collect()로 감싼 동안만 기록하며, 감싸지 않으면 span()은 아무것도 하지 않는 객체를 돌려주므로 비용이 거의 없다.
+# 작업 스레드로 넘어가는 일은 contextvars.copy_context()로 현재 기록을 함께 넘긴다 (law_processor.map_in_order).
+
+LOG_LEVEL = os.getenv("LAW_LOG_LEVEL", "WARNING").upper()
+
+logger = logging.getLogger("law_editor")
+logger.setLevel(LOG_LEVEL)
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logger.addHandler(_handler)
+    logger.propagate = False
+
+_current = contextvars.ContextVar("law_trace", default=None)
+
+
+class Trace:
+    """요청 하나의 단계별 소요 시간과 횟수"""
+
+    def __init__(self, name=""):
+        self.name = name
+        self._start = time.perf_counter()
+        self.wall_seconds = None
+        self._lock = threading.Lock()
+        self._spans = {}
+        self._counters = {}
+
+    def add(self, name, seconds):
+        with self._lock:
+            st = self._spans.get(name)
+            if st is None:
+                st = self._spans[name] = {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+            st["count"] += 1
+            st["total_seconds"] += seconds
+            if seconds > st["max_seconds"]:
+                st["max_seconds"] = seconds
+
+    def count(self, name, n=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def finish(self):
+        if self.wall_seconds is None:
+            self.wall_seconds = time.perf_counter() - self._start
+
+    def summary(self):
+        """단계별 횟수ㆍ합계ㆍ최대ㆍ평균(초). 병렬 단계의 합계는 작업자 시간의 합이라 전체 시간보다 클 수 있음"""
+        with self._lock:
+            spans = {
+                name: dict(
+                    st,
+                    total_seconds=round(st["total_seconds"], 6),
+                    max_seconds=round(st["max_seconds"], 6),
+                    avg_seconds=round(st["total_seconds"] / st["count"], 6),
+                )
+                for name, st in self._spans.items()
+            }
+            counters = dict(self._counters)
+        wall = self.wall_seconds if self.wall_seconds is not None else time.perf_counter() - self._start
+        return {"name": self.name, "wall_seconds": round(wall, 6), "spans": spans, "counters": counters}
+
+    def to_json(self):
+        return json.dumps(self.summary(), ensure_ascii=False)
+
+
+class _Span:
+    __slots__ = ("trace", "name", "start")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+_NO_SPAN = contextlib.nullcontext()
+
+
+def span(name):
+    """with span("parse"): ... 처럼 써서 현재 요청의 단계 시간을 기록"""
+    trace = _current.get()
+    if trace is None:
+        return _NO_SPAN
+    return _Span(trace, name)
+
+
+def count(name, n=1):
+    """현재 요청의 횟수 기록 (캐시 적중 등)"""
+    trace = _current.get()
+    if trace is not None:
+        trace.count(name, n)
+
+
+def current():
+    return _current.get()
+
+
+@contextlib.contextmanager
+def collect(name=""):
+    """감싼 동안의 단계별 시간을 모은 Trace를 돌려줌. 끝나면 요약을 DEBUG 로그로 남김"""
+    trace = Trace(name)
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+        trace.finish()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("trace %s", trace.to_json())
@@ -0,0 +1,114 @@
+"""법률 본문 동시 조회가 순차 처리와 같은 결과를 내는지 확인하고 걸린 시간을 비교
+
+    python bench/concurrency.py --synth 60 --latency 0.1 --workers 8
+    python bench/concurrency.py --fixtures /tmp/drf_fixtures --query 행정안전부:행정자치부
+
+지연을 넣은 로컬 법령 API 서버(bench/fake_drf.py)를 띄우고, 시나리오마다 새 프로세스와 빈 XML 캐시로
+run_search_logic과 run_amendment_logic을 작업자 1개(순차 처리)와 --workers개로 한 번씩 실행한다.
+두 결과(법률 순서와 ①② 번호 포함)가 다르면 종료 코드 1. 시나리오별 시간과 속도 향상 배수를 JSON으로 출력한다.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+import fake_drf
+
+DEFAULT_QUERIES = [("지방자치단체", "지방정부"), ("해양수산부장관", "해양수산부차관")]
+
+
+def run_child(kind, find_word, replace_word):
+    sys.path.insert(0, os.path.join(BENCH_DIR, "..", "app"))
+    import law_processor as lp
+
+    start = time.perf_counter()
+    # 디버깅 출력은 결과 JSON과 섞이지 않도록 버림
+    with contextlib.redirect_stdout(io.StringIO()):
+        if kind == "search":
+            result = lp.run_search_logic(find_word, use_index=False)
+        else:
+            result = lp.run_amendment_logic(find_word, replace_word, use_index=False)
+    seconds = time.perf_counter() - start
+    print(json.dumps({"seconds": seconds, "result": result}, ensure_ascii=False))
+
+
+def run(base, cache_dir, workers, kind, find_word, replace_word):
+    # 결과 캐시ㆍ저장소ㆍ색인ㆍ호출 제한기는 끄고 빈 XML 캐시에서 시작
+    env = dict(os.environ, LAW_API_BASE=base, LAW_CACHE_DIR=cache_dir, LAW_MAX_WORKERS=str(workers),
+               LAW_USE_INDEX="0", LAW_RESULT_CACHE_SIZE="0", LAW_RATE_LIMIT="0", LAW_PROCESS_WORKERS="0",
+               LAW_STORE_PATH=os.path.join(cache_dir, "no-store.bin"))
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", kind, find_word, replace_word]
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    if proc.returncode:
+        raise SystemExit(f"{kind} {find_word} (작업자 {workers}) 실패: {proc.stderr.strip()}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def parse_query(text):
+    parts = text.split(":")
+    if len(parts) != 2 or not all(parts):
+        raise argparse.ArgumentTypeError(f"찾을 단어:바꿀 단어 형식이 아닙니다: {text}")
+    return tuple(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--fixtures", help="fixture 디렉터리 (bench/fake_drf.py synth/record로 만듦)")
+    source.add_argument("--synth", type=int, default=60, help="fixture가 없을 때 만들 합성 법령 수")
+    parser.add_argument("--query", type=parse_query, action="append", help="찾을 단어:바꿀 단어 (여러 번 지정 가능)")
+    parser.add_argument("--latency", type=float, default=0.1, help="요청마다 지연(초)")
+    parser.add_argument("--workers", type=int, default=8, help="순차 처리와 비교할 동시 조회 수")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        return
+
+    runs = []
+    mismatches = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture_dir = args.fixtures
+        if not fixture_dir:
+            fixture_dir = os.path.join(tmp, "fixtures")
+            fake_drf.synth_fixtures(fixture_dir, args.synth)
+        server, base = fake_drf.start_server(fake_drf.Fixtures(fixture_dir), latency=args.latency)
+        try:
+            for find_word, replace_word in args.query or DEFAULT_QUERIES:
+                for kind in ("search", "amend"):
+                    results = {
+                        workers: run(base, os.path.join(tmp, f"cache-{len(runs)}-{workers}"), workers,
+                                     kind, find_word, replace_word)
+                        for workers in (1, args.workers)
+                    }
+                    sequential, concurrent = results[1], results[args.workers]
+                    same = sequential["result"] == concurrent["result"]
+                    mismatches += not same
+                    runs.append({
+                        "kind": kind, "query": find_word, "same_output": same,
+                        "results": len(sequential["result"]),
+                        "sequential_seconds": round(sequential["seconds"], 3),
+                        "concurrent_seconds": round(concurrent["seconds"], 3),
+                        "speedup": round(sequential["seconds"] / concurrent["seconds"], 1),
+                    })
+                    print(f"{kind} {find_word}: {runs[-1]['sequential_seconds']}s → "
+                          f"{runs[-1]['concurrent_seconds']}s{'' if same else ' (결과 다름)'}", file=sys.stderr)
+        finally:
+            server.shutdown()
+
+    print(json.dumps({"latency": args.latency, "workers": args.workers, "mismatches": mismatches, "runs": runs},
+                     ensure_ascii=False, indent=2))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""검색ㆍ개정문 생성 전체 과정을 로컬 법령 API 서버(bench/fake_drf.py)로 재는 벤치마크
+
+    python bench/e2e.py --synth 300 --latency 0.05 --error-rate 0.01 --output result.json
+    python bench/e2e.py --fixtures /tmp/drf_fixtures --query 목록:행정안전부:행정자치부
+    python bench/e2e.py --quota-rate 30 --max-concurrent 6 --rate-limit 0    # 호출 한도가 있는 서버, 제한기 끔
+
+시나리오마다 새 프로세스에서 빈 XML 캐시로 run_search_logic 또는 run_amendment_logic에 해당하는
+iter_* 제너레이터를 실행하고, 다음 값을 JSON으로 출력한다.
+  list_seconds         검색 목록(lawSearch.do)을 다 받을 때까지의 시간
+  first_result_seconds 첫 결과가 나올 때까지의 시간
+  total_seconds        전체 시간, laws_per_second 초당 처리 법률 수
+  peak_rss_kb          프로세스 최대 메모리, api 는 DrfClient.stats() (엔드포인트별 호출ㆍ오류ㆍ재시도ㆍ지연)
+  fetch_failures       재시도 후에도 본문을 받지 못해 빠진 법률 수, rate_limit 은 끝났을 때의 호출 제한기 상태
+  trace                law_trace 단계별(list, fetch, parse, scan, format, render) 소요 시간
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+import fake_drf
+
+# (이름, 종류, 찾을 단어, 바꿀 단어): 합성 fixture 기준으로 드문 단어, 거의 모든 법률에 나오는 단어, 목에만 나오는 단어
+DEFAULT_SCENARIOS = [
+    ("rare", "search", "해양수산부장관", None),
+    ("rare", "amend", "해양수산부장관", "해양수산부차관"),
+    ("broad", "search", "지방자치단체", None),
+    ("broad", "amend", "지방자치단체", "지방정부"),
+    ("mok", "search", "전자문서교환", None),
+    ("mok", "amend", "전자문서교환", "전자문서연계"),
+]
+
+
+def run_child(kind, find_word, replace_word, workers):
+    sys.path.insert(0, os.path.join(BENCH_DIR, "..", "app"))
+    import law_processor as lp
+
+    if kind == "search":
+        events = lp.iter_search_logic(find_word, max_workers=workers, use_index=False)
+    else:
+        events = lp.iter_amendment_logic(find_word, replace_word, max_workers=workers, use_index=False)
+    start = time.perf_counter()
+    list_seconds = first_result = None
+    laws = results = failed = 0
+    # 디버깅 출력은 결과 JSON과 섞이지 않도록 버림
+    with contextlib.redirect_stdout(io.StringIO()), lp.collect_trace(kind) as trace:
+        for event in events:
+            if event["type"] == "progress":
+                if list_seconds is None:
+                    list_seconds = time.perf_counter() - start
+                laws, failed = event["total"], event["failed"]
+            else:
+                results += 1
+                if first_result is None:
+                    first_result = time.perf_counter() - start
+    total = time.perf_counter() - start
+    print(json.dumps({
+        "laws": laws,
+        "results": results,
+        "list_seconds": round(list_seconds or 0.0, 4),
+        "first_result_seconds": round(first_result, 4) if first_result is not None else None,
+        "total_seconds": round(total, 4),
+        "laws_per_second": round(laws / total, 1) if total else None,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "api": lp.drf_client.stats(),
+        "fetch_failures": failed,
+        "rate_limit": lp.drf_client.limiter_stats(),
+        "trace": trace.summary(),
+    }, ensure_ascii=False))
+
+
+def parse_query(text):
+    """"이름:찾을 단어[:바꿀 단어]" → 검색 시나리오와 (바꿀 단어가 있으면) 개정문 시나리오"""
+    parts = text.split(":")
+    if len(parts) not in (2, 3) or not all(parts):
+        raise argparse.ArgumentTypeError(f"이름:찾을 단어[:바꿀 단어] 형식이 아닙니다: {text}")
+    scenarios = [(parts[0], "search", parts[1], None)]
+    if len(parts) == 3:
+        scenarios.append((parts[0], "amend", parts[1], parts[2]))
+    return scenarios
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--fixtures", help="fixture 디렉터리 (bench/fake_drf.py synth/record로 만듦)")
+    source.add_argument("--synth", type=int, default=300, help="fixture가 없을 때 만들 합성 법령 수")
+    parser.add_argument("--query", type=parse_query, action="append", help="이름:찾을 단어[:바꿀 단어] (여러 번 지정 가능)")
+    parser.add_argument("--latency", type=float, default=0.02, help="요청마다 기본 지연(초)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="기본 지연에 더할 무작위 지연의 최댓값(초)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503으로 응답할 비율 (0~1)")
+    parser.add_argument("--quota-rate", type=float, default=0.0, help="서버의 초당 호출 한도. 넘으면 429 (0이면 제한 없음)")
+    parser.add_argument("--max-concurrent", type=int, default=0, help="서버의 동시 처리 한도. 넘으면 503 (0이면 제한 없음)")
+    parser.add_argument("--rate-limit", type=float, help="앱의 처음 초당 호출 수, 0이면 제한기 끔 (기본: LAW_RATE_LIMIT)")
+    parser.add_argument("--workers", type=int, help="법률 본문 동시 조회 수 (기본: LAW_MAX_WORKERS)")
+    parser.add_argument("--repeat", type=int, default=1, help="시나리오별 반복 횟수")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="결과 JSON을 저장할 파일 (기본: 표준 출력)")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        kind, find_word, replace_word = args.child
+        run_child(kind, find_word, replace_word, args.workers)
+        return
+
+    scenarios = [s for group in args.query for s in group] if args.query else DEFAULT_SCENARIOS
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture_dir = args.fixtures
+        if not fixture_dir:
+            fixture_dir = os.path.join(tmp, "fixtures")
+            fake_drf.synth_fixtures(fixture_dir, args.synth)
+        fixtures = fake_drf.Fixtures(fixture_dir)
+        server, base = fake_drf.start_server(fixtures, latency=args.latency, jitter=args.jitter,
+                                             error_rate=args.error_rate, seed=args.seed,
+                                             quota_rate=args.quota_rate, max_concurrent=args.max_concurrent)
+        runs = []
+        try:
+            for name, kind, find_word, replace_word in scenarios:
+                for n in range(args.repeat):
+                    # 매번 빈 캐시에서 시작하고 로컬 색인은 쓰지 않음
+                    env = dict(os.environ, LAW_API_BASE=base, LAW_USE_INDEX="0",
+                               LAW_CACHE_DIR=os.path.join(tmp, f"cache-{len(runs)}"))
+                    if args.workers:
+                        env["LAW_MAX_WORKERS"] = str(args.workers)
+                    if args.rate_limit is not None:
+                        env["LAW_RATE_LIMIT"] = str(args.rate_limit)
+                    cmd = [sys.executable, os.path.abspath(__file__), "--child", kind, find_word, replace_word or ""]
+                    proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+                    entry = {"name": name, "kind": kind, "query": find_word, "run": n + 1}
+                    if proc.returncode:
+                        entry["error"] = proc.stderr.strip().splitlines()[-1:] or [f"종료 코드 {proc.returncode}"]
+                    else:
+                        entry.update(json.loads(proc.stdout.strip().splitlines()[-1]))
+                    runs.append(entry)
+                    print(f"{name}/{kind} #{n + 1}: {entry.get('total_seconds', entry.get('error'))}", file=sys.stderr)
+        finally:
+            server.shutdown()
+
+    report = {
+        "config": {
+            "laws": len(fixtures.catalog), "latency": args.latency, "jitter": args.jitter,
+            "error_rate": args.error_rate, "workers": args.workers, "repeat": args.repeat,
+            "quota_rate": args.quota_rate, "max_concurrent": args.max_concurrent, "rate_limit": args.rate_limit,
+            "fixtures": args.fixtures or f"synth:{args.synth}",
+        },
+        "server_counts": server.RequestHandlerClass.counts,
+        "runs": runs,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
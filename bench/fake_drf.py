@@ -0,0 +1,307 @@
+"""법령 API(lawSearch.do, lawService.do)를 흉내 내는 로컬 서버와 그 서버가 쓰는 고정 데이터(fixture)
+
+    python bench/fake_drf.py synth /tmp/drf_fixtures --laws 300      # 합성 법령으로 fixture 만들기
+    OC=... python bench/fake_drf.py record /tmp/drf_fixtures 행정안전부 장관   # 실제 API 응답을 녹화
+    python bench/fake_drf.py serve /tmp/drf_fixtures --port 8765 --latency 0.05 --error-rate 0.02
+    python bench/fake_drf.py serve /tmp/drf_fixtures --quota-rate 20 --max-concurrent 6   # 호출 한도 흉내
+
+fixture 디렉터리 구조
+  catalog.json        [{"mst", "name", "id"}, ...] (목록 순서 = 검색 결과 순서)
+  laws/<MST>.xml      lawService.do 응답 (법령 XML)
+  searches/<검색어>.json  (검색어는 URL 인코딩) 녹화한 검색 결과의 MST 목록. 없는 검색어는 본문에 검색어가 들어 있는 법령으로 대신함
+
+앱은 LAW_API_BASE 환경 변수를 이 서버 주소(예: http://127.0.0.1:8765)로 주면 이 서버를 쓴다.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlparse
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+
+class Fixtures:
+    """fixture 디렉터리를 메모리에 읽어 둔 것"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "catalog.json"), encoding="utf-8") as f:
+            self.catalog = json.load(f)
+        self.by_mst = {law["mst"]: law for law in self.catalog}
+        self.texts = {}
+        for law in self.catalog:
+            with open(os.path.join(directory, "laws", f"{law['mst']}.xml"), "rb") as f:
+                self.texts[law["mst"]] = f.read()
+        self.searches = {}
+        search_dir = os.path.join(directory, "searches")
+        if os.path.isdir(search_dir):
+            for name in os.listdir(search_dir):
+                if name.endswith(".json"):
+                    with open(os.path.join(search_dir, name), encoding="utf-8") as f:
+                        self.searches[unquote(name[:-5])] = json.load(f)
+
+    def search(self, query):
+        """검색어에 맞는 법령 목록 (녹화한 결과가 있으면 그 순서, 없으면 본문 포함 여부)"""
+        if query in self.searches:
+            return [self.by_mst[mst] for mst in self.searches[query] if mst in self.by_mst]
+        needle = query.encode("utf-8")
+        return [law for law in self.catalog if needle in self.texts[law["mst"]]]
+
+
+def make_handler(fixtures, latency=0.0, jitter=0.0, error_rate=0.0, seed=None,
+                 quota_rate=0.0, quota_burst=None, max_concurrent=0, retry_after=1):
+    """요청마다 latency(+0~jitter)초 기다리고, error_rate 비율로 503을 돌려주는 요청 처리기
+
+    OC 키의 호출 한도를 흉내 낼 수 있다. quota_rate(초당 호출 수, 버킷 크기 quota_burst)를 넘으면
+    Retry-After와 함께 429를, 동시에 처리 중인 요청이 max_concurrent를 넘으면 503을 돌려준다 (0이면 제한 없음).
+    """
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+    counts = {"lawSearch.do": 0, "lawService.do": 0, "errors": 0, "throttled": 0, "overloaded": 0}
+    burst = quota_burst or max(1.0, quota_rate)
+    quota = {"tokens": burst, "at": time.monotonic(), "in_flight": 0}
+
+    def admit():
+        # 한도 안이면 None, 넘으면 돌려줄 상태 코드
+        now = time.monotonic()
+        quota["tokens"] = min(burst, quota["tokens"] + (now - quota["at"]) * quota_rate)
+        quota["at"] = now
+        if max_concurrent and quota["in_flight"] >= max_concurrent:
+            counts["overloaded"] += 1
+            return 503
+        if quota_rate:
+            if quota["tokens"] < 1:
+                counts["throttled"] += 1
+                return 429
+            quota["tokens"] -= 1
+        quota["in_flight"] += 1
+        return None
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body, content_type="application/xml; charset=utf-8", headers=()):
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            endpoint = url.path.rsplit("/", 1)[-1]
+            if endpoint == "counts":
+                self._send(200, json.dumps(counts).encode("utf-8"), "application/json")
+                return
+            if endpoint not in ("lawSearch.do", "lawService.do"):
+                self._send(404, b"")
+                return
+            with rng_lock:
+                delay = latency + rng.uniform(0, jitter)
+                fail = rng.random() < error_rate
+                counts[endpoint] += 1
+                counts["errors"] += fail
+                rejected = admit()
+            if rejected == 429:
+                self._send(429, "요청 한도를 초과했습니다.".encode("utf-8"), "text/plain; charset=utf-8",
+                           [("Retry-After", str(retry_after))])
+                return
+            if rejected:
+                self._send(503, b"Service Unavailable", "text/plain")
+                return
+            try:
+                self._respond(endpoint, params, delay, fail)
+            finally:
+                with rng_lock:
+                    quota["in_flight"] -= 1
+
+        def _respond(self, endpoint, params, delay, fail):
+            if delay:
+                time.sleep(delay)
+            if fail:
+                self._send(503, b"Service Unavailable", "text/plain")
+            elif endpoint == "lawSearch.do":
+                self._send(200, self._search_body(params))
+            else:
+                mst = params.get("MST", [""])[0]
+                # 실제 API처럼 없는 MST에도 200으로 법령이 아닌 XML을 돌려줌
+                self._send(200, fixtures.texts.get(mst, "<Law>일치하는 법령이 없습니다.</Law>".encode("utf-8")))
+
+        def _search_body(self, params):
+            query = params.get("query", [""])[0].strip('"')
+            display = int(params.get("display", ["20"])[0])
+            page = int(params.get("page", ["1"])[0])
+            hits = fixtures.search(query)
+            parts = [f"<LawSearch><target>law</target><키워드>{escape(query)}</키워드>"
+                     f"<totalCnt>{len(hits)}</totalCnt><page>{page}</page>"]
+            for n, law in enumerate(hits[(page - 1) * display:page * display], (page - 1) * display + 1):
+                parts.append(
+                    f'<law id="{n}"><법령일련번호>{law["mst"]}</법령일련번호>'
+                    f'<법령명한글>{escape(law["name"])}</법령명한글><법령ID>{law["id"]}</법령ID></law>'
+                )
+            parts.append("</LawSearch>")
+            return "".join(parts).encode("utf-8")
+
+    Handler.counts = counts
+    return Handler
+
+
+def start_server(fixtures, port=0, **options):
+    """백그라운드 스레드에서 서버를 띄우고 (서버, 기본 주소)를 반환. 끝낼 때는 server.shutdown()"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(fixtures, **options))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# 합성 법령: 드문 단어, 수백 개 법령에 나오는 단어, 목에만 나오는 단어를 골고루 섞는다
+COMMON_WORDS = ["지방자치단체", "대통령령", "공무원", "위원회"]
+RARE_WORDS = ["해양수산부장관"]
+MOK_WORDS = ["전자문서교환"]
+OTHER_WORDS = ["행정안전부장관", "행정안전부", "시ㆍ도지사", "국가", "장관", "법원", "시장", "관리자", "기금", "보조금"]
+JOSA = ["", "을", "를", "과", "와", "이", "가", "이나", "나", "으로", "로", "은", "는", "란", "이란",
+        "의", "에", "에서", "등", "에게", "만"]
+FILLERS = ["다음", "각", "호의", "어느", "하나에", "해당하는", "경우에는", "그", "사항을", "정한다",
+           "필요한", "조치를", "하여야", "한다"]
+CIRCLED = "①②③④⑤⑥⑦⑧⑨⑩"
+MOK_LETTERS = "가나다라마바사"
+
+
+def _sentence(rng, words, n=8):
+    out = []
+    for _ in range(n):
+        if rng.random() < 0.3:
+            out.append(rng.choice(words) + rng.choice(JOSA))
+        else:
+            out.append(rng.choice(FILLERS))
+    return " ".join(out) + "."
+
+
+def synth_law_xml(rng, name, law_id, rare=False, mok_word=False):
+    words = COMMON_WORDS + OTHER_WORDS + (RARE_WORDS if rare else [])
+    mok_words = words + (MOK_WORDS if mok_word else [])
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>', "<법령>",
+             f"<기본정보><법령ID>{law_id}</법령ID><법령명_한글>{escape(name)}</법령명_한글></기본정보>", "<조문>"]
+    for no in range(1, rng.randint(5, 40)):
+        parts.append(f'<조문단위 조문키="{no:04d}000"><조문번호>{no}</조문번호><조문여부>조문</조문여부>')
+        parts.append(f"<조문내용>{escape(f'제{no}조(목적) ' + _sentence(rng, words))}</조문내용>")
+        count = rng.choice([0, 1, 2, 3, 4])
+        for h in range(count):
+            parts.append("<항>")
+            if count > 1:
+                parts.append(f"<항번호>{CIRCLED[h]}</항번호>")
+            parts.append(f"<항내용>{escape((CIRCLED[h] + ' ' if count > 1 else '') + _sentence(rng, words))}</항내용>")
+            for ho in range(1, rng.choice([0, 0, 2, 5]) + 1):
+                parts.append(f"<호><호번호>{ho}.</호번호><호내용>{escape(f'{ho}. ' + _sentence(rng, words, 5))}</호내용>")
+                for m in range(rng.choice([0, 0, 1, 3])):
+                    text = f"{MOK_LETTERS[m]}. {_sentence(rng, mok_words, 4)}\n      {_sentence(rng, mok_words, 3)}"
+                    parts.append(f"<목><목번호>{MOK_LETTERS[m]}.</목번호><목내용><![CDATA[{text}]]></목내용></목>")
+                parts.append("</호>")
+            parts.append("</항>")
+        parts.append("</조문단위>")
+    parts.append("</조문>")
+    parts.append(f"<부칙><부칙단위><부칙내용>{escape('부 칙 ' + _sentence(rng, words, 40))}</부칙내용></부칙단위></부칙>")
+    parts.append("</법령>")
+    return "\n".join(parts)
+
+
+def synth_fixtures(directory, laws=300, seed=7):
+    """합성 법령 laws개로 fixture 디렉터리를 만듦"""
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(directory, "laws"), exist_ok=True)
+    catalog = []
+    for i in range(laws):
+        law = {"mst": str(200000 + i), "name": f"합성시험법{i:04d}", "id": str(9000 + i)}
+        xml = synth_law_xml(rng, law["name"], law["id"], rare=i % 97 == 13, mok_word=i % 11 == 5)
+        with open(os.path.join(directory, "laws", f"{law['mst']}.xml"), "w", encoding="utf-8") as f:
+            f.write(xml)
+        catalog.append(law)
+    with open(os.path.join(directory, "catalog.json"), "w", encoding="utf-8") as f:
+        json.dump(catalog, f, ensure_ascii=False)
+    return catalog
+
+
+def record_fixtures(directory, queries):
+    """실제 API(OC, LAW_API_BASE 환경 변수)에서 검색 결과와 법령 XML을 받아 fixture로 저장"""
+    import law_processor as lp
+
+    os.makedirs(os.path.join(directory, "laws"), exist_ok=True)
+    os.makedirs(os.path.join(directory, "searches"), exist_ok=True)
+    catalog_path = os.path.join(directory, "catalog.json")
+    catalog = []
+    if os.path.exists(catalog_path):
+        with open(catalog_path, encoding="utf-8") as f:
+            catalog = json.load(f)
+    known = {law["mst"] for law in catalog}
+    for query in queries:
+        laws = lp.get_law_list_from_api(query)
+        with open(os.path.join(directory, "searches", f"{quote(query, safe='')}.json"), "w", encoding="utf-8") as f:
+            json.dump([law["MST"] for law in laws], f)
+        for law in laws:
+            if law["MST"] in known:
+                continue
+            xml = lp.get_law_text_by_mst(law["MST"])
+            if not lp.is_law_xml(xml):
+                print(f"제외 ({law['법령명']}, MST {law['MST']}): 법령 XML이 아님", file=sys.stderr)
+                continue
+            with open(os.path.join(directory, "laws", f"{law['MST']}.xml"), "wb") as f:
+                f.write(xml)
+            catalog.append({"mst": law["MST"], "name": law["법령명"], "id": lp.parse_provisions(xml).law_id})
+            known.add(law["MST"])
+    with open(catalog_path, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, ensure_ascii=False)
+    return catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="fixture를 제공하는 서버 실행")
+    serve.add_argument("directory")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--latency", type=float, default=0.0, help="요청마다 기본 지연(초)")
+    serve.add_argument("--jitter", type=float, default=0.0, help="기본 지연에 더할 무작위 지연의 최댓값(초)")
+    serve.add_argument("--error-rate", type=float, default=0.0, help="503으로 응답할 비율 (0~1)")
+    serve.add_argument("--seed", type=int)
+    serve.add_argument("--quota-rate", type=float, default=0.0, help="초당 호출 한도. 넘으면 429 (0이면 제한 없음)")
+    serve.add_argument("--quota-burst", type=float, help="한꺼번에 허용할 호출 수 (기본: 초당 호출 한도)")
+    serve.add_argument("--max-concurrent", type=int, default=0, help="동시 처리 한도. 넘으면 503 (0이면 제한 없음)")
+    synth = sub.add_parser("synth", help="합성 법령으로 fixture 만들기")
+    synth.add_argument("directory")
+    synth.add_argument("--laws", type=int, default=300)
+    synth.add_argument("--seed", type=int, default=7)
+    record = sub.add_parser("record", help="실제 API 응답을 fixture로 녹화")
+    record.add_argument("directory")
+    record.add_argument("queries", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "synth":
+        print(f"{len(synth_fixtures(args.directory, args.laws, args.seed))}개 법령 생성: {args.directory}")
+    elif args.command == "record":
+        print(f"{len(record_fixtures(args.directory, args.queries))}개 법령 저장: {args.directory}")
+    else:
+        fixtures = Fixtures(args.directory)
+        server, base = start_server(fixtures, args.port, latency=args.latency, jitter=args.jitter,
+                                    error_rate=args.error_rate, seed=args.seed, quota_rate=args.quota_rate,
+                                    quota_burst=args.quota_burst, max_concurrent=args.max_concurrent)
+        print(f"{len(fixtures.catalog)}개 법령 제공 중: {base}  (Ctrl+C로 종료)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
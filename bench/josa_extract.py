@@ -0,0 +1,115 @@
+"""개정문 생성의 덩어리ㆍ조사 추출을 이전 함수와 비교하는 마이크로 벤치마크
+
+    python bench/josa_extract.py ~/.cache/law_xml --word 행정안전부 --word 장관
+
+법령 XML이 있으면 본문에서 찾을 단어가 들어 있는 토큰을 모으고, 없으면 접미사ㆍ조사를 조합한 토큰을 만든다.
+모든 토큰에 대해 ChunkExtractor와 extract_chunk_and_josa의 결과가 같은지 먼저 확인한 뒤
+(다르면 종료 코드 1), 같은 토큰 목록을 몇 번 반복해 처리하는 시간을 재서 JSON으로 출력한다.
+  reference : josa_reference.extract_chunk_and_josa (호출마다 목록을 만들고 정렬함)
+  cold      : 새 ChunkExtractor (캐시가 빈 상태)
+  warm      : 같은 ChunkExtractor를 다시 사용 (토큰 대부분이 캐시에 있음)
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import law_processor as lp
+from josa_reference import extract_chunk_and_josa
+from law_provisions import parse_provisions
+
+DEFAULT_WORDS = ["행정안전부", "장관", "법원", "기금", "지방자치단체"]
+FILLERS = ["", "소속", "중앙", "관계", "가", "나"]
+
+
+def xml_tokens(paths, words, limit):
+    tokens = {word: [] for word in words}
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".xml"))
+        else:
+            files.append(path)
+    for path in files[:limit]:
+        with open(path, "rb") as f:
+            table = parse_provisions(f.read())
+        for row in table:
+            for token in lp.TOKEN_PATTERN.findall(row.text):
+                for word in words:
+                    if word in token:
+                        tokens[word].append(token)
+    return tokens
+
+
+def synthetic_tokens(words):
+    tails = [""] + lp.JOSA_LIST + lp.SUFFIX_EXCLUDE + FILLERS[1:]
+    tokens = {}
+    for word in words:
+        tokens[word] = [
+            head + word + tail + extra
+            for head in FILLERS for tail in tails for extra in [""] + lp.SUFFIX_EXCLUDE
+        ]
+    return tokens
+
+
+def timed(func, tokens, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for token in tokens:
+            func(token)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="법령 XML 파일 또는 <MST>.xml 파일이 있는 디렉터리 (없으면 합성 토큰)")
+    parser.add_argument("--word", action="append", help="찾을 단어 (여러 번 지정 가능)")
+    parser.add_argument("--files", type=int, default=200, help="읽을 XML 파일 수 상한")
+    parser.add_argument("--rounds", type=int, default=5, help="토큰 목록을 반복 처리할 횟수")
+    args = parser.parse_args()
+
+    words = args.word or DEFAULT_WORDS
+    tokens = xml_tokens(args.paths, words, args.files) if args.paths else synthetic_tokens(words)
+
+    results = []
+    mismatches = 0
+    for word, word_tokens in tokens.items():
+        if not word_tokens:
+            continue
+        extractor = lp.ChunkExtractor(word)
+        # 정답 확인: 고유 토큰마다 두 함수의 결과가 같아야 함
+        with contextlib.redirect_stdout(io.StringIO()):
+            for token in set(word_tokens):
+                expected = extract_chunk_and_josa(token, word)
+                actual = extractor.extract(token)
+                if actual != expected:
+                    mismatches += 1
+                    print(f"불일치 {word!r} {token!r}: {actual} != {expected}", file=sys.stderr)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            reference = timed(lambda t: extract_chunk_and_josa(t, word), word_tokens, args.rounds)
+        cold_extractor = lp.ChunkExtractor(word)
+        cold = timed(cold_extractor.extract, word_tokens, 1)
+        warm = timed(cold_extractor.extract, word_tokens, args.rounds)
+        calls = len(word_tokens) * args.rounds
+        results.append({
+            "word": word,
+            "tokens": len(word_tokens),
+            "unique_tokens": len(set(word_tokens)),
+            "reference_us": round(reference / calls * 1e6, 3),
+            "cold_us": round(cold / len(word_tokens) * 1e6, 3),
+            "warm_us": round(warm / calls * 1e6, 3),
+            "speedup_warm": round(reference / warm, 1) if warm else None,
+        })
+
+    print(json.dumps({"mismatches": mismatches, "results": results}, ensure_ascii=False, indent=2))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""개정문 생성의 이전 구현. 벤치마크에서 새 구현과 결과를 비교하고 속도를 재는 기준으로만 쓴다
+
+  extract_chunk_and_josa : law_processor.ChunkExtractor 이전의 덩어리ㆍ조사 추출 (호출마다 목록을 만들고 정렬함)
+  apply_josa_rule        : law_processor.JOSA_RULES 표 이전의 조사별 if 문 개정문 형식
+"""
+
+
+def extract_chunk_and_josa(token, searchword):
+    """검색어를 포함하는 덩어리와 조사를 추출"""
+    # 제외할 접미사 리스트 (덩어리에 포함시키지 않을 것들)
+    suffix_exclude = ["의", "에", "에서", "으로서", "등", "등인", "에게", "만", "만을", "만이", "만은", "만에", "만으로"]
+
+    # 처리할 조사 리스트
+    josa_list = ["을", "를", "과", "와", "이", "가", "이나", "나", "으로", "로", "은", "는", "란", "이란", "라", "이라"]
+
+    # 원본 토큰 저장
+    original_token = token
+    suffix = None
+
+    # 검색어 자체가 토큰인 경우 바로 반환
+    if token == searchword:
+        return token, None, None
+
+    # 토큰에 검색어가 포함되어 있지 않으면 바로 반환
+    if searchword not in token:
+        return token, None, None
+
+    # 1. 접미사 제거 시도 (단, 이 접미사들은 덩어리에 포함시키지 않음)
+    for s in sorted(suffix_exclude, key=len, reverse=True):
+        if token.endswith(s) and len(token) > len(s):
+            # 검색어와 접미사가 분리되어 있는지 확인
+            if searchword + s == token:
+                # 이 경우 검색어 자체를 반환하고 접미사는 별도로 처리
+                return searchword, None, s
+            elif token.endswith(searchword + s):
+                # 뒤쪽에 접미사가 붙은 경우 (예: "검색어의")
+                prefix = token[:-len(searchword + s)]
+                # 접두어가 있는 경우 전체 토큰 반환
+                if prefix:
+                    return token, None, None
+                # 접두어가 없는 경우 검색어만 반환
+                else:
+                    return searchword, None, s
+            suffix = s
+            token = token[:-len(s)]
+            break
+
+    # 2. 조사 확인
+    josa = None
+    chunk = token
+
+    # 토큰이 "검색어 + 조사"로 정확히 구성된 경우
+    for j in sorted(josa_list, key=len, reverse=True):
+        if token == searchword + j:
+            return searchword, j, suffix
+
+    # 3. 토큰 내의 위치 찾기
+    start_pos = token.find(searchword)
+    if start_pos != -1:
+        end_pos = start_pos + len(searchword)
+
+        # 검색어가 토큰의 끝에 있는 경우
+        if end_pos == len(token):
+            if start_pos == 0:  # 토큰이 정확히 검색어인 경우
+                return searchword, None, suffix
+            else:  # 검색어 앞에 다른 내용이 있는 경우
+                return token, None, suffix
+
+        # 검색어 뒤에 조사가 있는지 확인
+        for j in sorted(josa_list, key=len, reverse=True):
+            if token[end_pos:].startswith(j):
+                # 검색어 + 조사 앞에 다른 내용이 있는 경우
+                if start_pos > 0:
+                    return token, None, suffix
+                # 검색어 + 조사 뒤에 다른 내용이 있는 경우
+                elif end_pos + len(j) < len(token):
+                    return token, None, suffix
+                # 정확히 "검색어 + 조사"인 경우
+                else:
+                    return searchword, j, suffix
+
+    # 4. 토큰이 검색어를 포함하지만 조건에 맞지 않는 경우 토큰 전체 반환
+    return token, None, suffix
+
+
+def has_batchim(word):
+    """단어의 마지막 글자에 받침이 있는지 확인"""
+    if not word:
+        return False
+    code = ord(word[-1]) - 0xAC00
+    return (code % 28) != 0
+
+
+def has_rieul_batchim(word):
+    """단어의 마지막 글자의 받침이 ㄹ인지 확인"""
+    if not word:
+        return False
+    code = ord(word[-1]) - 0xAC00
+    return (code % 28) == 8  # ㄹ받침 코드는 8
+
+
+def apply_josa_rule(orig, replaced, josa):
+    """개정문 조사 규칙에 따라 적절한 형식 반환"""
+    # 동일한 단어면 변경할 필요 없음
+    if orig == replaced:
+        return f'"{orig}"를 "{replaced}"로 한다.'
+
+    orig_has_batchim = has_batchim(orig)
+    replaced_has_batchim = has_batchim(replaced)
+    replaced_has_rieul = has_rieul_batchim(replaced)
+
+    # 조사가 없는 경우 (규칙 0)
+    if josa is None:
+        if not orig_has_batchim:  # 규칙 0-1: A가 받침 없는 경우
+            if not replaced_has_batchim or replaced_has_rieul:  # 규칙 0-1-1, 0-1-2-1
+                return f'"{orig}"를 "{replaced}"로 한다.'
+            else:  # 규칙 0-1-2-2: B의 받침이 ㄹ이 아닌 경우
+                return f'"{orig}"를 "{replaced}"으로 한다.'
+        else:  # 규칙 0-2: A가 받침 있는 경우
+            if not replaced_has_batchim or replaced_has_rieul:  # 규칙 0-2-1, 0-2-2-1
+                return f'"{orig}"을 "{replaced}"로 한다.'
+            else:  # 규칙 0-2-2-2: B의 받침이 ㄹ이 아닌 경우
+                return f'"{orig}"을 "{replaced}"으로 한다.'
+
+    # 조사별 규칙 처리
+    if josa == "을":  # 규칙 1
+        if replaced_has_batchim:
+            if replaced_has_rieul:  # 규칙 1-1-1
+                return f'"{orig}"을 "{replaced}"로 한다.'
+            else:  # 규칙 1-1-2
+                return f'"{orig}"을 "{replaced}"으로 한다.'
+        else:  # 규칙 1-2
+            return f'"{orig}을"을 "{replaced}를"로 한다.'
+
+    elif josa == "를":  # 규칙 2
+        if replaced_has_batchim:  # 규칙 2-1
+            return f'"{orig}를"을 "{replaced}을"로 한다.'
+        else:  # 규칙 2-2
+            return f'"{orig}"를 "{replaced}"로 한다.'
+
+    elif josa == "과":  # 규칙 3
+        if replaced_has_batchim:
+            if replaced_has_rieul:  # 규칙 3-1-1
+                return f'"{orig}"을 "{replaced}"로 한다.'
+            else:  # 규칙 3-1-2
+                return f'"{orig}"을 "{replaced}"으로 한다.'
+        else:  # 규칙 3-2
+            return f'"{orig}과"를 "{replaced}와"로 한다.'
+
+    elif josa == "와":  # 규칙 4
+        if replaced_has_batchim:  # 규칙 4-1
+            return f'"{orig}와"를 "{replaced}과"로 한다.'
+        else:  # 규칙 4-2
+            return f'"{orig}"를 "{replaced}"로 한다.'
+
+    elif josa == "이":  # 규칙 5
+        if replaced_has_batchim:
+            if replaced_has_rieul:  # 규칙 5-1-1
+                return f'"{orig}"을 "{replaced}"로 한다.'
+            else:  # 규칙 5-1-2
+                return f'"{orig}"을 "{replaced}"으로 한다.'
+        else:  # 규칙 5-2
+            return f'"{orig}이"를 "{replaced}가"로 한다.'
+
+    elif josa == "가":  # 규칙 6
+        if replaced_has_batchim:  # 규칙 6-1
+            return f'"{orig}가"를 "{replaced}이"로 한다.'
+        else:  # 규칙 6-2
+            return f'"{orig}"를 "{replaced}"로 한다.'
+
+    elif josa == "이나":  # 규칙 7
+        if replaced_has_batchim:
+            if replaced_has_rieul:  # 규칙 7-1-1
+                return f'"{orig}"을 "{replaced}"로 한다.'
+            else:  # 규칙 7-1-2
+                return f'"{orig}"을 "{replaced}"으로 한다.'
+        else:  # 규칙 7-2
+            return f'"{orig}이나"를 "{replaced}나"로 한다.'
+
+    elif josa == "나":  # 규칙 8
+        if replaced_has_batchim:  # 규칙 8-1
+            return f'"{orig}나"를 "{replaced}이나"로 한다.'
+        else:  # 규칙 8-2
+            return f'"{orig}"를 "{replaced}"로 한다.'
+
+    elif josa == "으로":  # 규칙 9
+        if replaced_has_batchim:
+            if replaced_has_rieul:  # 규칙 9-1-1
+                return f'"{orig}으로"를 "{replaced}로"로 한다.'
+            else:  # 규칙 9-1-2
+                return f'"{orig}"을 "{replaced}"으로 한다.'
+        else:  # 규칙 9-2
+            return f'"{orig}으로"를 "{replaced}로"로 한다.'
+
+    elif josa == "로":  # 규칙 10
+        if orig_has_batchim:  # 규칙 10-1: A에 받침이 있는 경우
+            if replaced_has_batchim:
+                if replaced_has_rieul:  # 규칙 10-1-1-1
+                    return f'"{orig}"을 "{replaced}"로 한다.'
+                else:  # 규칙 10-1-1-2
+                    return f'"{orig}로"를 "{replaced}으로"로 한다.'
+            else:  # 규칙 10-1-2
+                return f'"{orig}"을 "{replaced}"로 한다.'
+        else:  # 규칙 10-2: A에 받침이 없는 경우
+            if replaced_has_batchim:
+                if replaced_has_rieul:  # 규칙 10-2-1-1
+                    return f'"{orig}"를 "{replaced}"로 한다.'
+                else:  # 규칙 10-2-1-2
+                    return f'"{orig}로"를 "{replaced}으로"로 한다.'
+            else:  # 규칙 10-2-2
+                return f'"{orig}"를 "{replaced}"로 한다.'
+
+    elif josa == "는":  # 규칙 11
+        if replaced_has_batchim:  # 규칙 11-1
+            return f'"{orig}는"을 "{replaced}은"으로 한다.'
+        else:  # 규칙 11-2
+            return f'"{orig}"를 "{replaced}"로 한다.'
+
+    elif josa == "은":  # 규칙 12
+        if replaced_has_batchim:
+            if replaced_has_rieul:  # 규칙 12-1-1
+                return f'"{orig}"을 "{replaced}"로 한다.'
+            else:  # 규칙 12-1-2
+                return f'"{orig}"을 "{replaced}"으로 한다.'
+        else:  # 규칙 12-2
+            return f'"{orig}은"을 "{replaced}는"으로 한다.'
+
+    elif josa == "란":  # 규칙 13
+        if replaced_has_batchim:  # 규칙 13-1
+            return f'"{orig}란"을 "{replaced}이란"으로 한다.'
+        else:  # 규칙 13-2
+            return f'"{orig}"를 "{replaced}"로 한다.'
+
+    elif josa == "이란":  # 규칙 14
+        if replaced_has_batchim:
+            if replaced_has_rieul:  # 규칙 14-1-1
+                return f'"{orig}"을 "{replaced}"로 한다.'
+            else:  # 규칙 14-1-2
+                return f'"{orig}"을 "{replaced}"으로 한다.'
+        else:  # 규칙 14-2
+            return f'"{orig}이란"을 "{replaced}란"으로 한다.'
+
+    elif josa == "라":  # 추가 규칙: "라" 조사
+        if replaced_has_batchim:  # 받침이 있으면 "이라"
+            return f'"{orig}라"를 "{replaced}이라"로 한다.'
+        else:  # 받침이 없으면 그대로 "라"
+            return f'"{orig}라"를 "{replaced}라"로 한다.'
+
+    elif josa == "이라":  # 추가 규칙: "이라" 조사
+        if replaced_has_batchim:
+            if replaced_has_rieul:
+                return f'"{orig}이라"를 "{replaced}이라"로 한다.'
+            else:
+                return f'"{orig}이라"를 "{replaced}이라"로 한다.'
+        else:
+            return f'"{orig}이라"를 "{replaced}라"로 한다.'
+
+    # 기본 출력 형식
+    if orig_has_batchim:
+        return f'"{orig}"을 "{replaced}"로 한다.'
+    else:
+        return f'"{orig}"를 "{replaced}"로 한다.'
@@ -0,0 +1,71 @@
+"""조사 규칙 표(format_josa_rules)가 이전 apply_josa_rule과 모든 경우에 같은지 확인하고 속도를 비교
+
+    python bench/josa_rules.py
+
+받침 28종(없음ㆍㄱ…ㅎ)으로 끝나는 한글 단어와 영문ㆍ숫자ㆍ빈 문자열을 원래 단어ㆍ바꿀 단어로 하여,
+표의 모든 조사와 조사 없음ㆍ표에 없는 조사를 조합한 전체 경우를 비교한다(다르면 종료 코드 1).
+같은 경우 목록을 apply_josa_rule, format_josa_rule, format_josa_rules(일괄)로 처리한 시간을 JSON으로 출력한다.
+개정문 생성은 법률마다 일괄 함수를 쓴다. format_josa_rule은 하나씩 부를 때 쓰는 편의 함수로, 일괄 함수를 감싸므로
+호출마다 드는 비용은 이전 if 문보다 크다.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import law_processor as lp
+from josa_reference import apply_josa_rule
+
+# 가(받침 없음), 각, 갂, …, 갈(ㄹ), …, 갛: 받침 28종을 모두 포함
+HANGUL_WORDS = ["행정" + chr(0xAC00 + jong) for jong in range(28)]
+OTHER_WORDS = ["", "A", "z", "7", "ㆍ", "법률(안)"]
+UNKNOWN_JOSA = ["에", "의", "", "등"]
+
+
+def all_cases():
+    words = HANGUL_WORDS + OTHER_WORDS
+    josas = list(lp.JOSA_RULES) + UNKNOWN_JOSA
+    return [(orig, replaced, josa) for josa in josas for orig in words for replaced in words]
+
+
+def timed(func, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20, help="전체 경우를 반복 처리할 횟수")
+    args = parser.parse_args()
+
+    cases = all_cases()
+    expected = [apply_josa_rule(*case) for case in cases]
+    single = [lp.format_josa_rule(*case) for case in cases]
+    batch = lp.format_josa_rules(cases)
+    mismatches = 0
+    for case, want, got_single, got_batch in zip(cases, expected, single, batch):
+        if not want == got_single == got_batch:
+            mismatches += 1
+            print(f"불일치 {case}: {want!r} / {got_single!r} / {got_batch!r}", file=sys.stderr)
+
+    calls = len(cases) * args.rounds
+    reference = timed(lambda: [apply_josa_rule(*case) for case in cases], args.rounds)
+    table = timed(lambda: [lp.format_josa_rule(*case) for case in cases], args.rounds)
+    batched = timed(lambda: lp.format_josa_rules(cases), args.rounds)
+    print(json.dumps({
+        "cases": len(cases),
+        "mismatches": mismatches,
+        "reference_us": round(reference / calls * 1e6, 3),
+        "table_us": round(table / calls * 1e6, 3),
+        "batch_us": round(batched / calls * 1e6, 3),
+    }, ensure_ascii=False, indent=2))
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
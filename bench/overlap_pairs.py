@@ -0,0 +1,94 @@
+"""찾을 단어가 서로 겹치는 단어쌍(행정안전부, 행정안전부장관)의 일괄 개정문이 토큰마다 규칙 하나만 내는지 확인
+
+    python bench/overlap_pairs.py
+    python bench/overlap_pairs.py --pair 법원,지방법원 --pair 지방법원,지방재판소
+
+조사ㆍ접미사를 붙인 긴 단어만 나오는 법률, 짧은 단어만 나오는 법률, 둘이 섞인 법률을 만들어
+단어쌍을 한꺼번에 적용한 개정문이 다음과 같은지 비교한다(다르면 종료 코드 1).
+  긴 단어만 나오는 법률   : 긴 단어의 쌍 하나만 적용한 개정문
+  짧은 단어만 나오는 법률 : 짧은 단어의 쌍 하나만 적용한 개정문
+  섞인 법률              : 위 두 개정문의 규칙(위치를 뺀 부분)을 합친 것
+"""
+import argparse
+import os
+import sys
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import law_processor as lp
+from law_provisions import parse_provisions
+
+DEFAULT_PAIRS = [("행정안전부", "행정자치부"), ("행정안전부장관", "행정자치부장관")]
+
+
+def law_xml(name, sentences):
+    parts = ["<법령>", f"<기본정보><법령ID>1</법령ID><법령명_한글>{escape(name)}</법령명_한글></기본정보>", "<조문>"]
+    for no, sentence in enumerate(sentences, 1):
+        parts.append(f"<조문단위><조문번호>{no}</조문번호><조문내용>{escape(f'제{no}조 {sentence}')}</조문내용></조문단위>")
+    parts.append("</조문></법령>")
+    return "\n".join(parts).encode("utf-8")
+
+
+def sentences(word):
+    tails = [""] + lp.JOSA_LIST + [suffix for suffix in lp.SUFFIX_EXCLUDE if suffix != "등"]
+    return [f"{word}{tail} 소관 {word}{tail}." for tail in tails]
+
+
+def amend(name, sentences_, pairs):
+    xml_data = law_xml(name, sentences_)
+    lines, error = lp.amend_law_pairs({"법령명": name, "MST": name}, pairs, load=lambda mst: parse_provisions(xml_data))
+    if error:
+        raise SystemExit(f"{name}: {error}")
+    return lines
+
+
+def rules(lines):
+    return {line.split(" 중 ", 1)[1] for line in lines}
+
+
+def parse_pair(text):
+    parts = text.split(",")
+    if len(parts) != 2 or not all(parts):
+        raise argparse.ArgumentTypeError(f"찾을 단어,바꿀 단어 형식이 아닙니다: {text}")
+    return tuple(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pair", type=parse_pair, action="append",
+                        help="찾을 단어,바꿀 단어 (두 번 지정, 한쪽 찾을 단어가 다른 쪽을 포함해야 함)")
+    args = parser.parse_args()
+
+    short, long_ = sorted(args.pair or DEFAULT_PAIRS, key=lambda pair: len(pair[0]))
+    if short[0] not in long_[0] or short[0] == long_[0]:
+        parser.error("긴 찾을 단어가 짧은 찾을 단어를 포함해야 합니다.")
+    # 짧은 단어에 조사ㆍ접미사를 붙여 긴 단어가 되는 문장은 짧은 단어만 나오는 법률에서 뺌
+    long_sentences = sentences(long_[0])
+    short_sentences = [s for s in sentences(short[0]) if long_[0] not in s]
+    pairs = [short, long_]
+
+    failures = 0
+    checks = [
+        ("긴 단어", amend("긴단어법", long_sentences, pairs), amend("긴단어법", long_sentences, [long_])),
+        ("짧은 단어", amend("짧은단어법", short_sentences, pairs), amend("짧은단어법", short_sentences, [short])),
+    ]
+    for label, got, want in checks:
+        if got != want:
+            failures += 1
+            print(f"{label}: 단어쌍을 함께 적용한 결과가 다름", file=sys.stderr)
+            for line in sorted(set(got) ^ set(want)):
+                print(f"  {'+' if line in got else '-'} {line}", file=sys.stderr)
+    mixed = rules(amend("섞인법", long_sentences + short_sentences, pairs))
+    expected = rules(checks[0][2]) | rules(checks[1][2])
+    if mixed != expected:
+        failures += 1
+        print("섞인 법률: 규칙이 다름", file=sys.stderr)
+        for rule in sorted(mixed ^ expected):
+            print(f"  {'+' if rule in mixed else '-'} {rule}", file=sys.stderr)
+    print(f"{short[0]} / {long_[0]}: 규칙 {len(expected)}개, 불일치 {failures}건")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
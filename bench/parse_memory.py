@@ -0,0 +1,74 @@
+"""큰 법령 XML을 파싱할 때의 최대 메모리(RSS)를 이전 방식과 비교하는 벤치마크
+
+    python bench/parse_memory.py ~/.cache/law_xml --top 5
+
+크기가 큰 XML 파일부터 골라, 파일마다 두 방식을 각각 새 프로세스에서 실행하고 결과를 JSON으로 출력한다.
+  tree   : ET.fromstring으로 전체 트리를 만든 뒤 조항 표를 만드는 이전 방식
+  stream : law_provisions.parse_provisions (iterparse로 조문단위만 남기고 바로 버림)
+peak_kb는 프로세스 최대 RSS, parse_kb는 XML을 읽은 뒤 파싱하는 동안 늘어난 최대 RSS이다.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+MODES = ("tree", "stream")
+
+
+def run_child(mode, path):
+    import xml.etree.ElementTree as ET
+    from law_provisions import parse_provisions, provisions_from_tree
+
+    with open(path, "rb") as f:
+        data = f.read()
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if mode == "tree":
+        table = provisions_from_tree(ET.fromstring(data))
+    else:
+        table = parse_provisions(data)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"rows": len(table), "peak_kb": peak, "parse_kb": peak - before}))
+
+
+def collect_files(paths, top):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".xml"))
+        else:
+            files.append(path)
+    return sorted(files, key=os.path.getsize, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="법령 XML 파일 또는 <MST>.xml 파일이 있는 디렉터리")
+    parser.add_argument("--top", type=int, default=5, help="크기가 큰 순서로 비교할 파일 수")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.paths[0])
+        return
+
+    results = []
+    for path in collect_files(args.paths, args.top):
+        entry = {"file": os.path.basename(path), "bytes": os.path.getsize(path)}
+        for mode in MODES:
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", mode, path],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            entry[mode] = json.loads(out)
+        if entry["tree"]["rows"] != entry["stream"]["rows"]:
+            raise SystemExit(f"조항 수가 다릅니다: {path}")
+        results.append(entry)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
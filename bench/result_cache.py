@@ -0,0 +1,73 @@
+"""결과 캐시(result_cache)가 같은 요청을 한 번만 놓치는지 확인
+
+    python bench/result_cache.py
+    python bench/result_cache.py --synth 60 --query 지방자치단체:지방정부
+
+로컬 법령 API 서버(bench/fake_drf.py)를 띄우고, 검색ㆍ개정문 생성ㆍ일괄 개정문 생성을 종류마다
+두 번씩(처음은 캐시 없이, 다음은 캐시에서) 실행한다. 그동안 늘어난 result_cache.stats()의 hits, misses가
+1, 1이어야 하고(앱 사이드바의 적중률이 이 값으로 계산됨) 두 번째 결과가 첫 번째와 같아야 한다.
+어긋나면 종료 코드 1.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+import fake_drf
+
+
+def parse_query(text):
+    parts = text.split(":")
+    if len(parts) != 2 or not all(parts):
+        raise argparse.ArgumentTypeError(f"찾을 단어:바꿀 단어 형식이 아닙니다: {text}")
+    return tuple(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--synth", type=int, default=30, help="만들 합성 법령 수")
+    parser.add_argument("--query", type=parse_query, default=("지방자치단체", "지방정부"), help="찾을 단어:바꿀 단어")
+    args = parser.parse_args()
+
+    find_word, replace_word = args.query
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture_dir = os.path.join(tmp, "fixtures")
+        fake_drf.synth_fixtures(fixture_dir, args.synth)
+        server, base = fake_drf.start_server(fake_drf.Fixtures(fixture_dir))
+        # law_processor는 import할 때 환경 변수를 읽음
+        os.environ.update(LAW_API_BASE=base, LAW_CACHE_DIR=os.path.join(tmp, "cache"), LAW_USE_INDEX="0",
+                          LAW_RESULT_CACHE_SIZE="64", LAW_PROCESS_WORKERS="0",
+                          LAW_STORE_PATH=os.path.join(tmp, "no-store.bin"))
+        sys.path.insert(0, os.path.join(BENCH_DIR, "..", "app"))
+        import law_processor as lp
+
+        scenarios = [
+            ("search", lambda: lp.run_search_logic(find_word)),
+            ("amend", lambda: lp.run_amendment_logic(find_word, replace_word)),
+            ("batch", lambda: lp.run_batch_amendment_logic([(find_word, replace_word)])),
+        ]
+        runs = []
+        failures = 0
+        try:
+            for name, run in scenarios:
+                before = lp.result_cache.stats()
+                cold, warm = run(), run()
+                after = lp.result_cache.stats()
+                hits, misses = after["hits"] - before["hits"], after["misses"] - before["misses"]
+                ok = hits == 1 and misses == 1 and cold == warm
+                failures += not ok
+                runs.append({"kind": name, "hits": hits, "misses": misses, "hit_rate": hits / (hits + misses),
+                             "same_output": cold == warm, "ok": ok})
+        finally:
+            server.shutdown()
+
+    print(json.dumps({"failures": failures, "runs": runs}, ensure_ascii=False, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()